@@ -5,49 +5,136 @@ FastAPI application main file
         See: https://www.youtube.com/watch?v=tGD3653BrZ8 for best FastAPI async practices
 """
 
+# STARTUP PROFILING : imported first so that it can time every other import (STARTUP_PROFILE=1)
+from .utils import startup
+
 # MAIN : packages running the API
 import os
+import asyncio
 import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse, PlainTextResponse
+from .utils.ratelimit import RateLimitMiddleware
+from .utils import metrics
+from .routes.auth.schemas import StatusMessage
 
 # ROUTES : API route definitions for handling endpoints
 from .routes.auth.auth import router as auth
+from .routes.auth.limits import IP_RULES
+from .routes.chat.chat import router as chat
+from .routes.social.social import router as social
+from .routes.learning.learning import router as learning
+from .routes.search.search import router as search
+from .routes.admin.admin import router as admin
+from .routes.analytics.analytics import router as analytics
 
 # DB : Neo4j connection, sessions and CRUD operations
-from dotenv import load_dotenv
-from neomodel import config
-from neomodel import adb
+from contextlib import asynccontextmanager
+from .utils import db, queries
+from .utils.shared import shared_state, invalidations
+from .utils.httpcache import http_cache
 from .models.social import User
-
-load_dotenv() # Load environment variables from .env file
-NEO4J_URI = os.getenv("NEO4J_URI")
-NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
-if not (NEO4J_URI and NEO4J_USERNAME and NEO4J_PASSWORD):
-    raise ValueError(
-        "One or more .env variables are not set: NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD"
-        )
-
-drivers = {}
-config.DATABASE_URL = 'neo4j+s://{}:{}@{}'.format(
-    NEO4J_USERNAME, 
-    NEO4J_PASSWORD, 
-    NEO4J_URI.split("://")[1]
-    )
+from .models.chat import Chatroom, Message
+from .models.learning import Classroom, LearningModule
+
+# background workers shut down with the app
+from .routes.auth.services import mail_queue, last_login_buffer
+from .routes.auth.hashing import hashing_pool
+from .routes.auth.cache import user_cache
+from .routes.auth.validation import password_blocklist
+from .routes.chat.services import message_buffer
+from .routes.chat.hub import hub
+from .routes.social.suggestions import suggestion_index
+from .routes.learning.paths import path_cache
+from .routes.search.cache import prefix_cache
+from .routes.admin.jobs import job_runner
+from .routes.analytics.store import activity_store
+from .routes.admin.services import prune_periodically
+from .utils.settings import settings
 
 ######################################################################
 
 logging.getLogger('passlib').setLevel(logging.ERROR)
 
+# Cypher spans & gauges read from the background workers at scrape time
+metrics.instrument_neomodel()
+metrics.gauge("murof_bcrypt_queue_depth", "Hashing jobs waiting for a free worker", lambda: hashing_pool.stats()["queue_depth"])
+metrics.gauge("murof_bcrypt_pending", "Hashing jobs submitted and not yet finished", lambda: hashing_pool.pending)
+metrics.gauge("murof_bcrypt_rejected", "Hashing jobs rejected because the pool was saturated", lambda: hashing_pool.rejected)
+metrics.gauge("murof_password_blocklist_hits", "Passwords rejected by the breached-password blocklist", lambda: password_blocklist.hits)
+metrics.gauge("murof_mail_queue_length", "Mails waiting to be sent", mail_queue.qsize)
+metrics.gauge("murof_mail_dead_letters", "Mails given up on after retries", lambda: len(mail_queue.dead_letters))
+metrics.gauge("murof_last_login_pending", "Buffered last_login updates", lambda: len(last_login_buffer))
+metrics.gauge("murof_user_cache_size", "Entries in the token -> user cache", lambda: len(user_cache))
+metrics.gauge("murof_chat_connections", "Open chat sockets", hub.connections)
+metrics.gauge("murof_chat_dropped", "Chat sockets dropped as slow consumers", lambda: hub.dropped)
+metrics.gauge("murof_chat_messages_pending", "Chat messages waiting for the next batched write", lambda: len(message_buffer))
+metrics.gauge("murof_social_suggestion_users", "Users in the precomputed suggestion table", lambda: len(suggestion_index.table))
+metrics.gauge("murof_learning_path_cache_size", "Classroom paths in the path cache", lambda: len(path_cache))
+metrics.gauge("murof_search_prefix_cache_size", "Typeahead prefixes in the search cache", lambda: len(prefix_cache))
+metrics.gauge("murof_admin_jobs_running", "Bulk account jobs running on this worker", lambda: job_runner.running)
+metrics.gauge("murof_analytics_statements", "Activity statements appended to the local log", lambda: activity_store.appended)
+metrics.gauge("murof_analytics_folded", "User/module rollups folded into VISITED edges", lambda: activity_store.folded)
+metrics.gauge("murof_http_not_modified", "Conditional GETs answered with 304", lambda: http_cache.not_modified)
+metrics.gauge("murof_http_cache_hits", "Responses served from the shared response cache", lambda: http_cache.hits)
+metrics.gauge("murof_invalidations_published", "Cache invalidations broadcast to the other workers", lambda: invalidations.published)
+metrics.gauge("murof_invalidations_received", "Cache invalidations received from the other workers", lambda: invalidations.received)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """FastAPI application startup and shutdown context manager"""
+    # the mail queue and bcrypt pool start on first use, they aren't needed to serve the first request
+    # teardown runs in `finally`: a failed startup step still stops what the previous ones started
+    tasks, analytics_folder = [], None
+    try:
+        with startup.step("db.connect"):
+            await db.connect()
+        with startup.step("password blocklist"):
+            password_blocklist.open()
+        with startup.step("analytics store"):
+            await activity_store.open()
+        with startup.step("schema"):
+            await db.install_schema(User, Chatroom, Message, Classroom, LearningModule, statements=queries.SCHEMA)
+        with startup.step("background tasks"):
+            last_login_buffer.start()
+            tasks.append(asyncio.create_task(metrics.monitor_loop_lag()))
+            tasks.append(asyncio.create_task(suggestion_index.run()))
+            invalidations.start()
+            if settings.prune_interval > 0:
+                tasks.append(asyncio.create_task(prune_periodically()))
+            analytics_folder = asyncio.create_task(activity_store.run())
+        startup.profiler.finish()
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        await job_runner.stop()
+        if analytics_folder is not None:
+            analytics_folder.cancel()
+            await asyncio.gather(analytics_folder, return_exceptions=True) # final fold while the db is still connected
+        await activity_store.close()
+        await invalidations.stop()
+        await last_login_buffer.stop()
+        await message_buffer.stop()
+        await mail_queue.stop()
+        hashing_pool.shutdown()
+        await shared_state.close()
+        password_blocklist.close()
+        await db.disconnect()
+
 app = FastAPI(
     title="Murof API", 
-    # lifespan=lifespan, # see archived db.py file
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc"
 )
 
+# Per-IP rate limits on login/registration/password reset
+# (added before CORS so that 429 responses still carry CORS headers)
+app.add_middleware(RateLimitMiddleware, rules=IP_RULES)
+
 # CORS middleware from SvelteKit frontend
 origins = [
     "http://localhost:5173",
@@ -61,11 +148,20 @@ app.add_middleware(
     allow_credentials=True
 )
 
+# Latency per route template, outermost so it times the whole middleware stack
+app.add_middleware(metrics.TimingMiddleware)
+
 app.include_router(auth, prefix="/auth")
+app.include_router(chat, prefix="/chat")
+app.include_router(social, prefix="/social")
+app.include_router(learning, prefix="/learning")
+app.include_router(search, prefix="/search")
+app.include_router(admin, prefix="/admin")
+app.include_router(analytics, prefix="/analytics")
 
 ######################################################################
 
-@app.get("/")
+@app.get("/", response_model=StatusMessage)
 async def root():
     """
     Root endpoint
@@ -78,6 +174,11 @@ async def favicon():
     file_path = os.path.join(os.path.dirname(__file__), "./static/favicon.ico")
     return FileResponse(file_path)
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    """Prometheus scrape endpoint (latency histograms, loop lag, queue & cache gauges)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 ######################################################################
 
 @app.get("/test", include_in_schema=False)
@@ -85,8 +186,7 @@ async def test():
     """Test the neo4j database connection & neomodel"""
     username = "robsyc"
 
-    query = f"MATCH (u:User {{ username: '{username}' }}) RETURN u"
-    results_adb, meta = await adb.cypher_query(query)
+    results_adb = await queries.run("user_by_username", username=username)
     user_adb = results_adb[0][0] if results_adb else None
 
     results_neomodel = await User.nodes.get_or_none(username=username)
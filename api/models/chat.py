@@ -0,0 +1,24 @@
+from neomodel import (
+    AsyncStructuredNode,
+    AsyncRelationshipTo,
+    AsyncRelationshipFrom,
+    UniqueIdProperty,
+    StringProperty,
+    DateTimeProperty,
+)
+
+class Chatroom(AsyncStructuredNode):
+    uid = UniqueIdProperty()
+    name = StringProperty(required=True, max_length=128)
+    created = DateTimeProperty(default_now=True)
+
+    messages = AsyncRelationshipTo("Message", "HAS_MESSAGE")
+
+class Message(AsyncStructuredNode):
+    uid = UniqueIdProperty()
+    room = StringProperty() # uid of the Chatroom, denormalized for the (room, timestamp) history index
+    text = StringProperty(required=True, max_length=2000)
+    timestamp = DateTimeProperty(default_now=True)
+
+    chatroom = AsyncRelationshipFrom("Chatroom", "HAS_MESSAGE")
+    author = AsyncRelationshipFrom(".social.User", "POSTED")
@@ -0,0 +1,54 @@
+from neomodel import (
+    AsyncStructuredNode,
+    AsyncStructuredRel,
+    AsyncRelationshipTo,
+    AsyncRelationshipFrom,
+    UniqueIdProperty,
+    StringProperty,
+    DateTimeProperty,
+    FloatProperty,
+)
+
+class VisitedRel(AsyncStructuredRel):
+    first_visit = DateTimeProperty(default_now=True, db_property="firstVisit")
+    last_visit = DateTimeProperty(default_now=True, db_property="lastVisit")
+
+class FlaggedRel(AsyncStructuredRel):
+    created = DateTimeProperty(default_now=True)
+
+class AboutRel(AsyncStructuredRel):
+    weight = FloatProperty(default=1.0) # 0-1, relative to the module's strongest concept
+    extractor = StringProperty() # which extractor found it (see data/concepts.py)
+
+class Group(AsyncStructuredNode):
+    uid = UniqueIdProperty()
+    name = StringProperty(required=True, max_length=128)
+    created = DateTimeProperty(default_now=True)
+    bio = StringProperty(max_length=1024, default="")
+
+    members = AsyncRelationshipFrom(".social.User", "IS_IN")
+
+class Classroom(Group): # labelled Group:Classroom
+    modules = AsyncRelationshipTo("LearningModule", "HAS_MODULE")
+
+class Module(AsyncStructuredNode):
+    uid = UniqueIdProperty()
+    name = StringProperty(required=True, max_length=128)
+    created = DateTimeProperty(default_now=True)
+    modified = DateTimeProperty(default_now=True) # bumped on every edit, invalidates cached paths
+    content = StringProperty(default="")
+
+class LearningModule(Module): # labelled Module:LearningModule
+    next = AsyncRelationshipTo("LearningModule", "NEXT")
+    previous = AsyncRelationshipFrom("LearningModule", "NEXT")
+    classrooms = AsyncRelationshipFrom("Classroom", "HAS_MODULE")
+    visited_by = AsyncRelationshipFrom(".social.User", "VISITED", model=VisitedRel)
+    flagged_by = AsyncRelationshipFrom(".social.User", "FLAGGED", model=FlaggedRel)
+    concepts = AsyncRelationshipTo("Concept", "ABOUT", model=AboutRel)
+
+class Concept(AsyncStructuredNode):
+    uid = UniqueIdProperty() # "concept-" + hash of the normalized name, see data/concepts.py
+    name = StringProperty(required=True)
+    normalized = StringProperty()
+
+    modules = AsyncRelationshipFrom("LearningModule", "ABOUT", model=AboutRel)
@@ -1,7 +1,9 @@
 from neomodel import (
     AsyncStructuredNode, 
-    # AsyncRelationshipTo, 
-    # AsyncRelationshipFrom, 
+    AsyncStructuredRel,
+    AsyncRelationship,
+    AsyncRelationshipTo, 
+    AsyncRelationshipFrom, 
     UniqueIdProperty,
     StringProperty, 
     EmailProperty,
@@ -11,10 +13,19 @@ from neomodel import (
     BooleanProperty,
     # ArrayProperty
 )
+from .learning import VisitedRel, FlaggedRel
+
+class KnowsRel(AsyncStructuredRel):
+    created = DateTimeProperty(default_now=True)
+
+class FriendRel(AsyncStructuredRel):
+    created = DateTimeProperty(default_now=True)
+    best_friend = BooleanProperty(default=False, db_property="bestFriend")
 
 class User(AsyncStructuredNode):
     uid = UniqueIdProperty()
     is_verified = BooleanProperty(default=False)
+    is_admin = BooleanProperty(default=False) # may use the /admin routes
     created_at = DateTimeProperty(default_now=True)
     last_login = DateTimeProperty(default_now=True)
 
@@ -22,4 +33,13 @@ class User(AsyncStructuredNode):
     email = EmailProperty(unique_index=True, required=True)
     hashed_password = StringProperty(required=True, min_length=8, max_length=64)
     # birthdate = DateProperty(required=True)
-    # bio = StringProperty(max_length=256, default="")
\ No newline at end of file
+    # bio = StringProperty(max_length=256, default="")
+
+    # social graph (FRIENDS is mutual, so it is matched regardless of direction)
+    knows = AsyncRelationshipTo("User", "KNOWS", model=KnowsRel)
+    known_by = AsyncRelationshipFrom("User", "KNOWS", model=KnowsRel)
+    friends = AsyncRelationship("User", "FRIENDS", model=FriendRel)
+
+    # learning progress
+    visited = AsyncRelationshipTo(".learning.LearningModule", "VISITED", model=VisitedRel)
+    flagged = AsyncRelationshipTo(".learning.LearningModule", "FLAGGED", model=FlaggedRel)
@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from ..auth.services import get_admin_user
+from ...utils.settings import settings
+from .schemas import UsernameList, JobStatus, GroupRole
+from .jobs import job_runner
+from .services import (
+    start_import,
+    start_verify,
+    start_delete,
+    start_prune
+)
+
+
+# TODO:
+# - list recent jobs & cancel a running one
+# - bulk role changes (IS_IN) for classroom members
+# - audit log of admin actions
+
+
+######################################################################
+# SET VARIABLES
+
+router = APIRouter(tags=["admin"])
+
+
+######################################################################
+# BULK ACCOUNTS
+
+@router.post("/users/import", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def import_users(
+        file: UploadFile = File(..., description="CSV (with a header line) or NDJSON rows of username, email & password"),
+        group: str | None = Query(None, description="uid of a group/classroom to add the new users to"),
+        role: GroupRole = Query(GroupRole.student, description="Role of the new users in the group"),
+        verified: bool = Query(False, description="Mark the accounts as verified instead of mailing verification links"),
+        admin = Depends(get_admin_user)
+        ):
+    """
+    Bulk registration endpoint. Rows are validated like /auth/register, then created in the background.
+    Args:
+        file (UploadFile): The users to create.
+        group (str): Optional group/classroom uid.
+        role (GroupRole): Role in that group.
+        verified (bool): Skip email verification.
+    Returns:
+        JobStatus: The import job, poll /admin/jobs/{id} for progress.
+    """
+    return (await start_import(file, admin, group, role.value, verified)).to_dict()
+
+@router.post("/users/verify", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def verify_users(form: UsernameList, admin = Depends(get_admin_user)):
+    """
+    Bulk email verification endpoint. Marks the given accounts as verified.
+    Args:
+        form (UsernameList): The usernames.
+    Returns:
+        JobStatus: The verify job.
+    """
+    return (await start_verify(form.usernames, admin)).to_dict()
+
+@router.post("/users/delete", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def delete_users(form: UsernameList, admin = Depends(get_admin_user)):
+    """
+    Bulk delete endpoint. Deletes the given accounts and their relationships (admins are skipped).
+    Args:
+        form (UsernameList): The usernames.
+    Returns:
+        JobStatus: The delete job.
+    """
+    return (await start_delete(form.usernames, admin)).to_dict()
+
+@router.post("/users/prune", response_model=JobStatus, status_code=status.HTTP_202_ACCEPTED)
+async def prune_users(
+        older_than_days: float = Query(settings.prune_unverified_after_days, gt=0),
+        admin = Depends(get_admin_user)
+        ):
+    """
+    Delete accounts that were never verified, also run every PRUNE_INTERVAL seconds.
+    Args:
+        older_than_days (float): Only accounts created at least this long ago.
+    Returns:
+        JobStatus: The prune job.
+    """
+    return (await start_prune(older_than_days, admin)).to_dict()
+
+
+######################################################################
+# JOBS
+
+@router.get("/jobs/{job_id}", response_model=JobStatus)
+async def read_job(job_id: str, admin = Depends(get_admin_user)):
+    """
+    Progress of a bulk job, started on any worker.
+    Args:
+        job_id (str): Job id.
+    Returns:
+        JobStatus: Status, row counts and the first errors.
+    """
+    job = await job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -0,0 +1,67 @@
+# Account administration Cypher statements
+#   Registered by name with `utils.queries` when this module is imported (the router's
+#   services import it), and run with `queries.run(name, **params)` like every other statement.
+from ...utils.queries import register
+
+######################################################################
+
+QUERIES = {
+    # bulk account administration, one chunk of rows per statement (see routes/admin)
+    "group_exists": "RETURN EXISTS { MATCH (:Group {uid: $uid}) } AS exists",
+    # rows are deduplicated beforehand, the unique constraints still guard concurrent registrations
+    "create_users": """
+        OPTIONAL MATCH (g:Group {uid: $group})
+        UNWIND $rows AS row
+        WITH g, row,
+            EXISTS { MATCH (:User {username: row.username}) } AS username_taken,
+            EXISTS { MATCH (:User {email: row.email}) } AS email_taken
+        FOREACH (_ IN CASE WHEN username_taken OR email_taken THEN [] ELSE [1] END |
+            CREATE (u:User) SET u = row
+            FOREACH (group_ IN CASE WHEN g IS NULL THEN [] ELSE [g] END |
+                CREATE (u)-[:IS_IN {created: row.created_at, role: $role}]->(group_)
+            )
+        )
+        RETURN row.uid AS uid, CASE
+            WHEN username_taken THEN 'username_taken'
+            WHEN email_taken THEN 'email_taken'
+            ELSE 'created'
+        END AS status
+        """,
+    "verify_users": """
+        UNWIND $usernames AS username
+        MATCH (u:User {username: username})
+        WHERE NOT coalesce(u.is_verified, false)
+        SET u.is_verified = true
+        RETURN u.uid AS uid, username
+        """,
+    # admins are never bulk-deleted (nor is the admin running the job)
+    "delete_users": """
+        UNWIND $usernames AS username
+        MATCH (u:User {username: username})
+        WHERE NOT coalesce(u.is_admin, false)
+        WITH u, u.uid AS uid, username, [(u)-[:FRIENDS]-(f:User) | f.uid] AS friends
+        DETACH DELETE u
+        RETURN uid, username, friends
+        """,
+    # `is_verified = false` (not just "not true") leaves seeded users without the property alone
+    "count_unverified": """
+        MATCH (u:User)
+        WHERE u.is_verified = false AND u.created_at < $cutoff
+        RETURN count(u) AS count
+        """,
+    "prune_unverified": """
+        MATCH (u:User)
+        WHERE u.is_verified = false AND u.created_at < $cutoff
+        WITH u LIMIT $limit
+        WITH u, u.uid AS uid, [(u)-[:FRIENDS]-(f:User) | f.uid] AS friends
+        DETACH DELETE u
+        RETURN uid, friends
+        """,
+}
+
+# Indexes for the statements above, created at startup (see `db.install_schema`)
+SCHEMA = [
+    "CREATE INDEX user_verified_created IF NOT EXISTS FOR (u:User) ON (u.is_verified, u.created_at)",
+]
+
+register(QUERIES, SCHEMA)
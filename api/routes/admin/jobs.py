@@ -0,0 +1,108 @@
+# Background jobs for bulk account administration
+#   A bulk import hashes one password per row, so it can run for minutes. Routes only
+#   validate the request, start a `Job` on the event loop and answer 202 with its id.
+#   Progress is written to the shared state under "job:<id>" after every chunk, so any
+#   worker can answer GET /admin/jobs/{id}; it expires ADMIN_JOB_TTL after the last update.
+import json
+import time
+import uuid
+import asyncio
+import logging
+from contextvars import Context
+from typing import Awaitable, Callable
+from ...utils.settings import settings
+from ...utils.shared import shared_state
+
+######################################################################
+
+logger = logging.getLogger(__name__)
+MAX_ERRORS = 100 # row errors kept per job, `failed` still counts all of them
+
+
+class Job:
+    def __init__(self, kind: str, total: int = 0, created_by: str | None = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.created_by = created_by
+        self.status = "pending" # -> running -> completed | failed | cancelled
+        self.total = total
+        self.processed = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.errors: list[dict] = []
+        self.created = time.time()
+        self.started: float | None = None
+        self.finished: float | None = None
+
+    def fail(self, detail: str, row: int | None = None):
+        """Count one row as failed, keeping the first MAX_ERRORS reasons"""
+        self.failed += 1
+        if len(self.errors) < MAX_ERRORS:
+            self.errors.append({"row": row, "detail": detail})
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "created_by": self.created_by,
+            "status": self.status,
+            "total": self.total,
+            "processed": self.processed,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "errors": self.errors,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+        }
+
+    async def save(self):
+        await shared_state.set(f"job:{self.id}", json.dumps(self.to_dict()), ttl=settings.admin_job_ttl)
+
+
+class JobRunner:
+    def __init__(self):
+        self._tasks: dict[str, asyncio.Task] = {}
+
+    @property
+    def running(self) -> int:
+        return len(self._tasks)
+
+    async def start(self, job: Job, work: Callable[[Job], Awaitable]) -> Job:
+        """Run `await work(job)` in the background, `work` updates the job's counters and saves it"""
+        await job.save()
+        task = asyncio.create_task(self._run(job, work), context=Context()) # outlives the request that started it
+        self._tasks[job.id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job.id, None))
+        return job
+
+    async def _run(self, job: Job, work: Callable[[Job], Awaitable]):
+        job.status, job.started = "running", time.time()
+        try:
+            await job.save()
+            await work(job)
+            job.status = "completed"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as error:
+            logger.exception("%s job %s failed", job.kind, job.id)
+            job.status = "failed"
+            job.fail(f"Job aborted: {error}")
+        finally:
+            job.finished = time.time()
+            await job.save()
+        logger.info("%s job %s %s: %d/%d rows succeeded", job.kind, job.id, job.status, job.succeeded, job.total)
+
+    async def get(self, job_id: str) -> dict | None:
+        value = await shared_state.get(f"job:{job_id}")
+        return json.loads(value) if value is not None else None
+
+    async def stop(self):
+        """Cancel the jobs still running on this worker (their status is saved as cancelled)"""
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+job_runner = JobRunner()
@@ -0,0 +1,37 @@
+# Admin-related schemas for data validation
+from enum import Enum
+from pydantic import BaseModel, Field
+from ...utils.settings import settings
+
+class GroupRole(str, Enum):
+    """Roles on IS_IN edges (teachers & admins may edit the group's modules)"""
+    student = "student"
+    user = "user"
+    teacher = "teacher"
+    admin = "admin"
+
+class UsernameList(BaseModel):
+    usernames: list[str] = Field(
+        ...,
+        min_length=1, max_length=settings.admin_import_max_rows,
+        description="Usernames of the accounts to modify",
+        example=["johndoe", "janesmith"]
+        )
+
+class JobError(BaseModel):
+    row: int | None = Field(None, description="1-based row of the uploaded file (or position in the list)")
+    detail: str
+
+class JobStatus(BaseModel):
+    id: str
+    kind: str = Field(..., description="import, verify, delete or prune")
+    created_by: str | None = Field(None, description="uid of the admin, None for scheduled jobs")
+    status: str = Field(..., description="pending, running, completed, failed or cancelled")
+    total: int
+    processed: int
+    succeeded: int
+    failed: int
+    errors: list[JobError] = Field([], description="The first failed rows and why")
+    created: float
+    started: float | None = None
+    finished: float | None = None
@@ -0,0 +1,232 @@
+# Admin-related helper functions
+#   Bulk operations run as background jobs (see jobs.py) and write in chunks of
+#   ADMIN_CHUNK_SIZE rows, one `UNWIND $rows` statement per chunk instead of one
+#   transaction per user. Imports hash the next chunk's passwords on the bcrypt pool
+#   while the current chunk is being written.
+import io
+import csv
+import json
+import time
+import asyncio
+import logging
+from fastapi import HTTPException, UploadFile
+from neomodel.exceptions import UniqueProperty
+from pydantic import ValidationError
+
+from ...models.social import User
+from ...utils import queries
+from ...utils.settings import settings
+from ...utils.shared import shared_state
+from ..auth.schemas import RegistrationForm
+from ..auth.cache import invalidate_users
+from ..auth.hashing import hashing_pool, HASH_RETRY_AFTER
+from ..auth.services import mail_queue, create_verification_token, send_verification_email
+from ..social.services import forget_users
+from . import cypher  # registers this router's statements with `utils.queries`
+from .jobs import Job, job_runner
+
+######################################################################
+
+logger = logging.getLogger(__name__)
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl", "application/json")
+UPLOAD_CHUNK = 64 * 1024
+MAX_ROW_BYTES = 1024 # generous for username, email & password: bounds the upload size along with the row cap
+
+def chunked(rows: list, size: int = settings.admin_chunk_size) -> list[list]:
+    return [rows[i:i + size] for i in range(0, len(rows), size)]
+
+######################################################################
+# IMPORT
+
+async def read_upload(file: UploadFile, max_rows: int = settings.admin_import_max_rows) -> bytes:
+    """The upload's content, read in chunks and given up (413) as soon as it has more lines than an import allows"""
+    too_large = HTTPException(status_code=413, detail=f"At most {max_rows} rows per import")
+    max_lines, max_bytes = max_rows + 1, (max_rows + 1) * MAX_ROW_BYTES # + a CSV header
+    chunks, lines, size = [], 0, 0
+    while chunk := await file.read(UPLOAD_CHUNK):
+        lines += chunk.count(b"\n")
+        size += len(chunk)
+        if lines > max_lines or size > max_bytes:
+            raise too_large
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+def parse_upload(data: bytes, filename: str | None, content_type: str | None) -> list[tuple[int, dict]]:
+    """(row number, fields) of an NDJSON (.ndjson/.jsonl) or CSV (with a header line) upload"""
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Uploaded file must be UTF-8 encoded")
+    if content_type in NDJSON_TYPES or (filename or "").lower().endswith((".ndjson", ".jsonl")):
+        rows = []
+        for number, line in enumerate(text.splitlines(), 1):
+            if line.strip():
+                try:
+                    rows.append((number, json.loads(line)))
+                except json.JSONDecodeError:
+                    rows.append((number, None))
+    else:
+        rows = list(enumerate(csv.DictReader(io.StringIO(text)), 1))
+    if len(rows) > settings.admin_import_max_rows:
+        raise HTTPException(status_code=413, detail=f"At most {settings.admin_import_max_rows} rows per import")
+    return rows
+
+def validate_rows(rows: list[tuple[int, dict]], job: Job) -> list[tuple[int, RegistrationForm]]:
+    """The valid rows as registration forms; invalid or repeated rows are recorded as failed on `job`"""
+    forms, usernames, emails = [], set(), set()
+    for number, fields in rows:
+        if not isinstance(fields, dict):
+            job.fail("Not a JSON object", number)
+            continue
+        try:
+            form = RegistrationForm(**{key: fields.get(key) for key in ("username", "email", "password")})
+        except ValidationError as error:
+            first = error.errors()[0]
+            job.fail(f"{'.'.join(map(str, first['loc']))}: {first['msg']}", number)
+            continue
+        if form.username in usernames or form.email in emails:
+            job.fail("Username or email repeated in this file", number)
+            continue
+        usernames.add(form.username)
+        emails.add(form.email)
+        forms.append((number, form))
+    job.processed = job.failed
+    return forms
+
+async def hash_passwords(passwords: list[str]) -> list[str]:
+    """
+    Hash on every worker of the bcrypt pool at once, but never more than that, so
+    logins & registrations still find room in its queue; back off while it's saturated
+    """
+    slots = asyncio.Semaphore(hashing_pool.max_workers)
+    async def hash_one(password: str) -> str:
+        async with slots:
+            while True:
+                try:
+                    return await hashing_pool.hash(password)
+                except HTTPException:
+                    await asyncio.sleep(HASH_RETRY_AFTER)
+    return await asyncio.gather(*map(hash_one, passwords))
+
+async def create_users(rows: list[dict], group: str | None, role: str) -> dict[str, str]:
+    """Create the rows whose username & email are free, returns uid -> status"""
+    try:
+        results = await queries.run("create_users", rows=rows, group=group, role=role)
+    except UniqueProperty: # a concurrent registration took one of the names, retry row by row
+        results = []
+        for row in rows:
+            try:
+                results += await queries.run("create_users", rows=[row], group=group, role=role)
+            except UniqueProperty as error:
+                results.append([row["uid"], "username_taken" if "`username`" in str(error) else "email_taken"])
+    return dict(results)
+
+async def send_verification_emails(users: list[tuple[str, str]]):
+    # wait for room rather than dead-lettering mails of large imports
+    while mail_queue.qsize() + len(users) > settings.mail_queue_size:
+        await asyncio.sleep(1)
+    for username, email in users:
+        await send_verification_email(email, username, create_verification_token(email))
+
+async def import_users(job: Job, forms: list[tuple[int, RegistrationForm]], group: str | None, role: str, verified: bool):
+    chunks = chunked(forms)
+    hashing = asyncio.create_task(hash_passwords([form.password for _, form in chunks[0]])) if chunks else None
+    try:
+        for i, chunk in enumerate(chunks):
+            hashes = await hashing
+            if i + 1 < len(chunks):
+                hashing = asyncio.create_task(hash_passwords([form.password for _, form in chunks[i + 1]]))
+            users = [
+                User(username=form.username, email=form.email, hashed_password=hashed, is_verified=verified)
+                for (_, form), hashed in zip(chunk, hashes)
+            ]
+            rows = [User.deflate(user.__properties__, user) for user in users] # validates & fills in uid, created_at, ...
+            statuses = await create_users(rows, group, role)
+            created = []
+            for (number, form), row in zip(chunk, rows):
+                status = statuses.get(row["uid"])
+                if status == "created":
+                    created.append((form.username, form.email))
+                else:
+                    job.fail("Email already taken" if status == "email_taken" else "Username already taken", number)
+            job.succeeded += len(created)
+            job.processed += len(chunk)
+            await job.save()
+            if not verified:
+                await send_verification_emails(created)
+    finally:
+        if hashing is not None:
+            hashing.cancel()
+
+async def start_import(file: UploadFile, admin, group: str | None, role: str, verified: bool) -> Job:
+    """Parse & validate the upload now (it is closed once the response is sent), create the users in the background"""
+    if group is not None and not (await queries.run("group_exists", uid=group))[0][0]:
+        raise HTTPException(status_code=404, detail="Group not found")
+    rows = parse_upload(await read_upload(file), file.filename, file.content_type)
+    job = Job("import", total=len(rows), created_by=admin.uid)
+    forms = validate_rows(rows, job)
+    return await job_runner.start(job, lambda job: import_users(job, forms, group, role, verified))
+
+######################################################################
+# VERIFY & DELETE
+
+async def forget_deleted(results: list):
+    """Deleted users (rows of uid, ..., friends) drop out of suggestions and their friends' lists"""
+    await forget_users([row[0] for row in results], [friend for row in results for friend in row[-1]])
+
+async def update_users(job: Job, query: str, usernames: list[str], missing: str, after=None):
+    """
+    Run `query` over `usernames` chunk by chunk, usernames it didn't return are recorded as `missing`;
+    `after(results)` is awaited for each chunk
+    """
+    position = {username: i for i, username in reversed(list(enumerate(usernames, 1)))}
+    for chunk in chunked(list(position)):
+        results = await queries.run(query, usernames=chunk)
+        await invalidate_users([row[0] for row in results])
+        if after is not None:
+            await after(results)
+        found = {row[1] for row in results}
+        for username in chunk:
+            if username not in found:
+                job.fail(f"{username}: {missing}", position[username])
+        job.succeeded += len(found)
+        job.processed += len(chunk)
+        await job.save()
+    job.processed = job.total # repeated usernames
+
+async def start_verify(usernames: list[str], admin) -> Job:
+    job = Job("verify", total=len(usernames), created_by=admin.uid)
+    return await job_runner.start(job, lambda job: update_users(job, "verify_users", usernames, "not found or already verified"))
+
+async def start_delete(usernames: list[str], admin) -> Job:
+    job = Job("delete", total=len(usernames), created_by=admin.uid)
+    return await job_runner.start(job, lambda job: update_users(job, "delete_users", usernames, "not found or an admin", forget_deleted))
+
+######################################################################
+# PRUNING
+
+async def prune_unverified(job: Job, cutoff: float):
+    """Delete unverified accounts created before `cutoff`, a chunk per transaction until none are left"""
+    job.total = (await queries.run("count_unverified", cutoff=cutoff))[0][0]
+    while results := await queries.run("prune_unverified", cutoff=cutoff, limit=settings.admin_chunk_size):
+        # unverified users can't log in, so no worker has them cached
+        await forget_deleted(results)
+        job.succeeded += len(results)
+        job.processed = job.succeeded
+        job.total = max(job.total, job.processed)
+        await job.save()
+
+async def start_prune(older_than_days: float, admin=None) -> Job:
+    job = Job("prune", created_by=admin.uid if admin is not None else None)
+    cutoff = time.time() - older_than_days * 86400
+    return await job_runner.start(job, lambda job: prune_unverified(job, cutoff))
+
+async def prune_periodically(interval: float = settings.prune_interval):
+    """Start a prune job every `interval` seconds, on whichever worker takes the shared lock first"""
+    while True:
+        try:
+            if await shared_state.set("lock:prune_unverified", "1", ttl=interval * 0.9, only_if_new=True):
+                await start_prune(settings.prune_unverified_after_days)
+        except Exception:
+            logger.exception("Starting the scheduled prune failed")
+        await asyncio.sleep(interval)
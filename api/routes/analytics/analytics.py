@@ -0,0 +1,80 @@
+from fastapi import APIRouter, Body, Depends, Query
+from ..auth.services import get_current_user
+from ...utils.settings import settings
+from .schemas import Statement, StatementReceipt, UserActivity, ModuleStats, ClassroomActivity
+from .services import (
+    record_statements,
+    get_user_activity,
+    get_module_stats,
+    get_classroom_activity
+)
+
+
+# TODO:
+# - forward statements to the LRS (Trax) once it is set up
+# - ISO 8601 durations & full xAPI actor/object/result objects
+# - time-bucketed (daily) rollups for activity charts
+
+
+######################################################################
+# SET VARIABLES
+
+router = APIRouter(tags=["analytics"])
+
+
+######################################################################
+# INGESTION
+
+@router.post("/statements", response_model=StatementReceipt)
+async def post_statements(
+        statements: list[Statement] = Body(..., min_length=1, max_length=settings.analytics_batch_size),
+        current_user = Depends(get_current_user)
+        ):
+    """
+    Record a batch of learning activity statements for the current user. They are appended to
+    the activity log and rolled up immediately; VISITED edges are updated in bulk later.
+    Statements naming an unknown module (404) or a classroom the user doesn't belong to (403)
+    reject the batch.
+    Args:
+        statements (list[Statement]): At most ANALYTICS_BATCH_SIZE statements.
+    Returns:
+        StatementReceipt: How many statements were received & newly stored.
+    """
+    return await record_statements(current_user.uid, statements)
+
+
+######################################################################
+# DASHBOARDS
+
+@router.get("/me", response_model=UserActivity)
+async def my_activity(limit: int = Query(50, ge=1, le=500), current_user = Depends(get_current_user)):
+    """
+    The current user's activity totals and per-module rollups.
+    Args:
+        limit (int): Number of modules, most recently studied first.
+    Returns:
+        UserActivity: totals & modules.
+    """
+    return await get_user_activity(current_user.uid, limit)
+
+@router.get("/modules/{module_uid}", response_model=ModuleStats)
+async def module_stats(module_uid: str, current_user = Depends(get_current_user)):
+    """
+    Activity on a learning module, across all learners (teachers of its classrooms only).
+    Args:
+        module_uid (str): Module uid.
+    Returns:
+        ModuleStats: events, learners, completions & time spent.
+    """
+    return await get_module_stats(module_uid, current_user.uid)
+
+@router.get("/classrooms/{classroom_uid}", response_model=ClassroomActivity)
+async def classroom_activity(classroom_uid: str, current_user = Depends(get_current_user)):
+    """
+    Per-learner activity in a classroom (its teachers only).
+    Args:
+        classroom_uid (str): Classroom uid.
+    Returns:
+        ClassroomActivity: totals & one row per learner.
+    """
+    return await get_classroom_activity(classroom_uid, current_user.uid)
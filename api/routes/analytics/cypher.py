@@ -0,0 +1,43 @@
+# Analytics Cypher statements
+#   Registered by name with `utils.queries` when this module is imported (the router's
+#   services import it), and run with `queries.run(name, **params)` like every other statement.
+from ...utils.queries import register
+
+######################################################################
+
+QUERIES = {
+    # teachers/admins (or developers) of the classroom, who may see its learners' activity
+    "classroom_teacher": """
+        MATCH (c:Classroom {uid: $classroom})
+        RETURN EXISTS {
+            MATCH (:User {uid: $uid})-[r]->(c)
+            WHERE (type(r) = 'IS_IN' AND r.role IN ['teacher', 'admin'])
+               OR type(r) IN ['IS_TEACHING_IN', 'IS_DEVELOPING_IN']
+        } AS allowed
+        """,
+    # what a statement batch may name: the classrooms among $classrooms the user belongs to
+    # (as a member, teacher or developer) and the modules among $modules that exist
+    "statement_targets": """
+        RETURN [classroom IN $classrooms WHERE EXISTS {
+                MATCH (:User {uid: $uid})-[r]->(:Classroom {uid: classroom})
+                WHERE type(r) IN ['IS_IN', 'IS_TEACHING_IN', 'IS_DEVELOPING_IN']
+            }] AS classrooms,
+            [module IN $modules WHERE EXISTS { MATCH (:LearningModule {uid: module}) }] AS modules
+        """,
+    # activity rollups (see routes/analytics/store.py); visit times only ever widen, so folding twice is harmless
+    "fold_visits": """
+        UNWIND $rows AS row
+        MATCH (u:User {uid: row.user}), (m:LearningModule {uid: row.module})
+        MERGE (u)-[v:VISITED]->(m)
+        // neomodel stores epoch floats, the seed scripts datetime(): compare (and store) epochs
+        WITH row, v,
+            CASE WHEN v.firstVisit IS NULL OR toFloatOrNull(v.firstVisit) IS NOT NULL THEN v.firstVisit
+                ELSE v.firstVisit.epochMillis / 1000.0 END AS first,
+            CASE WHEN v.lastVisit IS NULL OR toFloatOrNull(v.lastVisit) IS NOT NULL THEN v.lastVisit
+                ELSE v.lastVisit.epochMillis / 1000.0 END AS last
+        SET v.firstVisit = CASE WHEN first IS NULL OR row.first < first THEN row.first ELSE first END,
+            v.lastVisit = CASE WHEN last IS NULL OR row.last > last THEN row.last ELSE last END
+        """,
+}
+
+register(QUERIES)
@@ -0,0 +1,67 @@
+# Analytics-related schemas for data validation
+from pydantic import BaseModel, Field
+
+class Statement(BaseModel):
+    """xAPI-like statement, the actor is always the authenticated user"""
+    id: str | None = Field(None, max_length=64, description="Client-chosen statement id, resending it (as the same user) is a no-op")
+    verb: str = Field(
+        ...,
+        max_length=256,
+        description="Verb name or xAPI verb IRI (only the last path segment is kept)",
+        example="http://adlnet.gov/expapi/verbs/experienced"
+        )
+    object: str = Field(..., max_length=64, description="uid of the learning module")
+    classroom: str | None = Field(None, max_length=64, description="uid of the classroom it happened in (context), the user must belong to it")
+    timestamp: float | None = Field(None, description="Unix timestamp, defaults to when it was received")
+    duration: float | None = Field(None, ge=0, description="Seconds spent")
+    score: float | None = Field(None, ge=0, le=1, description="Scaled score, 0-1")
+    completion: bool | None = Field(None, description="Whether the module was completed (implied by completed/passed)")
+
+class StatementReceipt(BaseModel):
+    received: int
+    stored: int = Field(..., description="New statements, the others had an id that was already stored")
+
+class ActivityTotals(BaseModel):
+    events: int = 0
+    modules: int = 0
+    completions: int = 0
+    duration: float = Field(0.0, description="Seconds spent")
+    first: float | None = None
+    last: float | None = None
+
+class ModuleActivity(BaseModel):
+    uid: str
+    events: int
+    duration: float
+    first: float
+    last: float
+    best_score: float | None
+    completed: bool
+
+class UserActivity(BaseModel):
+    totals: ActivityTotals
+    modules: list[ModuleActivity] = Field(..., description="Most recently studied first")
+
+class ModuleStats(BaseModel):
+    uid: str
+    events: int = 0
+    learners: int = 0
+    completions: int = 0
+    duration: float = Field(0.0, description="Seconds spent, all learners")
+    last: float | None = None
+
+class LearnerActivity(BaseModel):
+    uid: str
+    events: int
+    modules: int
+    completions: int
+    duration: float
+    last: float
+
+class ClassroomActivity(BaseModel):
+    uid: str
+    learners: int
+    events: int
+    completions: int
+    duration: float
+    members: list[LearnerActivity] = Field(..., description="Most recently active first")
@@ -0,0 +1,93 @@
+# Analytics-related helper functions
+import time
+from fastapi import HTTPException
+
+from ...utils import queries
+from .schemas import (
+    Statement,
+    StatementReceipt,
+    ActivityTotals,
+    ModuleActivity,
+    UserActivity,
+    ModuleStats,
+    LearnerActivity,
+    ClassroomActivity
+)
+from .store import activity_store
+from ..learning import cypher as learning_cypher  # registers "module_editable", reused for module stats
+
+######################################################################
+
+COMPLETION_VERBS = {"completed", "passed", "mastered"}
+
+def verb_name(verb: str) -> str:
+    """'http://adlnet.gov/expapi/verbs/completed' -> 'completed'"""
+    return verb.rstrip("/").rsplit("/", 1)[-1].lower()
+
+def event_row(user_uid: str, statement: Statement, now: float) -> dict:
+    verb = verb_name(statement.verb)
+    completed = statement.completion if statement.completion is not None else verb in COMPLETION_VERBS
+    return {
+        "statement_id": statement.id,
+        "user": user_uid,
+        "verb": verb,
+        "module": statement.object,
+        "classroom": statement.classroom,
+        "timestamp": statement.timestamp if statement.timestamp is not None else now,
+        "duration": statement.duration,
+        "score": statement.score,
+        "completed": int(completed),
+    }
+
+async def check_targets(user_uid: str, statements: list[Statement]):
+    """
+    Raise 404 unless every module the statements name exists, and 403 unless the user belongs
+    to every classroom they name (they feed module & classroom dashboards)
+    """
+    modules = {statement.object for statement in statements}
+    classrooms = {statement.classroom for statement in statements if statement.classroom is not None}
+    member, existing = (await queries.run("statement_targets", uid=user_uid, classrooms=list(classrooms), modules=list(modules)))[0]
+    if modules - set(existing):
+        raise HTTPException(status_code=404, detail=f"Module {sorted(modules - set(existing))[0]} not found")
+    if classrooms - set(member):
+        raise HTTPException(status_code=403, detail=f"Not a member of classroom {sorted(classrooms - set(member))[0]}")
+
+async def record_statements(user_uid: str, statements: list[Statement]) -> StatementReceipt:
+    await check_targets(user_uid, statements)
+    now = time.time()
+    stored = await activity_store.append([event_row(user_uid, statement, now) for statement in statements])
+    return StatementReceipt(received=len(statements), stored=stored)
+
+######################################################################
+# DASHBOARDS (rollups only)
+
+async def get_user_activity(user_uid: str, limit: int) -> UserActivity:
+    totals, modules = await activity_store.user_activity(user_uid, limit)
+    return UserActivity(
+        totals=ActivityTotals(**totals) if totals else ActivityTotals(),
+        modules=[ModuleActivity(**module) for module in modules]
+    )
+
+async def get_module_stats(module_uid: str, user_uid: str) -> ModuleStats:
+    results = await queries.run("module_editable", module=module_uid, uid=user_uid)
+    if not results:
+        raise HTTPException(status_code=404, detail="Module not found")
+    if not results[0][0]:
+        raise HTTPException(status_code=403, detail="Only teachers of this module's classrooms can see its activity")
+    return ModuleStats(**(await activity_store.module_stats(module_uid) or {"uid": module_uid}))
+
+async def get_classroom_activity(classroom_uid: str, user_uid: str) -> ClassroomActivity:
+    results = await queries.run("classroom_teacher", classroom=classroom_uid, uid=user_uid)
+    if not results:
+        raise HTTPException(status_code=404, detail="Classroom not found")
+    if not results[0][0]:
+        raise HTTPException(status_code=403, detail="Only teachers of this classroom can see its activity")
+    members = [LearnerActivity(**row) for row in await activity_store.classroom_learners(classroom_uid)]
+    return ClassroomActivity(
+        uid=classroom_uid,
+        learners=len(members),
+        events=sum(member.events for member in members),
+        completions=sum(member.completions for member in members),
+        duration=sum(member.duration for member in members),
+        members=members
+    )
@@ -0,0 +1,283 @@
+# Learning activity store
+#   xAPI-style statements ("user <verb> module [in classroom]") are appended to a local SQLite
+#   log (ANALYTICS_DB) instead of becoming graph writes. The same transaction that appends a
+#   batch updates the rollups, so dashboards read a handful of rows, never the raw events:
+#     user_module    : per user & module (events, time spent, first/last, best score, completed)
+#     module_stats   : per module (events, learners, completions, time spent)
+#     classroom_user : per classroom & learner
+#     user_stats     : per user
+#   `user_module` rows changed since the last fold are flagged `dirty`; `fold` writes them into
+#   the VISITED edges in chunked UNWIND statements (periodically, see `run`). Folding is
+#   idempotent (MERGE, min/max of the visit times), so workers sharing the file may overlap.
+#   All SQLite work happens on one dedicated thread, off the event loop.
+import time
+import asyncio
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from ...utils import queries
+from ...utils.httpcache import http_cache
+from ...utils.metrics import span
+from ...utils.settings import settings
+from . import cypher  # registers this router's statements with `utils.queries`
+
+######################################################################
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS events (
+        id INTEGER PRIMARY KEY,
+        statement_id TEXT,
+        stored REAL NOT NULL,
+        user TEXT NOT NULL,
+        verb TEXT NOT NULL,
+        module TEXT NOT NULL,
+        classroom TEXT,
+        timestamp REAL NOT NULL,
+        duration REAL,
+        score REAL,
+        completed INTEGER NOT NULL,
+        UNIQUE (user, statement_id) -- ids are client-chosen (per user), make retried batches idempotent
+    );
+    CREATE TABLE IF NOT EXISTS user_module (
+        user TEXT NOT NULL,
+        module TEXT NOT NULL,
+        events INTEGER NOT NULL,
+        duration REAL NOT NULL,
+        first REAL NOT NULL,
+        last REAL NOT NULL,
+        best_score REAL,
+        completed INTEGER NOT NULL,
+        dirty INTEGER NOT NULL, -- changed since the last fold into VISITED
+        PRIMARY KEY (user, module)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS user_module_module ON user_module (module);
+    CREATE INDEX IF NOT EXISTS user_module_dirty ON user_module (dirty) WHERE dirty = 1;
+    CREATE TABLE IF NOT EXISTS module_stats (
+        module TEXT PRIMARY KEY,
+        events INTEGER NOT NULL,
+        learners INTEGER NOT NULL,
+        completions INTEGER NOT NULL,
+        duration REAL NOT NULL,
+        last REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS classroom_user (
+        classroom TEXT NOT NULL,
+        user TEXT NOT NULL,
+        events INTEGER NOT NULL,
+        modules INTEGER NOT NULL,
+        completions INTEGER NOT NULL,
+        duration REAL NOT NULL,
+        last REAL NOT NULL,
+        PRIMARY KEY (classroom, user)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS user_stats (
+        user TEXT PRIMARY KEY,
+        events INTEGER NOT NULL,
+        modules INTEGER NOT NULL,
+        completions INTEGER NOT NULL,
+        duration REAL NOT NULL,
+        first REAL NOT NULL,
+        last REAL NOT NULL
+    ) WITHOUT ROWID;
+"""
+
+INSERT_EVENT = """
+    INSERT OR IGNORE INTO events (statement_id, stored, user, verb, module, classroom, timestamp, duration, score, completed)
+    VALUES (:statement_id, :stored, :user, :verb, :module, :classroom, :timestamp, :duration, :score, :completed)
+"""
+UPSERT_USER_MODULE = """
+    INSERT INTO user_module VALUES (:user, :module, 1, :duration, :timestamp, :timestamp, :score, :completed, 1)
+    ON CONFLICT DO UPDATE SET
+        events = events + 1,
+        duration = duration + excluded.duration,
+        first = min(first, excluded.first),
+        last = max(last, excluded.last),
+        best_score = max(coalesce(best_score, excluded.best_score), coalesce(excluded.best_score, best_score)),
+        completed = max(completed, excluded.completed),
+        dirty = 1
+"""
+UPSERT_MODULE = """
+    INSERT INTO module_stats VALUES (:module, 1, :new_learner, :new_completion, :duration, :timestamp)
+    ON CONFLICT DO UPDATE SET
+        events = events + 1,
+        learners = learners + excluded.learners,
+        completions = completions + excluded.completions,
+        duration = duration + excluded.duration,
+        last = max(last, excluded.last)
+"""
+UPSERT_CLASSROOM_USER = """
+    INSERT INTO classroom_user VALUES (:classroom, :user, 1, :new_learner, :new_completion, :duration, :timestamp)
+    ON CONFLICT DO UPDATE SET
+        events = events + 1,
+        modules = modules + excluded.modules,
+        completions = completions + excluded.completions,
+        duration = duration + excluded.duration,
+        last = max(last, excluded.last)
+"""
+UPSERT_USER = """
+    INSERT INTO user_stats VALUES (:user, 1, :new_learner, :new_completion, :duration, :timestamp, :timestamp)
+    ON CONFLICT DO UPDATE SET
+        events = events + 1,
+        modules = modules + excluded.modules,
+        completions = completions + excluded.completions,
+        duration = duration + excluded.duration,
+        first = min(first, excluded.first),
+        last = max(last, excluded.last)
+"""
+
+
+class ActivityStore:
+    def __init__(self, path: str = settings.analytics_db, fold_interval: float = settings.analytics_fold_interval,
+                 fold_size: int = settings.analytics_fold_size):
+        self.path = path
+        self.fold_interval = fold_interval
+        self.fold_size = fold_size
+        self._db: sqlite3.Connection | None = None
+        self._executor: ThreadPoolExecutor | None = None
+        self.appended = 0
+        self.duplicates = 0
+        self.folded = 0
+
+    async def _call(self, fn, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="analytics")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL") # readers don't block the appender, several workers may share the file
+            db.execute("PRAGMA synchronous=NORMAL")
+            db.execute("PRAGMA busy_timeout=5000")
+            db.executescript(SCHEMA)
+            self._db = db
+        return self._db
+
+    async def open(self):
+        await self._call(self._connect)
+
+    async def close(self):
+        if self._executor is not None:
+            await self._call(lambda: self._db.close() if self._db is not None else None)
+            self._executor.shutdown(wait=True)
+            self._executor, self._db = None, None
+
+    ######################################################################
+    # INGESTION
+
+    def _append(self, rows: list[dict]) -> int:
+        db = self._connect()
+        stored = 0
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            for row in rows:
+                if not db.execute(INSERT_EVENT, row).rowcount: # statement id seen before (from this user)
+                    continue
+                stored += 1
+                previous = db.execute("SELECT completed FROM user_module WHERE user = ? AND module = ?", (row["user"], row["module"])).fetchone()
+                params = {
+                    **row,
+                    "duration": row["duration"] or 0.0,
+                    "new_learner": int(previous is None),
+                    "new_completion": int(bool(row["completed"]) and not (previous and previous[0])),
+                }
+                db.execute(UPSERT_USER_MODULE, params)
+                db.execute(UPSERT_MODULE, params)
+                db.execute(UPSERT_USER, params)
+                if row["classroom"] is not None: # new modules/completions count for the classroom they happened in
+                    db.execute(UPSERT_CLASSROOM_USER, params)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+        return stored
+
+    async def append(self, rows: list[dict]) -> int:
+        """Append event rows & update the rollups in one transaction, returns how many were new"""
+        stored = time.time()
+        with span("analytics_append"):
+            count = await self._call(self._append, [{**row, "stored": stored} for row in rows])
+        self.appended += count
+        self.duplicates += len(rows) - count
+        return count
+
+    ######################################################################
+    # DASHBOARDS
+
+    def _select(self, sql: str, params: tuple) -> list[dict]:
+        db = self._connect()
+        cursor = db.execute(sql, params)
+        columns = [column[0] for column in cursor.description]
+        return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    async def select(self, sql: str, *params) -> list[dict]:
+        return await self._call(self._select, sql, params)
+
+    async def user_activity(self, user: str, limit: int) -> tuple[dict | None, list[dict]]:
+        totals = await self.select("SELECT events, modules, completions, duration, first, last FROM user_stats WHERE user = ?", user)
+        modules = await self.select(
+            "SELECT module AS uid, events, duration, first, last, best_score, completed FROM user_module "
+            "WHERE user = ? ORDER BY last DESC LIMIT ?", user, limit)
+        return (totals[0] if totals else None), modules
+
+    async def module_stats(self, module: str) -> dict | None:
+        rows = await self.select("SELECT module AS uid, events, learners, completions, duration, last FROM module_stats WHERE module = ?", module)
+        return rows[0] if rows else None
+
+    async def classroom_learners(self, classroom: str) -> list[dict]:
+        return await self.select(
+            "SELECT user AS uid, events, modules, completions, duration, last FROM classroom_user "
+            "WHERE classroom = ? ORDER BY last DESC", classroom)
+
+    ######################################################################
+    # FOLDING INTO THE GRAPH
+
+    def _dirty(self, limit: int) -> list[dict]:
+        return self._select("SELECT user, module, first, last, events FROM user_module WHERE dirty = 1 LIMIT ?", (limit,))
+
+    def _clean(self, rows: list[dict]):
+        # rows that received events while being folded keep their flag for the next fold
+        db = self._connect()
+        db.execute("BEGIN IMMEDIATE")
+        db.executemany("UPDATE user_module SET dirty = 0 WHERE user = :user AND module = :module AND events = :events", rows)
+        db.execute("COMMIT")
+
+    async def pending(self) -> int:
+        return (await self.select("SELECT count(*) AS pending FROM user_module WHERE dirty = 1"))[0]["pending"]
+
+    async def fold(self) -> int:
+        """Write every changed user/module rollup into its VISITED edge, `fold_size` per transaction"""
+        folded = 0
+        while rows := await self._call(self._dirty, self.fold_size):
+            with span("analytics_fold"):
+                await queries.run("fold_visits", rows=rows)
+            await http_cache.invalidate(*(f"progress:{row['user']}" for row in rows))
+            await self._call(self._clean, rows)
+            folded += len(rows)
+            if len(rows) < self.fold_size:
+                break
+        self.folded += folded
+        if folded:
+            logger.info("Folded %d user/module rollups into VISITED", folded)
+        return folded
+
+    async def run(self):
+        """Fold every `fold_interval` seconds, until cancelled (then once more)"""
+        try:
+            while True:
+                await asyncio.sleep(self.fold_interval)
+                try:
+                    await self.fold()
+                except Exception:
+                    logger.exception("Folding activity rollups into the graph failed")
+        except asyncio.CancelledError:
+            try:
+                await self.fold()
+            except Exception:
+                logger.exception("Final fold of activity rollups failed, they stay pending in %s", self.path)
+            raise
+
+
+activity_store = ActivityStore()
@@ -1,14 +1,28 @@
-import os
-from dotenv import load_dotenv
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
-from neomodel import Q
+from .cache import invalidate_user
 from .schemas import (
     RegistrationForm, 
     Token, 
-    PasswordResetForm
+    PasswordResetForm,
+    StatusMessage,
+    AccountMessage,
+    ResetRequestMessage,
+    UserProfile
 )
 from ...models.social import User
+from ...utils import queries
+from ...utils.httpcache import http_cache
+from ..social.services import forget_users
+from ...utils.queries import (
+    get_user_by_username,
+    get_user_by_email,
+    get_user_by_identifier,
+    get_user_by_uid,
+    username_exists,
+    create_user_if_unique,
+    RegistrationStatus
+)
 from .services import (
     get_password_hash, 
     verify_password, 
@@ -19,21 +33,27 @@ from .services import (
     send_verification_email,
     send_warning_email,
     verify_token,
+    revoke_token,
     create_password_reset_token,
     mask_email,
-    send_password_reset_email
+    send_password_reset_email,
+    record_login,
+    token_engine
+)
+from .tokens import TokenError
+from .limits import (
+    register_identifier_limiter,
+    reset_identifier_limiter,
+    normalize_identifier,
+    check_login_lockout,
+    record_login_failure,
+    clear_login_failures
 )
-from jose import JWTError, jwt
-from datetime import datetime
 
 
 # TODO:
-# - switch to using pyJWT instead of jose
 # - hash email addresses in db  (for GDPR purposes?)
 # - rotate JWT secret key
-# - introduce rate limiting login/registration/password reset
-# - lockout for too many failed login attempts
-# - blacklist (password reset) tokens
 # - introduce OAuth with Google/Facebook/LinkedIn/Microsoft/Apple/GitHub
 # - add extra registration fields (e.g. first/last name, birthdate, languages, etc.)
 
@@ -41,38 +61,39 @@ from datetime import datetime
 ######################################################################
 # SET VARIABLES
 
-load_dotenv()
 router = APIRouter(tags=["auth"])
-SECRET_KEY = os.getenv("SECRET_KEY")
-ALGORITHM = os.getenv("ALGORITHM")
 
 
 ######################################################################
 # REGISTRATION
 
-@router.post("/register", status_code=status.HTTP_201_CREATED)
+@router.post("/register", response_model=AccountMessage, status_code=status.HTTP_201_CREATED)
 async def register_user(form: RegistrationForm):
     """
     User registration endpoint. Checks if username/email is already taken and creates a new user.
     Args:
         form (RegistrationForm): User registration form.
     Returns:
-        dict: A success message and email address.
+        AccountMessage: A success message and email address.
     """
-    # Check if username/email is already in use
-    if await User.nodes.get_or_none(username=form.username):
+    await register_identifier_limiter.check(normalize_identifier(form.email))
+    # Taken usernames are public (profiles, search), so reject them before paying for a hash
+    if await username_exists(form.username):
+        raise HTTPException(status_code=400, detail="Username already taken, please choose a different one.")
+    # Check the email & create the user in one round-trip; the hash runs either way so
+    # "email taken" stays indistinguishable by response time
+    hashed_password = await get_password_hash(form.password)
+    user = User(
+        username=form.username, 
+        email=form.email, 
+        hashed_password=hashed_password
+    )
+    result = await create_user_if_unique(user)
+    if result.status == RegistrationStatus.USERNAME_TAKEN: # registered in between
         raise HTTPException(status_code=400, detail="Username already taken, please choose a different one.")
-    user = await User.nodes.get_or_none(email=form.email)
-    if user:
-        await send_warning_email(form.email, user.username) # cannot let client know!
+    if result.status == RegistrationStatus.EMAIL_TAKEN:
+        await send_warning_email(form.email, result.existing_username) # cannot let client know!
     else:
-        # Create user
-        hashed_password = get_password_hash(form.password)
-        user = await User(
-            username=form.username, 
-            email=form.email, 
-            hashed_password=hashed_password
-        ).save()
         token = create_verification_token(user.email)
         await send_verification_email(
             user.email, 
@@ -86,21 +107,22 @@ async def register_user(form: RegistrationForm):
         }
 
 
-@router.get("/verify/{token}")
+@router.get("/verify/{token}", response_model=AccountMessage)
 async def verify_email(token: str):
     """
     Email verification endpoint. Checks if the token is valid and marks the user as verified.
     Args:
         token (str): Verification token send to user's email upon registration.
     Returns:
-        dict: A success message and email address.
+        AccountMessage: A success message and email address.
     """
     email = await verify_token(token, "email_verification")
-    user = await User.nodes.get_or_none(email=email)
+    user = await get_user_by_email(email)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found.")
     user.is_verified = True
     await user.save()
+    await invalidate_user(user.uid)
     username = user.username
     return {
         "message": "Email verified, you can now login.",
@@ -119,15 +141,12 @@ async def login_for_access_token(form: OAuth2PasswordRequestForm = Depends()):
     Args:
         form (OAuth2PasswordRequestForm): User login form.
     Returns:
-        dict: An access token and refresh token.
+        Token: An access token and refresh token.
     """
-    is_email = "@" in form.username
-    if is_email:
-        user = await User.nodes.get_or_none(email=form.username)
-    else:
-        user = await User.nodes.get_or_none(username=form.username)
-
-    if user is None or not verify_password(form.password, user.hashed_password):
+    await check_login_lockout(form.username) # before any bcrypt work
+    user = await get_user_by_identifier(form.username)
+    if user is None or not await verify_password(form.password, user.hashed_password):
+        await record_login_failure(form.username)
         raise HTTPException(
             status_code=401, 
             detail="Incorrect identifier or password.",
@@ -139,8 +158,8 @@ async def login_for_access_token(form: OAuth2PasswordRequestForm = Depends()):
             detail="Email has not yet been verified.",
             headers={"WWW-Authenticate": "Bearer"}
         )
-    user.last_login = datetime.now()
-    await user.save()
+    await clear_login_failures(form.username)
+    record_login(user)
     data = {
         "sub": user.uid,
         "username": user.username
@@ -158,16 +177,15 @@ async def refresh_access_token(refresh_token: str):
     Args:
         refresh_token (str): Refresh token.
     Returns:
-        dict: An access token and refresh token.
+        Token: An access token and refresh token.
     """
     try:
-        payload = jwt.decode(refresh_token, SECRET_KEY, algorithms=[ALGORITHM])
-        sub: str = payload.get("sub")
-        username: str = payload.get("username")
-        token_type: str = payload.get("type")
-        if username is None or token_type != "refresh":
-            raise HTTPException(status_code=401, detail="Invalid refresh token")
-    except JWTError:
+        payload = token_engine.decode(refresh_token, "refresh")
+    except TokenError:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    sub: str = payload.get("sub")
+    username: str = payload.get("username")
+    if username is None:
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
     data = {
@@ -184,19 +202,20 @@ async def refresh_access_token(refresh_token: str):
 ######################################################################
 # PASSWORD RESET
 
-@router.get("/reset/request/{identifier}")
+@router.get("/reset/request/{identifier}", response_model=ResetRequestMessage)
 async def reset_password_request(identifier: str):
     """
     Reset password endpoint. Checks if the user exists and sends a password reset email.
     Args:
         identifier (str): The username or email of the user.
     Returns:
-        dict: A success message and email address.
+        ResetRequestMessage: A success message and the masked email address.
     """
+    await reset_identifier_limiter.check(normalize_identifier(identifier))
     is_email = "@" in identifier
     if is_email:
         email = identifier
-        user = await User.nodes.get_or_none(email=identifier)
+        user = await get_user_by_email(identifier)
         if user:
             token = create_password_reset_token(email)
             await send_password_reset_email(
@@ -206,7 +225,7 @@ async def reset_password_request(identifier: str):
             )
         # TODO: add something here to handle if the user doesn't exist
     else:
-        user = await User.nodes.get_or_none(username=identifier)
+        user = await get_user_by_username(identifier)
         if user:
             email = user.email
             token = create_password_reset_token(email)
@@ -223,52 +242,64 @@ async def reset_password_request(identifier: str):
     }
 
 
-@router.post("/reset/password")
+@router.post("/reset/password", response_model=StatusMessage)
 async def reset_password(form: PasswordResetForm):
     """
     Reset password endpoint. Checks if the token is valid and resets the user's password.
     Args:
         form (PasswordResetForm): The password reset form.
     Returns:
-        dict: A success message and email address.
+        StatusMessage: A success message.
     """
     email = await verify_token(form.token, "password_reset")
-    user = await User.nodes.get_or_none(email=email)
+    user = await get_user_by_email(email)
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    hashed_password = get_password_hash(form.password)
-    if hashed_password == user.hashed_password:
-        raise HTTPException(status_code=400, detail="New password cannot be the same as old password")
-    user.hashed_password = hashed_password
+    # no "same as the old password" check: it would cost a second bcrypt job per reset
+    user.hashed_password = await get_password_hash(form.password)
+    await revoke_token(form.token, "password_reset") # reset links are single-use
     await user.save()
+    await invalidate_user(user.uid)
     return {"message": "Password reset successful"}
 
 
 ######################################################################
 # ME
 
-@router.get("/me")
-async def read_users_me(current_user: dict = Depends(get_current_user)):
+@router.get("/me", response_model=UserProfile)
+async def read_users_me(request: Request, current_user: dict = Depends(get_current_user)):
     """
     Get current user endpoint. Returns the current user's username and email.
+    The ETag changes whenever the user is modified (`invalidate_user`), so an unchanged
+    profile is answered with 304; otherwise it is read from the database, not from the
+    (possibly not yet invalidated) cached user.
     Args:
         current_user (dict): Current user.
     Returns:
-        dict: Current user's username and email.
+        UserProfile: Current user's username and email.
     """
-    return {
-        "username": current_user.username,
-        "email": current_user.email
-    }
+    async def profile():
+        user = await get_user_by_uid(current_user.uid)
+        if user is None:
+            raise HTTPException(status_code=404, detail="User not found")
+        return {
+            "username": user.username,
+            "email": user.email
+            }
+    return await http_cache.respond(request, f"me:{current_user.uid}", UserProfile, profile, tags=[f"user:{current_user.uid}"], shared=False)
 
-@router.get("/delete")
+@router.get("/delete", response_model=StatusMessage)
 async def delete_user(current_user: dict = Depends(get_current_user)):
     """
     Delete user endpoint. Deletes the current logged in user.
     Args:
         current_user (dict): Current user.
     Returns:
-        dict: A success message.
+        StatusMessage: A success message.
     """
+    uid = current_user.uid
+    friends = await queries.run("friends_of_user", uid=uid)
     await current_user.delete()
+    await invalidate_user(uid)
+    await forget_users([uid], [friend_uid for friend_uid, *_ in friends])
     return {"message": "User deleted"}
\ No newline at end of file
@@ -0,0 +1,58 @@
+# In-process cache of verified access tokens -> User nodes
+#   `get_current_user` would otherwise decode the JWT and hit Neo4j on every
+#   protected request. Entries live until the token expires (or USER_CACHE_TTL,
+#   whichever comes first) and are evicted LRU-first once USER_CACHE_SIZE is reached.
+#   Routes that modify a user must call `invalidate_user(uid)`, which also drops the
+#   user's entries in the caches of the other workers and changes the ETag of /auth/me.
+from ...utils.lru import LRUCache
+from ...utils.settings import settings
+from ...utils.shared import invalidations
+from ...utils.httpcache import http_cache
+
+######################################################################
+
+class TokenUserCache(LRUCache):
+    """LRU cache keyed by access token with a secondary index on user uid"""
+    def __init__(self, maxsize: int = settings.user_cache_size, ttl: int = settings.user_cache_ttl):
+        super().__init__(maxsize, ttl)
+        self._tokens_by_uid: dict[str, set[str]] = {}
+
+    def set(self, token: str, user, exp: float):
+        """Cache `user` for `token`, never beyond the token's own `exp` (unix timestamp)"""
+        super().set(token, user, expires_at=exp)
+        if token in self._entries:
+            self._tokens_by_uid.setdefault(user.uid, set()).add(token)
+
+    def invalidate_user(self, uid: str):
+        """Drop every cached token belonging to `uid`"""
+        self.invalidate(list(self._tokens_by_uid.get(uid, ())))
+
+    def invalidate_users(self, uids: list[str]):
+        for uid in uids:
+            self.invalidate_user(uid)
+
+    def clear(self):
+        super().clear()
+        self._tokens_by_uid.clear()
+
+    def _removed(self, token: str, user):
+        tokens = self._tokens_by_uid.get(user.uid)
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_uid[user.uid]
+
+
+user_cache = TokenUserCache()
+invalidations.register("user", user_cache.invalidate_user)
+invalidations.register("users", user_cache.invalidate_users)
+
+async def invalidate_user(uid: str):
+    await http_cache.invalidate(f"user:{uid}")
+    await invalidations.publish("user", uid)
+
+async def invalidate_users(uids: list[str]):
+    """One broadcast for a whole batch of modified users (bulk admin jobs)"""
+    if uids:
+        await http_cache.invalidate(*(f"user:{uid}" for uid in uids))
+        await invalidations.publish("users", uids)
@@ -0,0 +1,17 @@
+# Auth Cypher statements
+#   Registered by name with `utils.queries` when this module is imported (the router's
+#   services import it), and run with `queries.run(name, **params)` like every other statement.
+from ...utils.queries import register
+
+######################################################################
+
+QUERIES = {
+    # write-behind batches (see utils/batching.py)
+    "set_last_login": """
+        UNWIND $rows AS row
+        MATCH (u:User {uid: row.uid})
+        SET u.last_login = row.last_login
+        """,
+}
+
+register(QUERIES)
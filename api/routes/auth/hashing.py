@@ -0,0 +1,118 @@
+# Password hashing off the event loop
+#   bcrypt is deliberately slow (tens to hundreds of ms per call), so running it
+#   inline in an `async def` handler stalls every other request on the worker.
+#   Hashing & verification are dispatched to a bounded thread/process pool instead.
+#   passlib is only imported, and the CryptContext only built, on the first hash.
+import time
+import asyncio
+import logging
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor, ProcessPoolExecutor
+from fastapi import HTTPException, status
+from ...utils.metrics import span
+from ...utils.settings import settings
+
+######################################################################
+
+logger = logging.getLogger(__name__)
+HASH_RETRY_AFTER = 1 # seconds, sent back to clients on 503
+
+@functools.cache
+def get_pwd_context():
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+######################################################################
+# Worker functions (module level so they can be pickled for a process pool)
+
+def _hash(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return get_pwd_context().verify(plain_password, hashed_password)
+
+######################################################################
+
+class HashingPool:
+    """
+    Bounded worker pool for bcrypt operations.
+        - at most `max_workers` hashes run concurrently
+        - at most `max_pending` operations are admitted (running + waiting)
+        - anything beyond that is rejected with a 503 (backpressure)
+    """
+    def __init__(self, max_workers: int = settings.hash_workers, max_pending: int = settings.hash_queue_size, kind: str = settings.hash_executor):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown HASH_EXECUTOR '{kind}', expected 'thread' or 'process'")
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.kind = kind
+        self._executor: Executor | None = None
+        # metrics
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.latency_sum = 0.0
+        self.latency_max = 0.0
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+        return self._executor
+
+    async def _submit(self, fn, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            logger.warning("Hashing pool saturated (%d pending), rejecting request", self.pending)
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please try again shortly.",
+                headers={"Retry-After": str(HASH_RETRY_AFTER)}
+            )
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        future = self._get_executor().submit(fn, *args)
+        # the slot is freed when the job itself ends (or is cancelled before starting), not when the
+        # caller stops waiting: a disconnected client's bcrypt job still occupies a worker
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._done, start))
+        return await asyncio.wrap_future(future, loop=loop)
+
+    def _done(self, start: float):
+        elapsed = time.perf_counter() - start
+        self.pending -= 1
+        self.completed += 1
+        self.latency_sum += elapsed
+        self.latency_max = max(self.latency_max, elapsed)
+
+    async def hash(self, password: str) -> str:
+        with span("bcrypt_hash"):
+            return await self._submit(_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        with span("bcrypt_verify"):
+            return await self._submit(_verify, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        """Snapshot of queue depth & latency metrics"""
+        return {
+            "executor": self.kind,
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "queue_depth": max(self.pending - self.max_workers, 0),
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency_avg": self.latency_sum / self.completed if self.completed else 0.0,
+            "latency_max": self.latency_max,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+hashing_pool = HashingPool()
@@ -0,0 +1,44 @@
+# Rate limits & failed-login lockout for the auth routes
+#   Rates are "<hits>/<seconds>" strings, configurable through the environment.
+#     - per IP            : enforced by RateLimitMiddleware (see main.py) before the request is parsed
+#     - per identifier    : username/email, checked in the routes
+#     - login lockout     : LOGIN_MAX_FAILURES failed logins per identifier lock it for the rest of the window,
+#                           checked before any bcrypt work is done
+from ...utils.ratelimit import MemoryStorage, SharedStorage, SlidingWindowLimiter, too_many_requests
+from ...utils.settings import settings
+from ...utils.shared import shared_state
+
+######################################################################
+
+# counters must be shared once several workers serve requests
+storage = SharedStorage(shared_state) if settings.shared_state_url else MemoryStorage(max_keys=settings.rate_limit_max_keys)
+
+login_ip_limiter = SlidingWindowLimiter("login_ip", settings.rate_limit_login, storage)
+register_ip_limiter = SlidingWindowLimiter("register_ip", settings.rate_limit_register, storage)
+reset_ip_limiter = SlidingWindowLimiter("reset_ip", settings.rate_limit_reset, storage)
+register_identifier_limiter = SlidingWindowLimiter("register_id", settings.rate_limit_identifier, storage)
+reset_identifier_limiter = SlidingWindowLimiter("reset_id", settings.rate_limit_identifier, storage)
+login_failures = SlidingWindowLimiter("login_failures", settings.login_lockout, storage)
+
+# (method, path prefix, limiter) for RateLimitMiddleware
+IP_RULES = [
+    ("POST", "/auth/token", login_ip_limiter),
+    ("POST", "/auth/register", register_ip_limiter),
+    ("GET", "/auth/reset/request/", reset_ip_limiter),
+]
+
+######################################################################
+
+def normalize_identifier(identifier: str) -> str:
+    return identifier.strip().lower()
+
+async def check_login_lockout(identifier: str):
+    retry_after = await login_failures.peek(normalize_identifier(identifier))
+    if retry_after:
+        raise too_many_requests(retry_after, "Too many failed login attempts, please try again later.")
+
+async def record_login_failure(identifier: str):
+    await login_failures.hit(normalize_identifier(identifier))
+
+async def clear_login_failures(identifier: str):
+    await login_failures.reset(normalize_identifier(identifier))
@@ -1,17 +1,6 @@
 # Auth-related schemas for data validation
 from pydantic import BaseModel, Field, EmailStr, field_validator
-import re
-
-def validate_password(value):
-    if not re.search(r"[A-Z]", value):
-        raise ValueError("Password must contain at least one uppercase letter")
-    if not re.search(r"[a-z]", value):
-        raise ValueError("Password must contain at least one lowercase letter")
-    if not re.search(r"[0-9]", value):
-        raise ValueError("Password must contain at least one digit")
-    if not re.search(r"[.!?@#$%^&*]", value):
-        raise ValueError("Password must contain at least one special character")
-    return value
+from .validation import validate_username, validate_password
 
 class RegistrationForm(BaseModel):
     username: str = Field(
@@ -35,10 +24,8 @@ class RegistrationForm(BaseModel):
     # validators: return 422 error + msg if validation fails
     @field_validator("username")
     @classmethod
-    def validate_username(cls, value):
-        if not re.match(r"^[a-zA-Z0-9_]*$", value):
-            raise ValueError("Username can only contain letters, numbers and underscores")
-        return value
+    def username_validation(cls, value):
+        return validate_username(value)
     
     @field_validator("password")
     @classmethod
@@ -66,4 +53,18 @@ class PasswordResetForm(BaseModel):
 class Token(BaseModel):
     access_token: str
     refresh_token: str
-    token_type: str
\ No newline at end of file
+    token_type: str
+
+class StatusMessage(BaseModel):
+    message: str
+
+class AccountMessage(StatusMessage):
+    username: str
+    email: str
+
+class ResetRequestMessage(StatusMessage):
+    email: str = Field(..., description="The address the reset mail was sent to, masked")
+
+class UserProfile(BaseModel):
+    username: str
+    email: str
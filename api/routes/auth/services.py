@@ -1,17 +1,24 @@
 # Auth-related helper functions
-import os
-from dotenv import load_dotenv
-from passlib.context import CryptContext
-from datetime import datetime, timedelta
-from jose import JWTError, jwt # may want to switch to pyjwt instead
+import time
+import hashlib
+import secrets
+from datetime import datetime, timedelta, timezone
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import Depends, HTTPException, status
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
 from pydantic import EmailStr
 
-from ...models.social import User
-
+from ...utils.queries import get_user_by_uid
+from ...utils.mail import MailQueue, OutgoingMail
+from ...utils.batching import WriteBehindBuffer
+from ...utils.metrics import span
+from ...utils.settings import settings
+from ...utils.shared import shared_state
+
+from . import cypher  # registers this router's statements with `utils.queries`
+from .hashing import hashing_pool
+from .tokens import TokenEngine, TokenError
+from .cache import user_cache
 from .email_templates import (
     email_confirm,
     email_warning,
@@ -20,53 +27,35 @@ from .email_templates import (
 
 ######################################################################
 
-load_dotenv()
+settings.require("mail_username", "mail_password")
+if not (settings.secret_key or settings.jwt_private_key):
+    raise ValueError("One or more .env variables are not set: SECRET_KEY or JWT_PRIVATE_KEY")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-SECRET_KEY = os.environ.get("SECRET_KEY") or None
-ALGORITHM = os.environ.get("ALGORITHM") or "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES")) or 30
-REFRESH_TOKEN_EXPIRE_DAYS = int(os.environ.get("REFRESH_TOKEN_EXPIRE_DAYS")) or 7
-MAIL_USERNAME = os.environ.get("MAIL_USERNAME") or None
-MAIL_PASSWORD = os.environ.get("MAIL_PASSWORD") or None
-
-if not (SECRET_KEY and ALGORITHM and ACCESS_TOKEN_EXPIRE_MINUTES and REFRESH_TOKEN_EXPIRE_DAYS and MAIL_USERNAME and MAIL_PASSWORD):
-    raise ValueError(
-        "One or more .env variables are not set"
-        )
-
-conf = ConnectionConfig(
-    MAIL_USERNAME = os.environ.get("MAIL_USERNAME"),
-    MAIL_PASSWORD = os.environ.get("MAIL_PASSWORD"),
-    MAIL_FROM = "no-reply@murof.net",
-    MAIL_PORT = 587,
-    MAIL_SERVER = "smtp.gmail.com",
-    MAIL_FROM_NAME = "Murof",
-    MAIL_STARTTLS = True,
-    MAIL_SSL_TLS = False,
-    USE_CREDENTIALS = True,
-    VALIDATE_CERTS = True
-)
+token_engine = TokenEngine(settings.algorithm, settings.secret_key, settings.jwt_private_key, settings.jwt_public_key)
+mail_queue = MailQueue() # SMTP settings are built on the first mail, see `get_mail_config`
+last_login_buffer = WriteBehindBuffer("set_last_login", settings.last_login_flush_interval, settings.last_login_flush_size)
 
 ######################################################################
 
-def verify_password(plain_password, hashed_password):
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password, hashed_password):
+    return await hashing_pool.verify(plain_password, hashed_password)
 
-def get_password_hash(password):
-    return pwd_context.hash(password)
+async def get_password_hash(password):
+    return await hashing_pool.hash(password)
+
+def record_login(user):
+    """Queue a last_login update instead of saving the whole node on the login path"""
+    user.last_login = datetime.now(timezone.utc)
+    last_login_buffer.add(user.uid, {"uid": user.uid, "last_login": user.last_login.timestamp()})
 
 def create_token(data: dict, expires_delta: timedelta, token_type: str):
-    to_encode = data.copy()
-    expire = datetime.now() + expires_delta
-    to_encode.update({"exp": expire, "type": token_type})
-    encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    with span("jwt_encode"):
+        return token_engine.create(data, expires_delta, token_type)
 
-def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)):
+def create_access_token(data: dict, expires_delta: timedelta = timedelta(minutes=settings.access_token_expire_minutes)):
     return create_token(data, expires_delta, "access")
 
-def create_refresh_token(data: dict, expires_delta: timedelta = timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS)):
+def create_refresh_token(data: dict, expires_delta: timedelta = timedelta(days=settings.refresh_token_expire_days)):
     return create_token(data, expires_delta, "refresh")
 
 ######################################################################
@@ -78,37 +67,47 @@ def create_verification_token(email: str):
 async def send_verification_email(email: EmailStr, username: str, verification_token: str):
     # TODO: might want to link to frontend instead
     verification_link = f"https://murof.net/auth/register/activate?token={verification_token}"
-    message = MessageSchema(
-        subject="Activating your Murof account",
+    mail_queue.enqueue(OutgoingMail(
         recipients=[email],
-        body=email_confirm.format(email=email, username=username, verification_link=verification_link),
-        subtype=MessageType.plain
-    )
-    fm = FastMail(conf)
-    await fm.send_message(message)
+        subject="Activating your Murof account",
+        body=email_confirm.format(email=email, username=username, verification_link=verification_link)
+    ))
 
 async def send_warning_email(email: EmailStr, username: str):
-    message = MessageSchema(
-        subject="Murof account warning",
+    mail_queue.enqueue(OutgoingMail(
         recipients=[email],
-        body=email_warning.format(email=email, username=username),
-        subtype=MessageType.plain
-    )
-    fm = FastMail(conf)
-    await fm.send_message(message)
+        subject="Murof account warning",
+        body=email_warning.format(email=email, username=username)
+    ))
 
-async def verify_token(token: str, token_type: str):
+def decode_token(token: str, token_type: str):
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        if payload["type"] != token_type:
-            raise HTTPException(status_code=401, detail="Invalid token")
-        sub = payload["sub"]
-    except JWTError:
+        with span("jwt_decode"):
+            return token_engine.decode(token, token_type)
+    except TokenError:
         raise HTTPException(status_code=401, detail="Invalid token")
-    return sub
+
+def revocation_key(token: str, claims: dict) -> str:
+    # single-use tokens carry a random `jti`, any other token is identified by its hash
+    return "revoked:" + (claims.get("jti") or hashlib.sha256(token.encode()).hexdigest())
+
+async def verify_token(token: str, token_type: str):
+    claims = decode_token(token, token_type)
+    if await shared_state.exists(revocation_key(token, claims)): # one O(1) lookup, shared by all workers
+        raise HTTPException(status_code=401, detail="Token has already been used")
+    return claims["sub"]
+
+async def revoke_token(token: str, token_type: str):
+    """
+    Blacklist `token` until it expires (after which the signature check rejects it anyway),
+    raise 401 if it was already revoked, so concurrent requests can't both use it
+    """
+    claims = decode_token(token, token_type)
+    if not await shared_state.set(revocation_key(token, claims), "1", ttl=max(claims["exp"] - time.time(), 1), only_if_new=True):
+        raise HTTPException(status_code=401, detail="Token has already been used")
 
 def create_password_reset_token(email: EmailStr):
-    data = {"sub": email}
+    data = {"sub": email, "jti": secrets.token_urlsafe(16)}
     return create_token(data, timedelta(minutes=10), "password_reset")
 
 def mask_email(email: EmailStr):
@@ -117,20 +116,26 @@ def mask_email(email: EmailStr):
 
 async def send_password_reset_email(email: EmailStr, username: str, reset_token: str):
     reset_link = f"https://murof.net/auth/reset/password?token={reset_token}"
-    message = MessageSchema(
-        subject="Resetting your Murof password",
+    mail_queue.enqueue(OutgoingMail(
         recipients=[email],
-        body=password_reset.format(email=email, username=username, reset_link=reset_link),
-        subtype=MessageType.plain
-    )
-    fm = FastMail(conf)
-    await fm.send_message(message)
+        subject="Resetting your Murof password",
+        body=password_reset.format(email=email, username=username, reset_link=reset_link)
+    ))
 
 ######################################################################
 
 async def get_current_user(token: str = Depends(oauth2_scheme)):
-    sub = await verify_token(token, "access")
-    user = await User.nodes.get_or_none(uid=sub)
+    user = user_cache.get(token) # skips both signature check & graph lookup
+    if user is not None:
+        return user
+    payload = decode_token(token, "access")
+    user = await get_user_by_uid(payload["sub"])
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
\ No newline at end of file
+    user_cache.set(token, user, payload["exp"])
+    return user
+
+async def get_admin_user(current_user = Depends(get_current_user)):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Admin privileges required")
+    return current_user
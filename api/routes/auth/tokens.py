@@ -0,0 +1,154 @@
+# JWT token engine
+#   Minimal JWS (compact serialization) signer/verifier for the tokens this API issues.
+#   Compared to calling `jose.jwt.encode/decode` per token it
+#     - parses/loads the signing key once (HMAC state is keyed once and copied per token)
+#     - precomputes the base64url header segment
+#     - only accepts its own algorithm (no header-driven algorithm selection)
+#     - uses UTC-aware expiry timestamps
+#   Supported algorithms: HS256 (shared secret), ES256 & EdDSA (Ed25519) (PEM keys, needs `cryptography`)
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+from datetime import datetime, timedelta, timezone
+
+######################################################################
+
+ALGORITHMS = ("HS256", "ES256", "EdDSA")
+
+class TokenError(Exception):
+    """Raised for malformed, tampered, expired or wrong-type tokens"""
+
+
+def b64url_encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+def b64url_decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+def load_pem(value: str) -> bytes:
+    """Accept either PEM text (escaped newlines allowed, as in .env files) or a path to a PEM file"""
+    if value.lstrip().startswith("-----BEGIN"):
+        return value.replace("\\n", "\n").encode()
+    with open(os.path.expanduser(value), "rb") as f:
+        return f.read()
+
+######################################################################
+
+class TokenEngine:
+    def __init__(self, algorithm: str = "HS256", secret_key: str | None = None, private_key: str | None = None, public_key: str | None = None):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unsupported token algorithm '{algorithm}', expected one of {ALGORITHMS}")
+        self.algorithm = algorithm
+        header = json.dumps({"alg": algorithm, "typ": "JWT"}, separators=(",", ":"), sort_keys=True)
+        self._header_segment = b64url_encode(header.encode())
+        if algorithm == "HS256":
+            if not secret_key:
+                raise ValueError("HS256 tokens need a SECRET_KEY")
+            self._mac = hmac.new(secret_key.encode(), digestmod=hashlib.sha256)
+            self._sign, self._verify = self._sign_hs256, self._verify_hs256
+        else:
+            self._load_asymmetric_keys(private_key, public_key)
+
+    def _load_asymmetric_keys(self, private_key: str | None, public_key: str | None):
+        try:
+            from cryptography.hazmat.primitives import hashes, serialization
+            from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+            from cryptography.hazmat.primitives.asymmetric.utils import decode_dss_signature, encode_dss_signature
+            from cryptography.exceptions import InvalidSignature
+        except ImportError as error:
+            raise ImportError(f"{self.algorithm} tokens need the `cryptography` package") from error
+        if not (private_key or public_key):
+            raise ValueError(f"{self.algorithm} tokens need JWT_PRIVATE_KEY and/or JWT_PUBLIC_KEY")
+        self._private_key = serialization.load_pem_private_key(load_pem(private_key), password=None) if private_key else None
+        if public_key:
+            self._public_key = serialization.load_pem_public_key(load_pem(public_key))
+        else:
+            self._public_key = self._private_key.public_key()
+        expected = ec.EllipticCurvePublicKey if self.algorithm == "ES256" else ed25519.Ed25519PublicKey
+        if not isinstance(self._public_key, expected):
+            raise ValueError(f"Key type does not match {self.algorithm}")
+        self._invalid_signature = InvalidSignature
+
+        if self.algorithm == "ES256":
+            ecdsa = ec.ECDSA(hashes.SHA256())
+            def sign(message: bytes) -> bytes: # JWS wants raw r || s, not DER
+                r, s = decode_dss_signature(self._private_key.sign(message, ecdsa))
+                return r.to_bytes(32, "big") + s.to_bytes(32, "big")
+            def verify(message: bytes, signature: bytes) -> bool:
+                if len(signature) != 64:
+                    return False
+                der = encode_dss_signature(int.from_bytes(signature[:32], "big"), int.from_bytes(signature[32:], "big"))
+                return self._verify_asymmetric(message, der, ecdsa)
+        else:
+            def sign(message: bytes) -> bytes:
+                return self._private_key.sign(message)
+            def verify(message: bytes, signature: bytes) -> bool:
+                return self._verify_asymmetric(message, signature)
+        self._sign = sign if self._private_key is not None else None
+        self._verify = verify
+
+    def _verify_asymmetric(self, message: bytes, signature: bytes, *args) -> bool:
+        try:
+            self._public_key.verify(signature, message, *args)
+            return True
+        except self._invalid_signature:
+            return False
+
+    def _sign_hs256(self, message: bytes) -> bytes:
+        mac = self._mac.copy()
+        mac.update(message)
+        return mac.digest()
+
+    def _verify_hs256(self, message: bytes, signature: bytes) -> bool:
+        return hmac.compare_digest(self._sign_hs256(message), signature)
+
+    ##################################################################
+
+    def encode(self, claims: dict) -> str:
+        if self._sign is None:
+            raise TokenError("No private key configured, this engine can only verify tokens")
+        payload = b64url_encode(json.dumps(claims, separators=(",", ":")).encode())
+        signing_input = self._header_segment + b"." + payload
+        return (signing_input + b"." + b64url_encode(self._sign(signing_input))).decode()
+
+    def create(self, data: dict, expires_delta: timedelta, token_type: str) -> str:
+        """Sign `data` plus `exp` (UTC, seconds since epoch) & `type` claims"""
+        expire = datetime.now(timezone.utc) + expires_delta
+        return self.encode({**data, "exp": int(expire.timestamp()), "type": token_type})
+
+    def decode(self, token: str, token_type: str | None = None, now: float | None = None) -> dict:
+        """Verify signature, expiry and (optionally) the `type` claim, returns the claims"""
+        try:
+            signing_input, _, signature = token.encode().rpartition(b".")
+            header, _, payload = signing_input.partition(b".")
+            if header != self._header_segment and json.loads(b64url_decode(header)).get("alg") != self.algorithm:
+                raise TokenError("Unexpected token algorithm")
+            if not self._verify(signing_input, b64url_decode(signature)):
+                raise TokenError("Signature verification failed")
+            claims = json.loads(b64url_decode(payload))
+        except TokenError:
+            raise
+        except (ValueError, TypeError, AttributeError) as error: # bad base64 / json / structure
+            raise TokenError("Malformed token") from error
+        if not isinstance(claims, dict):
+            raise TokenError("Malformed token")
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)) or exp <= (time.time() if now is None else now):
+            raise TokenError("Token expired")
+        if token_type is not None and claims.get("type") != token_type:
+            raise TokenError("Invalid token type")
+        return claims
+
+    def decode_many(self, tokens: list[str], token_type: str | None = None) -> list[dict | None]:
+        """Batch verification: claims for each valid token, None for invalid ones"""
+        now = time.time()
+        results = []
+        for token in tokens:
+            try:
+                results.append(self.decode(token, token_type, now))
+            except TokenError:
+                results.append(None)
+        return results
@@ -0,0 +1,130 @@
+# Cheap credential checks, run by the registration/reset schemas before any bcrypt work
+#   - character classes are frozensets, each rule is one C-level `isdisjoint`/`issuperset`
+#     scan over the value instead of a regex search (compiled on every call through re's cache)
+#   - breached/common passwords are looked up in a blocklist file (PASSWORD_BLOCKLIST) built
+#     with `python -m data.blocklist`: sorted, deduplicated 64-bit SHA-1 prefixes, memory-mapped
+#     once and binary searched, so a multi-million entry list costs microseconds per check and
+#     only the pages actually touched stay resident
+import os
+import mmap
+import string
+import bisect
+import hashlib
+import logging
+from typing import Iterable
+from ...utils.settings import settings
+
+######################################################################
+
+logger = logging.getLogger(__name__)
+
+USERNAME_CHARS = frozenset(string.ascii_letters + string.digits + "_")
+UPPERCASE = frozenset(string.ascii_uppercase)
+LOWERCASE = frozenset(string.ascii_lowercase)
+DIGITS = frozenset(string.digits)
+SPECIAL = frozenset(".!?@#$%^&*")
+
+def validate_username(value: str) -> str:
+    if not USERNAME_CHARS.issuperset(value):
+        raise ValueError("Username can only contain letters, numbers and underscores")
+    return value
+
+def validate_password(value: str) -> str:
+    if UPPERCASE.isdisjoint(value):
+        raise ValueError("Password must contain at least one uppercase letter")
+    if LOWERCASE.isdisjoint(value):
+        raise ValueError("Password must contain at least one lowercase letter")
+    if DIGITS.isdisjoint(value):
+        raise ValueError("Password must contain at least one digit")
+    if SPECIAL.isdisjoint(value):
+        raise ValueError("Password must contain at least one special character")
+    if value in password_blocklist:
+        raise ValueError("This password appears in a list of breached or common passwords, please choose another one")
+    return value
+
+######################################################################
+# BLOCKLIST
+
+MAGIC = b"MUROFBL1" # file header, followed by the sorted 8-byte big-endian keys
+KEY_SIZE = 8
+
+def blocklist_key(sha1: bytes) -> bytes:
+    """Record for a password's SHA-1 digest (the first 64 bits, ~0 false positives at 10^9 entries)"""
+    return sha1[:KEY_SIZE]
+
+def password_key(password: str) -> bytes:
+    return blocklist_key(hashlib.sha1(password.encode("utf-8")).digest())
+
+def write_blocklist(path: str, keys: Iterable[bytes]) -> int:
+    """Write already sorted `keys` (duplicates skipped), atomically, returns the number written"""
+    count, previous = 0, None
+    with open(path + ".tmp", "wb") as f:
+        f.write(MAGIC)
+        for key in keys:
+            if key != previous:
+                f.write(key)
+                count += 1
+                previous = key
+    os.replace(path + ".tmp", path)
+    return count
+
+
+class _Records:
+    """Fixed-size records of a mapped file as a sequence, for `bisect`"""
+    def __init__(self, buffer: mmap.mmap):
+        self.buffer = buffer
+        self.count = (len(buffer) - len(MAGIC)) // KEY_SIZE
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i: int) -> bytes:
+        start = len(MAGIC) + i * KEY_SIZE
+        return self.buffer[start:start + KEY_SIZE]
+
+
+class PasswordBlocklist:
+    def __init__(self, path: str | None = settings.password_blocklist):
+        self.path = path
+        self._file = None
+        self._map: mmap.mmap | None = None
+        self._records: _Records | None = None
+        self.checks = 0
+        self.hits = 0
+
+    def __len__(self):
+        return len(self._records) if self._records is not None else 0
+
+    def open(self):
+        """Map the file (once); without PASSWORD_BLOCKLIST every password passes"""
+        if self._records is not None or not self.path:
+            return
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a password blocklist, build one with `python -m data.blocklist`")
+        self._records = _Records(self._map)
+        logger.info("Loaded password blocklist %s (%d entries)", self.path, len(self._records))
+
+    def __contains__(self, password: str) -> bool:
+        if self._records is None:
+            if not self.path:
+                return False
+            self.open()
+        self.checks += 1
+        key = password_key(password)
+        i = bisect.bisect_left(self._records, key)
+        found = i < len(self._records) and self._records[i] == key
+        self.hits += found
+        return found
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+        if self._file is not None:
+            self._file.close()
+        self._file = self._map = self._records = None
+
+
+password_blocklist = PasswordBlocklist()
@@ -0,0 +1,134 @@
+import uuid
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, WebSocketException, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from ..auth.services import get_current_user
+from .hub import hub, Connection
+from .schemas import IncomingMessage, ChatError, Chatroom, MessagePage
+from .services import (
+    message_limiter,
+    get_websocket_user,
+    check_chatroom_access,
+    get_chatrooms,
+    post_message,
+    get_message_page,
+    export_messages
+)
+
+
+# TODO:
+# - presence (join/leave) & typing events
+# - fan out across workers (the hub only reaches sockets in this process)
+
+
+######################################################################
+# SET VARIABLES
+
+router = APIRouter(tags=["chat"])
+
+
+######################################################################
+# ROOMS
+
+@router.get("/rooms", response_model=list[Chatroom])
+async def list_chatrooms(current_user = Depends(get_current_user)):
+    """
+    Chatrooms the current user can join (directly or through a group/class).
+    Returns:
+        list[Chatroom]: uid & name of every room.
+    """
+    return await get_chatrooms(current_user.uid)
+
+
+######################################################################
+# HISTORY
+
+@router.get("/rooms/{room_uid}/messages", response_model=MessagePage)
+async def get_messages(
+        room_uid: str,
+        limit: int = Query(50, ge=1, le=200),
+        before: str | None = Query(None, description="`next_cursor` of the previous page"),
+        current_user = Depends(get_current_user)
+        ):
+    """
+    A page of the room's message history, newest first (keyset pagination, so every
+    page costs the same no matter how far back it is).
+    Args:
+        room_uid (str): Chatroom uid.
+        limit (int): Page size.
+        before (str): Cursor returned by the previous page.
+    Returns:
+        MessagePage: messages & the cursor for the next page.
+    """
+    await check_chatroom_access(room_uid, current_user.uid)
+    return await get_message_page(room_uid, limit, before)
+
+@router.get("/rooms/{room_uid}/messages/export")
+async def export_room_messages(room_uid: str, current_user = Depends(get_current_user)):
+    """
+    The room's full history as newline-delimited JSON, oldest first, streamed row by row.
+    Args:
+        room_uid (str): Chatroom uid.
+    """
+    await check_chatroom_access(room_uid, current_user.uid)
+    return StreamingResponse(
+        export_messages(room_uid),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="chatroom-{room_uid}.ndjson"'}
+    )
+
+
+######################################################################
+# REAL-TIME MESSAGING
+
+@router.websocket("/ws/{room_uid}")
+async def chatroom_socket(websocket: WebSocket, room_uid: str, current_user = Depends(get_websocket_user)):
+    """
+    Chatroom socket. Authenticate with `?token=<access token>` (or an Authorization header).
+    Clients send `{"text": "..."}` frames and receive every message posted to the room,
+    including their own, as `{"type": "message", ...}` frames. Messages beyond RATE_LIMIT_CHAT
+    per socket are not posted, the sender gets a `{"type": "error", ...}` frame instead.
+    Args:
+        room_uid (str): Chatroom uid.
+    """
+    try:
+        await check_chatroom_access(room_uid, current_user.uid)
+    except HTTPException as error:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=error.detail)
+
+    limit_key = uuid.uuid4().hex # per connection
+
+    async def receive():
+        while True:
+            try:
+                raw = await websocket.receive_text()
+            except WebSocketDisconnect:
+                return
+            try:
+                incoming = IncomingMessage.model_validate_json(raw)
+            except ValidationError as error:
+                connection.send(ChatError(detail=error.errors()[0]["msg"]).model_dump_json())
+                continue
+            retry_after = await message_limiter.hit(limit_key)
+            if retry_after:
+                connection.send(ChatError(detail=f"Too many messages, retry in {int(retry_after) + 1}s").model_dump_json())
+                continue
+            message = post_message(room_uid, current_user, incoming.text)
+            hub.publish(room_uid, message.model_dump_json()) # serialized once for every subscriber
+
+    await websocket.accept()
+    connection = Connection(websocket, current_user.uid)
+    hub.join(room_uid, connection)
+    receiver = asyncio.create_task(receive())
+    try:
+        # ends when the client disconnects (receiver) or is dropped as a slow consumer (sender)
+        await asyncio.wait((receiver, connection.start()), return_when=asyncio.FIRST_COMPLETED)
+        if receiver.done():
+            receiver.result() # surface errors other than a disconnect
+    finally:
+        hub.leave(room_uid, connection)
+        receiver.cancel()
+        await message_limiter.reset(limit_key)
+        await asyncio.gather(receiver, return_exceptions=True)
+        await connection.close()
@@ -0,0 +1,62 @@
+# Chat Cypher statements
+#   Registered by name with `utils.queries` when this module is imported (the router's
+#   services import it), and run with `queries.run(name, **params)` like every other statement.
+from ...utils.queries import register
+
+######################################################################
+
+QUERIES = {
+    # chat: rooms are joined directly (User -[:HAS_CHAT]->) or through a group/class the user is in
+    "chatroom_access": """
+        MATCH (room:Chatroom {uid: $room})
+        RETURN room.name AS name,
+            EXISTS { (:User {uid: $uid})-[:HAS_CHAT]->(room) }
+            OR EXISTS { (:User {uid: $uid})-->(g)-[:HAS_CHAT]->(room) WHERE g:Group OR g:Class } AS allowed
+        """,
+    "chatrooms_for_user": """
+        MATCH (u:User {uid: $uid})
+        CALL {
+            WITH u MATCH (u)-[:HAS_CHAT]->(room:Chatroom) RETURN room
+            UNION
+            WITH u MATCH (u)-->(g)-[:HAS_CHAT]->(room:Chatroom) WHERE g:Group OR g:Class RETURN room
+        }
+        RETURN room.uid AS uid, room.name AS name ORDER BY name
+        """,
+    # keyset pages over the (room, timestamp) index, newest first; `m.timestamp <= $timestamp` is the
+    # index seek, the uid comparison only breaks ties between messages posted in the same instant
+    "chat_history": """
+        MATCH (m:Message)
+        USING INDEX m:Message(room, timestamp)
+        WHERE m.room = $room AND m.timestamp <= $timestamp
+          AND (m.timestamp < $timestamp OR m.uid < $uid)
+        WITH m ORDER BY m.timestamp DESC, m.uid DESC LIMIT $limit
+        OPTIONAL MATCH (author:User)-[:POSTED]->(m)
+        RETURN m.uid AS uid, m.text AS text, m.timestamp AS timestamp, author.uid AS author, author.username AS username
+        """,
+    # oldest first, in index order so rows can be streamed without a sort
+    "chat_export": """
+        MATCH (m:Message)
+        USING INDEX m:Message(room, timestamp)
+        WHERE m.room = $room AND m.timestamp IS NOT NULL
+        WITH m ORDER BY m.timestamp
+        OPTIONAL MATCH (author:User)-[:POSTED]->(m)
+        RETURN m.uid AS uid, m.text AS text, m.timestamp AS timestamp, author.uid AS author, author.username AS username
+        """,
+    # MERGE on the (constrained) uid keeps a retried batch from duplicating messages
+    "create_messages": """
+        UNWIND $rows AS row
+        MATCH (room:Chatroom {uid: row.room})
+        MATCH (author:User {uid: row.author})
+        MERGE (m:Message {uid: row.uid})
+        ON CREATE SET m.room = row.room, m.text = row.text, m.timestamp = row.timestamp
+        MERGE (room)-[:HAS_MESSAGE]->(m)
+        MERGE (author)-[:POSTED]->(m)
+        """,
+}
+
+# Indexes for the statements above, created at startup (see `db.install_schema`)
+SCHEMA = [
+    "CREATE INDEX message_room_timestamp IF NOT EXISTS FOR (m:Message) ON (m.room, m.timestamp)",
+]
+
+register(QUERIES, SCHEMA)
@@ -0,0 +1,106 @@
+# In-process pub/sub hub for chatrooms
+#   Every socket gets a `Connection` with a bounded send queue drained by its own
+#   sender task, so one slow client never blocks the others: `publish` serializes a
+#   message once and only does a non-blocking put per subscriber. A subscriber whose
+#   queue is full is disconnected (slow consumer) instead of buffering without bound.
+import asyncio
+import logging
+from contextlib import suppress
+from fastapi import WebSocket, status
+from ...utils.settings import settings
+
+######################################################################
+
+logger = logging.getLogger(__name__)
+SLOW_CONSUMER_CLOSE_CODE = status.WS_1013_TRY_AGAIN_LATER
+CLOSE_TIMEOUT = 1.0 # seconds, a stuck client may not even accept the close frame
+
+
+class Connection:
+    def __init__(self, websocket: WebSocket, user_uid: str, maxsize: int = settings.chat_send_queue_size):
+        self.websocket = websocket
+        self.user_uid = user_uid
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = False
+        self.sender: asyncio.Task | None = None
+
+    def start(self) -> asyncio.Task:
+        self.sender = asyncio.create_task(self._send_loop())
+        return self.sender
+
+    def send(self, text: str) -> bool:
+        """Queue a frame without waiting, False (and drop the connection) if the client can't keep up"""
+        if self.dropped:
+            return False
+        try:
+            self.queue.put_nowait(text)
+            return True
+        except asyncio.QueueFull:
+            self.drop()
+            return False
+
+    def drop(self):
+        """Stop sending (even mid-frame) and discard whatever is pending"""
+        self.dropped = True
+        if self.sender is not None:
+            self.sender.cancel()
+        while not self.queue.empty():
+            self.queue.get_nowait()
+
+    async def _send_loop(self):
+        # the only task writing to the socket
+        while True:
+            await self.websocket.send_text(await self.queue.get())
+
+    async def close(self):
+        """Stop the sender, telling a dropped client why it was disconnected"""
+        if self.sender is not None:
+            self.sender.cancel()
+            await asyncio.gather(self.sender, return_exceptions=True)
+        if self.dropped:
+            with suppress(Exception):
+                await asyncio.wait_for(self.websocket.close(code=SLOW_CONSUMER_CLOSE_CODE, reason="Client too slow"), CLOSE_TIMEOUT)
+
+
+class ChatHub:
+    def __init__(self):
+        self.rooms: dict[str, set[Connection]] = {}
+        self.published = 0
+        self.dropped = 0
+
+    def join(self, room: str, connection: Connection):
+        self.rooms.setdefault(room, set()).add(connection)
+
+    def leave(self, room: str, connection: Connection):
+        members = self.rooms.get(room)
+        if members is not None:
+            members.discard(connection)
+            if not members:
+                del self.rooms[room]
+
+    def publish(self, room: str, frame: str) -> int:
+        """Fan an already serialized frame out to the room, returns the number of recipients"""
+        delivered = 0
+        for connection in tuple(self.rooms.get(room, ())):
+            if connection.send(frame):
+                delivered += 1
+            elif connection.dropped:
+                self.dropped += 1
+                self.leave(room, connection)
+                logger.info("Dropped slow chat consumer %s in room %s", connection.user_uid, room)
+        self.published += 1
+        return delivered
+
+    def connections(self) -> int:
+        return sum(len(members) for members in self.rooms.values())
+
+    def stats(self) -> dict:
+        return {
+            "rooms": len(self.rooms),
+            "connections": self.connections(),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+hub = ChatHub()
@@ -0,0 +1,35 @@
+# Chat-related schemas for data validation
+from pydantic import BaseModel, Field
+
+MAX_MESSAGE_LENGTH = 2000
+
+class IncomingMessage(BaseModel):
+    """Frame sent by a client over the chat socket"""
+    text: str = Field(
+        ...,
+        min_length=1, max_length=MAX_MESSAGE_LENGTH,
+        description="The message text",
+        example="Hello, how are you?"
+        )
+
+class ChatMessage(BaseModel):
+    """Frame broadcast to every subscriber of a room (also the shape persisted as a Message node)"""
+    type: str = "message"
+    uid: str
+    room: str
+    author: str | None # null once the author's account is deleted
+    username: str | None
+    text: str
+    timestamp: float
+
+class ChatError(BaseModel):
+    type: str = "error"
+    detail: str
+
+class Chatroom(BaseModel):
+    uid: str
+    name: str
+
+class MessagePage(BaseModel):
+    messages: list[ChatMessage] = Field(..., description="Newest first")
+    next_cursor: str | None = Field(None, description="Pass as `before` to get the next (older) page, null on the last page")
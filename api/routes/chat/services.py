@@ -0,0 +1,114 @@
+# Chat-related helper functions
+import json
+import time
+import uuid
+import base64
+import binascii
+from fastapi import HTTPException, WebSocket, WebSocketException, status
+
+from ...utils import queries
+from ...utils.batching import WriteBehindBuffer
+from ...utils.ratelimit import MemoryStorage, SlidingWindowLimiter
+from ...utils.settings import settings
+from ..auth.services import get_current_user
+from . import cypher  # registers this router's statements with `utils.queries`
+from .schemas import ChatMessage, MessagePage
+
+######################################################################
+
+# Message nodes are created in UNWIND batches instead of one transaction per message
+message_buffer = WriteBehindBuffer("create_messages", settings.chat_flush_interval, settings.chat_flush_size)
+
+# per socket, so a flooding client can't saturate the room's fan-out (a socket lives in one worker: local counters)
+message_limiter = SlidingWindowLimiter("chat_messages", settings.rate_limit_chat, MemoryStorage(max_keys=settings.rate_limit_max_keys))
+
+######################################################################
+
+async def get_websocket_user(websocket: WebSocket):
+    """
+    `get_current_user` for sockets: browsers can't set headers on a WebSocket,
+    so the access token may also be passed as `?token=...`
+    """
+    token = websocket.query_params.get("token")
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    if not token:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason="Not authenticated")
+    try:
+        return await get_current_user(token)
+    except HTTPException as error:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=error.detail)
+
+async def check_chatroom_access(room_uid: str, user_uid: str) -> str:
+    """Return the room's name, raise 404/403 if it doesn't exist or the user isn't a member"""
+    results = await queries.run("chatroom_access", room=room_uid, uid=user_uid)
+    if not results:
+        raise HTTPException(status_code=404, detail="Chatroom not found")
+    name, allowed = results[0]
+    if not allowed:
+        raise HTTPException(status_code=403, detail="Not a member of this chatroom")
+    return name
+
+async def get_chatrooms(user_uid: str) -> list[dict]:
+    results = await queries.run("chatrooms_for_user", uid=user_uid)
+    return [{"uid": uid, "name": name} for uid, name in results]
+
+def post_message(room_uid: str, user, text: str) -> ChatMessage:
+    """Stamp a new message and queue it for the next batched write"""
+    message = ChatMessage(
+        uid=uuid.uuid4().hex,
+        room=room_uid,
+        author=user.uid,
+        username=user.username,
+        text=text,
+        timestamp=time.time()
+    )
+    message_buffer.add(message.uid, {
+        "uid": message.uid,
+        "room": room_uid,
+        "author": user.uid,
+        "username": user.username, # not written, kept for history reads before the flush
+        "text": text,
+        "timestamp": message.timestamp
+    })
+    return message
+
+######################################################################
+# HISTORY
+
+def encode_cursor(timestamp: float, uid: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([timestamp, uid]).encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple[float, str]:
+    try:
+        timestamp, uid = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return float(timestamp), str(uid)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def get_message_page(room_uid: str, limit: int, before: str | None = None) -> MessagePage:
+    """
+    One page of a room's history, newest first, strictly older than the `before` cursor.
+    Messages still waiting in the write buffer are merged in so a sender sees its own message.
+    """
+    timestamp, uid = decode_cursor(before) if before else (float("inf"), "")
+    results = await queries.run("chat_history", room=room_uid, timestamp=timestamp, uid=uid, limit=limit + 1)
+    rows = [dict(zip(("uid", "text", "timestamp", "author", "username"), row)) for row in results]
+    persisted = {row["uid"] for row in rows}
+    for row in message_buffer.pending():
+        if row["room"] == room_uid and row["uid"] not in persisted and (row["timestamp"], row["uid"]) < (timestamp, uid):
+            rows.append({key: row[key] for key in ("uid", "text", "timestamp", "author", "username")})
+    rows.sort(key=lambda row: (row["timestamp"], row["uid"]), reverse=True)
+
+    page, more = rows[:limit], len(rows) > limit
+    return MessagePage(
+        messages=[ChatMessage(room=room_uid, **row) for row in page],
+        next_cursor=encode_cursor(page[-1]["timestamp"], page[-1]["uid"]) if more else None
+    )
+
+async def export_messages(room_uid: str):
+    """A room's full history as NDJSON lines, oldest first, streamed straight from the Neo4j result"""
+    async for row in queries.stream("chat_export", room=room_uid):
+        yield ChatMessage(room=room_uid, **row).model_dump_json() + "\n"
+
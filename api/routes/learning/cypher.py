@@ -0,0 +1,84 @@
+# Learning path Cypher statements
+#   Registered by name with `utils.queries` when this module is imported (the router's
+#   services import it), and run with `queries.run(name, **params)` like every other statement.
+from ...utils.queries import register
+
+######################################################################
+
+QUERIES = {
+    # learning paths: a classroom's modules with their NEXT successors inside the classroom, in one
+    # round-trip, ordered in Python and cached (see routes/learning/paths.py)
+    "classroom_path": """
+        MATCH (c:Classroom {uid: $uid})
+        OPTIONAL MATCH (c)-[:HAS_MODULE|HAS_START_MODULE|HAS_GOAL_MODULE]->(m:LearningModule)
+        WITH c, collect(DISTINCT m) AS modules
+        RETURN c.name AS name, [m IN modules | {
+            uid: m.uid, name: m.name, modified: m.modified,
+            next: [(m)-[:NEXT]->(n:LearningModule) WHERE n IN modules | n.uid]
+        }] AS modules
+        """,
+    # a user's VISITED/FLAGGED edges on every module of the classroom, aggregated into one row
+    "classroom_progress": """
+        MATCH (c:Classroom {uid: $classroom})
+        OPTIONAL MATCH (c)-[:HAS_MODULE|HAS_START_MODULE|HAS_GOAL_MODULE]->(m:LearningModule)
+        OPTIONAL MATCH (:User {uid: $uid})-[r:VISITED|FLAGGED]->(m)
+        WITH m, collect(r) AS edges
+        WITH [e IN edges WHERE type(e) = 'VISITED'][0] AS v, m, size([e IN edges WHERE type(e) = 'FLAGGED']) > 0 AS flagged
+        RETURN collect(CASE WHEN v IS NOT NULL OR flagged THEN {
+            uid: m.uid, first_visit: v.firstVisit, last_visit: v.lastVisit, flagged: flagged
+        } END) AS progress
+        """,
+    "module": """
+        MATCH (m:LearningModule {uid: $uid})
+        RETURN m.uid AS uid, m.name AS name, m.content AS content, m.created AS created, m.modified AS modified,
+            [(c:Classroom)-[:HAS_MODULE|HAS_START_MODULE|HAS_GOAL_MODULE]->(m) | c.uid] AS classrooms
+        """,
+    # teachers/admins of a classroom (or its developers) may edit its modules
+    "module_editable": """
+        MATCH (m:LearningModule {uid: $module})
+        RETURN EXISTS {
+            MATCH (:User {uid: $uid})-[r]->(c:Classroom)-[:HAS_MODULE|HAS_START_MODULE|HAS_GOAL_MODULE]->(m)
+            WHERE (type(r) = 'IS_IN' AND r.role IN ['teacher', 'admin'])
+               OR type(r) IN ['IS_TEACHING_IN', 'IS_DEVELOPING_IN']
+        } AS allowed
+        """,
+    "update_module": """
+        MATCH (m:LearningModule {uid: $uid})
+        SET m += $props, m.modified = $modified
+        RETURN [(c:Classroom)-[:HAS_MODULE|HAS_START_MODULE|HAS_GOAL_MODULE]->(m) | c.uid] AS classrooms
+        """,
+    "link_next": """
+        MATCH (m:LearningModule {uid: $uid}), (n:LearningModule {uid: $next})
+        MERGE (m)-[:NEXT]->(n)
+        SET m.modified = $modified
+        RETURN [(c:Classroom)-[:HAS_MODULE|HAS_START_MODULE|HAS_GOAL_MODULE]->(m) | c.uid] AS classrooms
+        """,
+    "unlink_next": """
+        MATCH (m:LearningModule {uid: $uid})-[r:NEXT]->(:LearningModule {uid: $next})
+        DELETE r
+        SET m.modified = $modified
+        RETURN [(c:Classroom)-[:HAS_MODULE|HAS_START_MODULE|HAS_GOAL_MODULE]->(m) | c.uid] AS classrooms
+        """,
+    "visit_module": """
+        MATCH (u:User {uid: $uid}), (m:LearningModule {uid: $module})
+        MERGE (u)-[v:VISITED]->(m)
+        ON CREATE SET v.firstVisit = $now
+        SET v.lastVisit = $now
+        RETURN v.firstVisit AS first_visit, v.lastVisit AS last_visit,
+            EXISTS { (u)-[:FLAGGED]->(m) } AS flagged
+        """,
+    "flag_module": """
+        MATCH (u:User {uid: $uid}), (m:LearningModule {uid: $module})
+        MERGE (u)-[f:FLAGGED]->(m)
+        ON CREATE SET f.created = $now
+        RETURN true AS found
+        """,
+    "unflag_module": """
+        MATCH (u:User {uid: $uid}), (m:LearningModule {uid: $module})
+        OPTIONAL MATCH (u)-[f:FLAGGED]->(m)
+        DELETE f
+        RETURN true AS found
+        """,
+}
+
+register(QUERIES)
@@ -0,0 +1,149 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from ..auth.services import get_current_user
+from ...utils.httpcache import http_cache
+from .schemas import ClassroomPath, ClassroomProgress, ModuleProgress, Module, ModuleUpdate
+from .services import (
+    get_classroom_path,
+    get_progress,
+    visit_module,
+    set_flag,
+    get_module,
+    check_module_editable,
+    update_module,
+    link_next,
+    unlink_next
+)
+
+
+# TODO:
+# - restrict private classrooms to their members
+# - create/delete modules & attach them to classrooms
+# - mark modules as completed (not just visited)
+
+
+######################################################################
+# SET VARIABLES
+
+router = APIRouter(tags=["learning"])
+
+
+######################################################################
+# CLASSROOMS
+
+@router.get("/classrooms/{classroom_uid}/path", response_model=ClassroomPath)
+async def classroom_path(classroom_uid: str, request: Request, current_user = Depends(get_current_user)):
+    """
+    The classroom's learning modules in path order (following NEXT). Sends an ETag, 304 when unchanged.
+    Args:
+        classroom_uid (str): Classroom uid.
+    Returns:
+        ClassroomPath: the ordered modules with their position and successors.
+    """
+    return await http_cache.respond(
+        request, f"path:{classroom_uid}", ClassroomPath,
+        lambda: get_classroom_path(classroom_uid),
+        tags=[f"classroom:{classroom_uid}"]
+        )
+
+@router.get("/classrooms/{classroom_uid}/progress", response_model=ClassroomProgress)
+async def classroom_progress(classroom_uid: str, request: Request, current_user = Depends(get_current_user)):
+    """
+    The current user's progress along the classroom's path. Sends an ETag, 304 when unchanged.
+    Args:
+        classroom_uid (str): Classroom uid.
+    Returns:
+        ClassroomProgress: visited/flagged counts, completion and the next module to study.
+    """
+    return await http_cache.respond(
+        request, f"progress:{classroom_uid}:{current_user.uid}", ClassroomProgress,
+        lambda: get_progress(classroom_uid, current_user.uid),
+        tags=[f"classroom:{classroom_uid}", f"progress:{current_user.uid}"]
+        )
+
+
+######################################################################
+# MODULES
+
+@router.get("/modules/{module_uid}", response_model=Module)
+async def read_module(module_uid: str, request: Request, current_user = Depends(get_current_user)):
+    """
+    A learning module and its content. Sends an ETag, 304 when unchanged.
+    Args:
+        module_uid (str): Module uid.
+    Returns:
+        Module: name, content, timestamps and the classrooms it belongs to.
+    """
+    return await http_cache.respond(
+        request, f"module:{module_uid}", Module,
+        lambda: get_module(module_uid),
+        tags=[f"module:{module_uid}"]
+        )
+
+@router.patch("/modules/{module_uid}", status_code=status.HTTP_204_NO_CONTENT)
+async def edit_module(module_uid: str, form: ModuleUpdate, current_user = Depends(get_current_user)):
+    """
+    Edit a module's name and/or content (teachers of one of its classrooms only).
+    Args:
+        module_uid (str): Module uid.
+        form (ModuleUpdate): Fields to change.
+    """
+    props = form.model_dump(exclude_none=True)
+    if not props:
+        raise HTTPException(status_code=400, detail="Nothing to update")
+    await check_module_editable(module_uid, current_user.uid)
+    await update_module(module_uid, props)
+
+@router.put("/modules/{module_uid}/next/{next_uid}", status_code=status.HTTP_204_NO_CONTENT)
+async def add_next_module(module_uid: str, next_uid: str, current_user = Depends(get_current_user)):
+    """
+    Make `next_uid` follow `module_uid` on the path.
+    Args:
+        module_uid (str): Module uid.
+        next_uid (str): uid of the module that follows.
+    """
+    await check_module_editable(module_uid, current_user.uid)
+    await link_next(module_uid, next_uid)
+
+@router.delete("/modules/{module_uid}/next/{next_uid}", status_code=status.HTTP_204_NO_CONTENT)
+async def remove_next_module(module_uid: str, next_uid: str, current_user = Depends(get_current_user)):
+    """
+    Remove the NEXT link between two modules.
+    Args:
+        module_uid (str): Module uid.
+        next_uid (str): uid of the module that no longer follows.
+    """
+    await check_module_editable(module_uid, current_user.uid)
+    await unlink_next(module_uid, next_uid)
+
+
+######################################################################
+# PROGRESS
+
+@router.post("/modules/{module_uid}/visit", response_model=ModuleProgress)
+async def visit(module_uid: str, current_user = Depends(get_current_user)):
+    """
+    Record that the current user visited a module (first visit is kept, last visit updated).
+    Args:
+        module_uid (str): Module uid.
+    Returns:
+        ModuleProgress: the user's visit timestamps and flag for this module.
+    """
+    return await visit_module(module_uid, current_user.uid)
+
+@router.put("/modules/{module_uid}/flag", status_code=status.HTTP_204_NO_CONTENT)
+async def flag(module_uid: str, current_user = Depends(get_current_user)):
+    """
+    Flag a module (e.g. to revisit later).
+    Args:
+        module_uid (str): Module uid.
+    """
+    await set_flag(module_uid, current_user.uid, True)
+
+@router.delete("/modules/{module_uid}/flag", status_code=status.HTTP_204_NO_CONTENT)
+async def unflag(module_uid: str, current_user = Depends(get_current_user)):
+    """
+    Remove the current user's flag from a module.
+    Args:
+        module_uid (str): Module uid.
+    """
+    await set_flag(module_uid, current_user.uid, False)
@@ -0,0 +1,98 @@
+# Cached learning paths
+#   A classroom's path is its modules ordered along their NEXT edges. It is fetched in one
+#   query (modules + successors), ordered once in Python and cached, so classroom pages
+#   never walk NEXT hop by hop. Concurrent misses for the same classroom share one query.
+#   Entries are dropped when one of their modules is edited (every route that changes a module
+#   or its NEXT edges publishes a "learning_paths" invalidation, applied by every worker) and
+#   expire after LEARNING_PATH_CACHE_TTL in case an invalidation message is lost.
+import heapq
+import asyncio
+from typing import Awaitable, Callable
+from ...utils.lru import LRUCache
+from ...utils.settings import settings
+from ...utils.shared import invalidations
+
+######################################################################
+
+def order_path(modules: list[dict]) -> list[dict]:
+    """
+    Topologically order modules by their `next` uids (Kahn's algorithm), modules that are
+    ready at the same time by name, so branching paths stay deterministic. Modules caught
+    in a NEXT cycle are appended at the end instead of being dropped.
+    """
+    by_uid = {module["uid"]: module for module in modules}
+    incoming = {uid: 0 for uid in by_uid}
+    for module in modules:
+        for successor in module["next"]:
+            incoming[successor] += 1
+    ready = [(module["name"] or "", module["uid"]) for module in modules if not incoming[module["uid"]]]
+    heapq.heapify(ready)
+    ordered = []
+    while ready:
+        _, uid = heapq.heappop(ready)
+        ordered.append(by_uid[uid])
+        for successor in by_uid[uid]["next"]:
+            incoming[successor] -= 1
+            if not incoming[successor]:
+                heapq.heappush(ready, (by_uid[successor]["name"] or "", successor))
+    if len(ordered) < len(modules):
+        seen = {module["uid"] for module in ordered}
+        ordered += sorted((m for m in modules if m["uid"] not in seen), key=lambda m: (m["name"] or "", m["uid"]))
+    return [{**module, "position": position} for position, module in enumerate(ordered)]
+
+
+class PathCache(LRUCache):
+    """LRU cache of ordered classroom paths, keyed by classroom uid, loading each missing path once"""
+    def __init__(self, maxsize: int = settings.learning_path_cache_size, ttl: int = settings.learning_path_cache_ttl):
+        super().__init__(maxsize, ttl)
+        self._loading: dict[str, asyncio.Future] = {}
+        self._generation: dict[str, int] = {} # bumped on invalidation, discards loads that raced an edit
+
+    async def get_or_load(self, classroom: str, load: Callable[[str], Awaitable[dict | None]]) -> dict | None:
+        """The cached path of `classroom`, else `await load(classroom)` (None = no such classroom, not cached)"""
+        path = self.get(classroom)
+        if path is not None:
+            return path
+        loading = self._loading.get(classroom)
+        if loading is not None:
+            try:
+                return await asyncio.shield(loading)
+            except asyncio.CancelledError:
+                if not loading.cancelled() or asyncio.current_task().cancelling():
+                    raise # this caller was cancelled
+            return await self.get_or_load(classroom, load) # the loading caller was: load it here instead
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[classroom] = future
+        generation = self._generation.get(classroom, 0)
+        try:
+            path = await load(classroom)
+        except Exception as error:
+            future.set_exception(error)
+            future.exception() # retrieved, waiters re-raise it
+            raise
+        except BaseException:
+            # the loading caller's cancellation is its own, not a result to hand the waiters
+            future.cancel()
+            raise
+        finally:
+            del self._loading[classroom]
+        if path is not None and generation == self._generation.get(classroom, 0):
+            self.set(classroom, path)
+        future.set_result(path)
+        return path
+
+    def invalidate_classrooms(self, classrooms):
+        """Drop the paths of `classrooms` (and any load of them still in flight)"""
+        classrooms = list(classrooms)
+        self.invalidate(classrooms)
+        for classroom in classrooms:
+            self._generation[classroom] = self._generation.get(classroom, 0) + 1
+
+    def clear(self):
+        super().clear()
+        self._generation.clear()
+
+
+path_cache = PathCache()
+invalidations.register("learning_paths", path_cache.invalidate_classrooms)
@@ -0,0 +1,42 @@
+# Learning-related schemas for data validation
+from pydantic import BaseModel, Field
+
+class PathModule(BaseModel):
+    uid: str
+    name: str | None
+    position: int = Field(..., description="Index along the classroom's path")
+    next: list[str] = Field(..., description="uids of the modules that follow (NEXT) in this classroom")
+    modified: float | None = None
+
+class ClassroomPath(BaseModel):
+    uid: str
+    name: str | None
+    modules: list[PathModule] = Field(..., description="Ordered along NEXT, modules at the same depth by name")
+
+class ModuleProgress(BaseModel):
+    uid: str
+    visited: bool
+    flagged: bool
+    first_visit: float | None = None
+    last_visit: float | None = None
+
+class ClassroomProgress(BaseModel):
+    classroom: str
+    total: int
+    visited: int
+    flagged: int
+    completion: float = Field(..., description="Share of the path's modules visited, 0-1")
+    current: str | None = Field(None, description="First module along the path not visited yet, null when done")
+    modules: list[ModuleProgress] = Field(..., description="Modules the user visited or flagged, in path order")
+
+class Module(BaseModel):
+    uid: str
+    name: str | None
+    content: str | None
+    created: float | None = None
+    modified: float | None = None
+    classrooms: list[str]
+
+class ModuleUpdate(BaseModel):
+    name: str | None = Field(None, min_length=1, max_length=128)
+    content: str | None = None
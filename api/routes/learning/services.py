@@ -0,0 +1,120 @@
+# Learning-related helper functions
+import time
+from fastapi import HTTPException
+
+from ...utils import queries
+from ...utils.queries import epoch
+from ...utils.shared import invalidations
+from ...utils.httpcache import http_cache
+from . import cypher  # registers this router's statements with `utils.queries`
+from .paths import path_cache, order_path
+from .schemas import ClassroomPath, ClassroomProgress, ModuleProgress, Module
+
+######################################################################
+# PATHS
+
+async def load_path(classroom_uid: str) -> dict | None:
+    results = await queries.run("classroom_path", uid=classroom_uid)
+    if not results:
+        return None
+    name, modules = results[0]
+    modules = [{**module, "modified": epoch(module["modified"])} for module in modules]
+    return {"uid": classroom_uid, "name": name, "modules": order_path(modules)}
+
+async def get_path(classroom_uid: str) -> dict:
+    path = await path_cache.get_or_load(classroom_uid, load_path)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Classroom not found")
+    return path
+
+async def get_classroom_path(classroom_uid: str) -> ClassroomPath:
+    return ClassroomPath(**await get_path(classroom_uid))
+
+######################################################################
+# PROGRESS
+
+async def get_progress(classroom_uid: str, user_uid: str) -> ClassroomProgress:
+    """The user's progress along the (cached) path, from one aggregated VISITED/FLAGGED query"""
+    path = await get_path(classroom_uid)
+    results = await queries.run("classroom_progress", classroom=classroom_uid, uid=user_uid)
+    progress = {row["uid"]: row for row in results[0][0]} if results else {}
+
+    modules, current, visited, flagged = [], None, 0, 0
+    for module in path["modules"]:
+        row = progress.get(module["uid"])
+        is_visited = row is not None and row["last_visit"] is not None
+        if row is not None:
+            visited += is_visited
+            flagged += row["flagged"]
+            modules.append(ModuleProgress(
+                uid=module["uid"],
+                visited=is_visited,
+                flagged=row["flagged"],
+                first_visit=epoch(row["first_visit"]),
+                last_visit=epoch(row["last_visit"])
+            ))
+        if current is None and not is_visited:
+            current = module["uid"]
+
+    total = len(path["modules"])
+    return ClassroomProgress(
+        classroom=classroom_uid,
+        total=total,
+        visited=visited,
+        flagged=flagged,
+        completion=visited / total if total else 0.0,
+        current=current,
+        modules=modules
+    )
+
+async def visit_module(module_uid: str, user_uid: str) -> ModuleProgress:
+    results = await queries.run("visit_module", uid=user_uid, module=module_uid, now=time.time())
+    if not results:
+        raise HTTPException(status_code=404, detail="Module not found")
+    first_visit, last_visit, flagged = results[0]
+    await http_cache.invalidate(f"progress:{user_uid}")
+    return ModuleProgress(uid=module_uid, visited=True, flagged=flagged, first_visit=epoch(first_visit), last_visit=epoch(last_visit))
+
+async def set_flag(module_uid: str, user_uid: str, flagged: bool):
+    results = await queries.run("flag_module" if flagged else "unflag_module", uid=user_uid, module=module_uid, now=time.time())
+    if not results:
+        raise HTTPException(status_code=404, detail="Module not found")
+    await http_cache.invalidate(f"progress:{user_uid}")
+
+######################################################################
+# MODULES
+
+async def get_module(module_uid: str) -> Module:
+    results = await queries.run("module", uid=module_uid)
+    if not results:
+        raise HTTPException(status_code=404, detail="Module not found")
+    uid, name, content, created, modified, classrooms = results[0]
+    return Module(uid=uid, name=name, content=content, created=epoch(created), modified=epoch(modified), classrooms=classrooms)
+
+async def check_module_editable(module_uid: str, user_uid: str):
+    """Raise 404/403 unless the user teaches (or develops) a classroom containing the module"""
+    results = await queries.run("module_editable", module=module_uid, uid=user_uid)
+    if not results:
+        raise HTTPException(status_code=404, detail="Module not found")
+    if not results[0][0]:
+        raise HTTPException(status_code=403, detail="Only teachers of this module's classrooms can edit it")
+
+async def edit_module(name: str, **params):
+    """Run a module-editing statement (which bumps `modified`) and drop the affected cached paths & responses"""
+    results = await queries.run(name, modified=time.time(), **params)
+    if not results:
+        raise HTTPException(status_code=404, detail="Module not found")
+    classrooms = results[0][0]
+    await invalidations.publish("learning_paths", classrooms)
+    await http_cache.invalidate(f"module:{params['uid']}", *(f"classroom:{classroom}" for classroom in classrooms))
+
+async def update_module(module_uid: str, props: dict):
+    await edit_module("update_module", uid=module_uid, props=props)
+
+async def link_next(module_uid: str, next_uid: str):
+    if module_uid == next_uid:
+        raise HTTPException(status_code=400, detail="A module cannot follow itself")
+    await edit_module("link_next", uid=module_uid, next=next_uid)
+
+async def unlink_next(module_uid: str, next_uid: str):
+    await edit_module("unlink_next", uid=module_uid, next=next_uid)
@@ -0,0 +1,11 @@
+# In-process cache of typeahead results
+#   Typeahead traffic is dominated by a few short, hot prefixes ("a", "al", "ali", ...)
+#   typed by many users, so results are kept per normalized prefix for SEARCH_CACHE_TTL
+#   seconds and evicted LRU-first once SEARCH_CACHE_SIZE prefixes are cached.
+from ...utils.lru import LRUCache
+from ...utils.settings import settings
+
+######################################################################
+
+# keyed by (normalized prefix, limit)
+prefix_cache = LRUCache(settings.search_cache_size, settings.search_cache_ttl)
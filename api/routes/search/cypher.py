@@ -0,0 +1,32 @@
+# Search Cypher statements
+#   Registered by name with `utils.queries` when this module is imported (the router's
+#   services import it), and run with `queries.run(name, **params)` like every other statement.
+from ...utils.queries import register
+
+######################################################################
+
+QUERIES = {
+    # search, through the full-text indexes in SCHEMA ($query is a Lucene query string, see routes/search)
+    # typeahead fetches $fetch (> $limit) hits, as unverified users are only dropped after the index lookup
+    "typeahead": """
+        CALL db.index.fulltext.queryNodes('name_search', $query, {limit: $fetch})
+        YIELD node, score
+        WHERE NOT node:User OR node.is_verified
+        RETURN CASE WHEN node:User THEN 'user' WHEN node:Classroom THEN 'classroom' ELSE 'group' END AS type,
+            node.uid AS uid, coalesce(node.username, node.name) AS name, score
+        LIMIT $limit
+        """,
+    "search_modules": """
+        CALL db.index.fulltext.queryNodes('module_search', $query, {skip: $skip, limit: $limit})
+        YIELD node, score
+        RETURN node.uid AS uid, node.name AS name, node.content AS content, score
+        """,
+}
+
+# Indexes for the statements above, created at startup (see `db.install_schema`)
+SCHEMA = [
+    "CREATE FULLTEXT INDEX name_search IF NOT EXISTS FOR (n:User|Group) ON EACH [n.username, n.name]",
+    "CREATE FULLTEXT INDEX module_search IF NOT EXISTS FOR (m:LearningModule) ON EACH [m.name, m.content]",
+]
+
+register(QUERIES, SCHEMA)
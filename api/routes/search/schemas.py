@@ -0,0 +1,19 @@
+# Search-related schemas for data validation
+from typing import Literal
+from pydantic import BaseModel, Field
+
+class TypeaheadResult(BaseModel):
+    type: Literal["user", "group", "classroom"]
+    uid: str
+    name: str
+    score: float
+
+class ModuleHit(BaseModel):
+    uid: str
+    name: str | None
+    score: float = Field(..., description="Full-text relevance, higher is better")
+    snippet: str = Field(..., description="Excerpt of the content around the first matching term")
+
+class ModuleSearchPage(BaseModel):
+    hits: list[ModuleHit] = Field(..., description="Most relevant first")
+    next_offset: int | None = Field(None, description="Pass as `offset` to get the next page, null on the last page")
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, Query
+from ..auth.services import get_current_user
+from .schemas import TypeaheadResult, ModuleSearchPage
+from .services import typeahead, search_modules
+
+
+# TODO:
+# - search chat messages
+# - fuzzy matching (`term~`) when a query has no hits
+
+
+######################################################################
+# SET VARIABLES
+
+router = APIRouter(tags=["search"])
+
+
+######################################################################
+# SEARCH
+
+@router.get("/typeahead", response_model=list[TypeaheadResult])
+async def search_typeahead(
+        q: str = Query(..., min_length=1, max_length=64, description="What has been typed so far"),
+        limit: int = Query(8, ge=1, le=20),
+        current_user = Depends(get_current_user)
+        ):
+    """
+    Usernames and group/classroom names starting with the typed words, best match first.
+    Args:
+        q (str): Typed prefix, e.g. "ali jo".
+        limit (int): Maximum number of results.
+    Returns:
+        list[TypeaheadResult]: type, uid, name & score of each match.
+    """
+    return await typeahead(q, limit)
+
+@router.get("/modules", response_model=ModuleSearchPage)
+async def search_learning_modules(
+        q: str = Query(..., min_length=1, max_length=256),
+        limit: int = Query(20, ge=1, le=100),
+        offset: int = Query(0, ge=0, le=1000),
+        current_user = Depends(get_current_user)
+        ):
+    """
+    Full-text search over learning module names and content, most relevant first.
+    Args:
+        q (str): Search terms.
+        limit (int): Page size.
+        offset (int): `next_offset` of the previous page.
+    Returns:
+        ModuleSearchPage: hits with a content snippet & the offset of the next page.
+    """
+    return await search_modules(q, limit, offset)
@@ -0,0 +1,64 @@
+# Search-related helper functions
+import re
+
+from ...utils import queries
+from . import cypher  # registers this router's statements with `utils.queries`
+from .cache import prefix_cache
+from .schemas import TypeaheadResult, ModuleHit, ModuleSearchPage
+
+######################################################################
+
+SNIPPET_LENGTH = 160
+# the index can't filter out unverified users, so fetch this many times `limit` hits before filtering
+TYPEAHEAD_OVERFETCH = 4
+
+# Lucene query syntax, escaped so user input is only ever searched for, never interpreted
+_LUCENE_SPECIAL = re.compile(r'([+\-&|!(){}\[\]^"~*?:\\/])')
+_TERMS = re.compile(r"\w+")
+
+
+def terms(text: str) -> list[str]:
+    """Lower-cased words of `text` (lower case also keeps AND/OR/NOT from acting as operators)"""
+    return _TERMS.findall(text.lower())
+
+def escape(term: str) -> str:
+    return _LUCENE_SPECIAL.sub(r"\\\1", term)
+
+def prefix_query(text: str) -> str | None:
+    """'ali jo' -> 'ali* AND jo*': every word must start a word of the name"""
+    words = terms(text)
+    return " AND ".join(f"{escape(word)}*" for word in words) if words else None
+
+def snippet(content: str | None, words: list[str], length: int = SNIPPET_LENGTH) -> str:
+    """A window of `content` around the first occurrence of any of `words`"""
+    if not content:
+        return ""
+    lowered = content.lower()
+    positions = [i for i in (lowered.find(word) for word in words) if i >= 0]
+    start = max(0, min(positions) - length // 4) if positions else 0
+    excerpt = content[start:start + length]
+    return ("…" if start else "") + excerpt + ("…" if start + length < len(content) else "")
+
+######################################################################
+
+async def typeahead(text: str, limit: int) -> list[TypeaheadResult]:
+    """Users & groups/classrooms whose name starts with the typed words, hot prefixes from cache"""
+    query = prefix_query(text)
+    if query is None:
+        return []
+    key = (query, limit)
+    results = prefix_cache.get(key)
+    if results is None:
+        rows = await queries.run("typeahead", query=query, fetch=limit * TYPEAHEAD_OVERFETCH, limit=limit)
+        results = [TypeaheadResult(type=type_, uid=uid, name=name, score=score) for type_, uid, name, score in rows]
+        prefix_cache.set(key, results)
+    return results
+
+async def search_modules(text: str, limit: int, offset: int = 0) -> ModuleSearchPage:
+    """Learning modules ranked by full-text relevance of their name & content"""
+    words = terms(text)
+    if not words:
+        return ModuleSearchPage(hits=[])
+    rows = await queries.run("search_modules", query=" ".join(escape(word) for word in words), skip=offset, limit=limit + 1)
+    hits = [ModuleHit(uid=uid, name=name, score=score, snippet=snippet(content, words)) for uid, name, content, score in rows[:limit]]
+    return ModuleSearchPage(hits=hits, next_offset=offset + limit if len(rows) > limit else None)
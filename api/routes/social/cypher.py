@@ -0,0 +1,40 @@
+# Social graph Cypher statements
+#   Registered by name with `utils.queries` when this module is imported (the router's
+#   services import it), and run with `queries.run(name, **params)` like every other statement.
+from ...utils.queries import register
+
+######################################################################
+
+QUERIES = {
+    # social graph: FRIENDS is mutual (stored once, matched in both directions), KNOWS is one-way
+    "friends_of_user": """
+        MATCH (:User {uid: $uid})-[r:FRIENDS]-(f:User)
+        RETURN f.uid AS uid, f.username AS username, r.created AS since, coalesce(r.bestFriend, false) AS best_friend
+        ORDER BY username
+        """,
+    "add_friend": """
+        MATCH (a:User {uid: $uid}), (b:User {uid: $other})
+        MERGE (a)-[r:FRIENDS]-(b)
+        ON CREATE SET r.created = $created, r.bestFriend = false
+        RETURN r.created AS since, r.bestFriend AS best_friend
+        """,
+    "add_known": """
+        MATCH (a:User {uid: $uid}), (b:User {uid: $other})
+        MERGE (a)-[r:KNOWS]->(b)
+        ON CREATE SET r.created = $created
+        """,
+    # every edge once, streamed to rebuild the suggestion table (see routes/social/suggestions.py)
+    "social_edges": """
+        MATCH (a:User)-[:KNOWS|FRIENDS]->(b:User)
+        RETURN a.uid AS a, a.username AS a_username, b.uid AS b, b.username AS b_username
+        """,
+    # live "people you may know", only used until the first table build has finished
+    "suggestions_for_user": """
+        MATCH (u:User {uid: $uid})-[:KNOWS|FRIENDS]-(m:User)-[:KNOWS|FRIENDS]-(s:User)
+        WHERE s <> u AND NOT EXISTS { (u)-[:KNOWS|FRIENDS]-(s) }
+        RETURN s.uid AS uid, s.username AS username, count(DISTINCT m) AS mutual
+        ORDER BY mutual DESC, username LIMIT $limit
+        """,
+}
+
+register(QUERIES)
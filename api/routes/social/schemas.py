@@ -0,0 +1,13 @@
+# Social-related schemas for data validation
+from pydantic import BaseModel, Field
+
+class Friend(BaseModel):
+    uid: str
+    username: str
+    since: float | None = Field(None, description="Unix timestamp the friendship was created")
+    best_friend: bool = False
+
+class Suggestion(BaseModel):
+    uid: str
+    username: str | None
+    mutual: int = Field(..., description="Connections in common")
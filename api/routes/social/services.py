@@ -0,0 +1,53 @@
+# Social-related helper functions
+import time
+from fastapi import HTTPException
+
+from ...utils import queries
+from ...utils.queries import epoch
+from ...utils.shared import invalidations
+from ...utils.httpcache import http_cache
+from .schemas import Friend, Suggestion
+from .suggestions import suggestion_index
+
+######################################################################
+
+async def get_friends(user_uid: str) -> list[Friend]:
+    results = await queries.run("friends_of_user", uid=user_uid)
+    return [Friend(uid=uid, username=username, since=epoch(since), best_friend=best_friend) for uid, username, since, best_friend in results]
+
+async def get_other_user(user, username: str):
+    """The user called `username`, raise 404 if there is none and 400 if it's `user` itself"""
+    other = await queries.get_user_by_username(username)
+    if other is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    if other.uid == user.uid:
+        raise HTTPException(status_code=400, detail="You cannot add yourself")
+    return other
+
+async def add_friend(user, username: str) -> Friend:
+    """Create the (mutual) FRIENDS edge unless it exists, and patch the suggestion table"""
+    other = await get_other_user(user, username)
+    since, best_friend = (await queries.run("add_friend", uid=user.uid, other=other.uid, created=time.time()))[0]
+    await invalidations.publish("social_edge", user.uid, other.uid, {user.uid: user.username, other.uid: other.username})
+    await http_cache.invalidate(f"friends:{user.uid}", f"friends:{other.uid}")
+    return Friend(uid=other.uid, username=other.username, since=epoch(since), best_friend=best_friend)
+
+async def add_known(user, username: str):
+    other = await get_other_user(user, username)
+    await queries.run("add_known", uid=user.uid, other=other.uid, created=time.time())
+    await invalidations.publish("social_edge", user.uid, other.uid, {user.uid: user.username, other.uid: other.username})
+
+async def forget_users(uids: list[str], friends: list[str]):
+    """Deleted users leave every worker's suggestion table and their `friends`' lists"""
+    await invalidations.publish("social_users_removed", uids)
+    await http_cache.invalidate(*(f"friends:{friend}" for friend in friends))
+
+async def get_suggestions(user_uid: str, limit: int) -> list[Suggestion]:
+    """
+    Precomputed "people you may know"; falls back to the live 2-hop query
+    only while the table hasn't been built yet (right after startup)
+    """
+    if suggestion_index.ready:
+        return [Suggestion(**row) for row in suggestion_index.suggest(user_uid, limit)]
+    results = await queries.run("suggestions_for_user", uid=user_uid, limit=limit)
+    return [Suggestion(uid=uid, username=username, mutual=mutual) for uid, username, mutual in results]
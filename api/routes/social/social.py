@@ -0,0 +1,83 @@
+from fastapi import APIRouter, Depends, Query, Request, status
+from ..auth.services import get_current_user
+from ..auth.schemas import StatusMessage
+from ...utils.httpcache import http_cache
+from .schemas import Friend, Suggestion
+from .suggestions import suggestion_index
+from .services import (
+    get_friends,
+    add_friend,
+    add_known,
+    get_suggestions
+)
+
+
+# TODO:
+# - friend requests (pending until accepted) instead of adding directly
+# - unfriend / best friend toggle
+# - share the suggestion table between workers
+
+
+######################################################################
+# SET VARIABLES
+
+router = APIRouter(tags=["social"])
+
+
+######################################################################
+# FRIENDS
+
+@router.get("/friends", response_model=list[Friend])
+async def list_friends(request: Request, current_user = Depends(get_current_user)):
+    """
+    Friends of the current user. Sends an ETag, 304 when unchanged.
+    Returns:
+        list[Friend]: uid, username & since when, ordered by username.
+    """
+    return await http_cache.respond(
+        request, f"friends:{current_user.uid}", list[Friend],
+        lambda: get_friends(current_user.uid),
+        tags=[f"friends:{current_user.uid}"]
+        )
+
+@router.post("/friends/{username}", response_model=Friend, status_code=status.HTTP_201_CREATED)
+async def befriend(username: str, current_user = Depends(get_current_user)):
+    """
+    Add a user as a friend (friendship is mutual). Adding an existing friend is a no-op.
+    Args:
+        username (str): The other user's username.
+    Returns:
+        Friend: The new (or existing) friendship.
+    """
+    return await add_friend(current_user, username)
+
+@router.post("/knows/{username}", response_model=StatusMessage, status_code=status.HTTP_201_CREATED)
+async def know(username: str, current_user = Depends(get_current_user)):
+    """
+    Record that the current user knows another user (one-way).
+    Args:
+        username (str): The other user's username.
+    Returns:
+        StatusMessage: A success message.
+    """
+    await add_known(current_user, username)
+    return {"message": f"You now know {username}"}
+
+
+######################################################################
+# PEOPLE YOU MAY KNOW
+
+@router.get("/suggestions", response_model=list[Suggestion])
+async def list_suggestions(
+        limit: int = Query(suggestion_index.k, ge=1, le=suggestion_index.k),
+        current_user = Depends(get_current_user)
+        ):
+    """
+    Friends-of-friends the current user isn't connected to yet, most mutual connections first.
+    Served from a precomputed per-user table, rebuilt periodically.
+    Args:
+        limit (int): Number of suggestions (at most SOCIAL_SUGGESTIONS_K).
+    Returns:
+        list[Suggestion]: uid, username & number of mutual connections.
+    """
+    return await get_suggestions(current_user.uid, limit)
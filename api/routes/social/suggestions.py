@@ -0,0 +1,156 @@
+# "People you may know" table
+#   Suggestions are friends-of-friends ranked by the number of mutual connections.
+#   Instead of a 2-hop traversal per request, every user's top-K is precomputed from an
+#   in-process copy of the KNOWS/FRIENDS adjacency: `refresh` rebuilds the whole table
+#   from one streamed edge scan (periodically, see `run`), and `add_edge`/`remove_users` patch
+#   only the users whose 2-hop neighbourhood changed when an edge is created or an account
+#   deleted in between. Each worker keeps its own table; edges and deletions are broadcast as
+#   "social_edge"/"social_users_removed" invalidations so every worker patches its copy.
+import time
+import heapq
+import asyncio
+import logging
+from collections import Counter
+from operator import itemgetter
+from ...utils import queries
+from ...utils.metrics import span
+from ...utils.settings import settings
+from ...utils.shared import invalidations
+from . import cypher  # registers this router's statements with `utils.queries`
+
+######################################################################
+
+logger = logging.getLogger(__name__)
+
+Adjacency = dict[str, set[str]]
+
+
+def top_k(uid: str, neighbours: Adjacency, k: int) -> list[tuple[str, int]]:
+    """(uid, mutual connections) of the `k` best friends-of-friends of `uid`"""
+    direct = neighbours.get(uid, ())
+    mutual = Counter()
+    for other in direct:
+        mutual.update(neighbours[other])
+    mutual.pop(uid, None)
+    for other in direct:
+        mutual.pop(other, None)
+    return heapq.nlargest(k, mutual.items(), key=itemgetter(1))
+
+
+def build_table(neighbours: Adjacency, k: int) -> dict[str, list[tuple[str, int]]]:
+    return {uid: top_k(uid, neighbours, k) for uid in neighbours}
+
+
+class SuggestionIndex:
+    def __init__(self, k: int = settings.social_suggestions_k, interval: float = settings.social_suggestions_interval):
+        self.k = k
+        self.interval = interval
+        self.neighbours: Adjacency = {}
+        self.usernames: dict[str, str] = {}
+        self.table: dict[str, list[tuple[str, int]]] = {}
+        self.built_at: float | None = None # None until the first rebuild finished
+        self._replay: list[tuple] | None = None # (update, args) applied while a rebuild is running
+
+    @property
+    def ready(self) -> bool:
+        return self.built_at is not None
+
+    def suggest(self, uid: str, limit: int | None = None) -> list[dict]:
+        return [
+            {"uid": other, "username": self.usernames.get(other), "mutual": mutual}
+            for other, mutual in self.table.get(uid, ())[:limit]
+        ]
+
+    ######################################################################
+    # UPDATES
+
+    def add_edge(self, a: str, b: str, usernames: dict[str, str] | None = None):
+        """
+        Record a new KNOWS/FRIENDS edge. Only a, b and their direct connections can gain
+        (or, for a & b themselves, lose) a friend-of-friend, so only their rows are recomputed.
+        """
+        if self._replay is not None:
+            self._replay.append((self._apply, (a, b, usernames or {})))
+        self._apply(a, b, usernames or {})
+
+    def _apply(self, a: str, b: str, usernames: dict[str, str]):
+        self.usernames.update(usernames)
+        if b in self.neighbours.get(a, ()):
+            return
+        self.neighbours.setdefault(a, set()).add(b)
+        self.neighbours.setdefault(b, set()).add(a)
+        if not self.ready:
+            return
+        for uid in {a, b} | self.neighbours[a] | self.neighbours[b]:
+            self.table[uid] = top_k(uid, self.neighbours, self.k)
+
+    def remove_users(self, uids: list[str]):
+        """
+        Forget deleted users: they stop being suggested, and the rows of everyone within
+        2 hops of them (who had them as a connection or a mutual one) are recomputed.
+        """
+        if self._replay is not None:
+            self._replay.append((self._remove, (uids,)))
+        self._remove(uids)
+
+    def _remove(self, uids: list[str]):
+        affected = set()
+        for uid in uids:
+            direct = self.neighbours.pop(uid, set())
+            self.usernames.pop(uid, None)
+            self.table.pop(uid, None)
+            for other in direct:
+                self.neighbours[other].discard(uid)
+                affected.add(other)
+                affected.update(self.neighbours[other])
+        if not self.ready:
+            return
+        for uid in affected - set(uids):
+            self.table[uid] = top_k(uid, self.neighbours, self.k)
+
+    async def refresh(self):
+        """Rebuild the adjacency & table from the graph, then swap them in at once"""
+        self._replay = []
+        try:
+            with span("social_edges_scan"):
+                neighbours: Adjacency = {}
+                usernames: dict[str, str] = {}
+                async for row in queries.stream("social_edges"):
+                    a, b = row["a"], row["b"]
+                    if a == b:
+                        continue
+                    neighbours.setdefault(a, set()).add(b)
+                    neighbours.setdefault(b, set()).add(a)
+                    usernames[a], usernames[b] = row["a_username"], row["b_username"]
+            with span("social_suggestions_build"):
+                # off the event loop; the thread only reads the fresh, unshared adjacency
+                table = await asyncio.to_thread(build_table, neighbours, self.k)
+            replay = self._replay
+        finally:
+            self._replay = None
+        self.neighbours, self.usernames, self.table = neighbours, usernames, table
+        self.built_at = time.time()
+        for update, args in replay: # changes the scan may have missed
+            update(*args)
+        logger.info("Rebuilt suggestions for %d users", len(table))
+
+    async def run(self):
+        """Rebuild now and then every `interval` seconds, until cancelled"""
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                logger.exception("Rebuilding the suggestion table failed")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self.table),
+            "edges": sum(len(others) for others in self.neighbours.values()) // 2,
+            "built_at": self.built_at,
+        }
+
+
+suggestion_index = SuggestionIndex()
+invalidations.register("social_edge", suggestion_index.add_edge)
+invalidations.register("social_users_removed", suggestion_index.remove_users)
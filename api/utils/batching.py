@@ -0,0 +1,75 @@
+# Write-behind buffering for low-value, high-frequency graph writes
+#   Rows are collected in memory (latest row per key wins) and written with a
+#   single `UNWIND $rows ...` statement from the query registry, either every
+#   `flush_interval` seconds, as soon as `max_size` keys are pending, or on shutdown.
+import asyncio
+import logging
+from contextvars import Context
+from . import queries
+
+######################################################################
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindBuffer:
+    def __init__(self, query: str, flush_interval: float = 5.0, max_size: int = 500):
+        self.query = query # name of an UNWIND $rows query in `queries.QUERIES`
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.flushed = 0
+        self.failures = 0
+        self._pending: dict[str, dict] = {}
+        self._inflight: dict[str, dict] = {} # rows of the flush currently running
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+        self._flushes: set[asyncio.Task] = set()
+
+    def __len__(self):
+        return len(self._pending)
+
+    def pending(self) -> list[dict]:
+        """Rows not yet confirmed written (for reads that must see their own writes)"""
+        return [*self._inflight.values(), *self._pending.values()]
+
+    def start(self):
+        """Spawn the periodic flusher (called lazily on first add if not done at startup)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), context=Context()) # not part of the request that started it
+
+    async def stop(self):
+        """Stop the periodic flusher and write out whatever is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, *self._flushes, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    def add(self, key: str, row: dict):
+        self.start()
+        self._pending[key] = row
+        if len(self._pending) >= self.max_size:
+            task = asyncio.create_task(self.flush(), context=Context())
+            self._flushes.add(task)
+            task.add_done_callback(self._flushes.discard)
+
+    async def flush(self):
+        async with self._lock:
+            if not self._pending:
+                return
+            rows = self._inflight = self._pending
+            self._pending = {}
+            try:
+                await queries.run(self.query, rows=list(rows.values()))
+                self.flushed += len(rows)
+            except Exception as error:
+                self.failures += 1
+                logger.warning("Write-behind flush of %d '%s' rows failed: %r", len(rows), self.query, error)
+                for key, row in rows.items(): # keep for the next flush unless superseded meanwhile
+                    self._pending.setdefault(key, row)
+            finally:
+                self._inflight = {}
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
@@ -1,37 +1,95 @@
-# ARCHIVED FILE
-# In here, Neo4j database connection and session handling
-# can be managed in a less abstracted way (without using neomodel)
-# by using the official Neo4j Python driver & FastAPI's dependency injection.
-
-import os
-from contextlib import asynccontextmanager
-from dotenv import load_dotenv
-from fastapi import FastAPI, Depends
+# Neo4j driver lifecycle
+#   One shared AsyncDriver per process is created at application startup,
+#   handed to neomodel (`adb`) and closed on shutdown. Pool settings are read
+#   from the environment and a number of connections can be pre-opened so the
+#   first requests after a deploy don't pay for connection setup.
+#   The driver & sessions are also exposed through FastAPI's dependency injection
+#   for routes that want to use the official Neo4j Python driver directly.
+
+import asyncio
+import logging
+from fastapi import Depends
 from neo4j import AsyncGraphDatabase, AsyncDriver
+from neomodel import config, adb
+from .settings import settings
 
-load_dotenv() # Load environment variables from .env file
-NEO4J_URI = os.getenv("NEO4J_URI")
-NEO4J_USERNAME = os.getenv("NEO4J_USERNAME")
-NEO4J_PASSWORD = os.getenv("NEO4J_PASSWORD")
-if not (NEO4J_URI and NEO4J_USERNAME and NEO4J_PASSWORD):
-    raise ValueError(
-        "One or more .env variables are not set: NEO4J_URI, NEO4J_USERNAME, NEO4J_PASSWORD"
-        )
+settings.require("neo4j_uri", "neo4j_username", "neo4j_password")
+NEO4J_WARMUP_TIMEOUT = 10 # seconds
 
+logger = logging.getLogger(__name__)
 drivers = {}
 
-@asynccontextmanager
-async def lifespan(app: FastAPI):
-    """FastAPI application startup and shutdown context manager"""
+# Fallback for scripts that use neomodel without going through `connect()`
+# (neomodel then lazily opens its own driver from this URL)
+NEO4J_URL = "neo4j+s://{}".format(settings.neo4j_uri.split("://")[1])
+config.DATABASE_URL = "neo4j+s://{}:{}@{}".format(
+    settings.neo4j_username,
+    settings.neo4j_password,
+    settings.neo4j_uri.split("://")[1]
+    )
+config.DATABASE_NAME = settings.neo4j_database
+
+######################################################################
+
+async def connect() -> AsyncDriver:
+    """Create the shared driver, register it with neomodel and warm up the pool"""
     driver = AsyncGraphDatabase.driver(
-        NEO4J_URI, 
-        auth=(NEO4J_USERNAME, NEO4J_PASSWORD),
-        database="neo4j"
+        NEO4J_URL,
+        auth=(settings.neo4j_username, settings.neo4j_password),
+        max_connection_pool_size=settings.neo4j_max_pool_size,
+        connection_acquisition_timeout=settings.neo4j_acquisition_timeout,
+        max_connection_lifetime=settings.neo4j_max_connection_lifetime
     )
     drivers["neo4j"] = driver
-    yield
-    await driver.close()
-    print("Driver closed")
+    await adb.set_connection(driver=driver)
+    await warm_up(driver, min(settings.neo4j_warmup_connections, settings.neo4j_max_pool_size))
+    return driver
+
+async def warm_up(driver: AsyncDriver, connections: int):
+    """Pre-open `connections` pooled connections by holding that many transactions open at once"""
+    if connections <= 0:
+        return
+    opened = 0
+    all_open = asyncio.Event()
+
+    async def hold_connection():
+        nonlocal opened
+        async with driver.session(database=settings.neo4j_database) as session:
+            tx = await session.begin_transaction()
+            await (await tx.run("RETURN 1")).consume()
+            opened += 1
+            if opened == connections:
+                all_open.set()
+            await all_open.wait()
+            await tx.rollback()
+
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(hold_connection() for _ in range(connections))),
+            NEO4J_WARMUP_TIMEOUT
+            )
+        logger.info("Neo4j pool warmed up with %d connections", connections)
+    except Exception as error: # warm-up is best effort, requests will open connections on demand
+        logger.warning("Neo4j pool warm-up incomplete (%d/%d): %r", opened, connections, error)
+
+async def install_schema(*models, statements: list[str] = ()):
+    """Create the constraints & indexes declared on `models` plus schema `statements` (all idempotent)"""
+    for model in models:
+        await adb.install_labels(model)
+    for statement in statements:
+        await adb.cypher_query(statement)
+
+async def disconnect():
+    """Close the shared driver and all pooled connections"""
+    driver = drivers.pop("neo4j", None)
+    if driver is not None:
+        if adb.driver is driver:
+            await adb.close_connection() # also resets neomodel's reference
+        else:
+            await driver.close()
+        logger.info("Neo4j driver closed")
+
+######################################################################
 
 async def get_neo4j_driver() -> AsyncDriver:
     """Get the Neo4j driver"""
@@ -39,5 +97,5 @@ async def get_neo4j_driver() -> AsyncDriver:
 
 async def get_neo4j_session(driver: AsyncDriver = Depends(get_neo4j_driver)):
     """Get a Neo4j session"""
-    async with driver.session() as session:
-        yield session
\ No newline at end of file
+    async with driver.session(database=settings.neo4j_database) as session:
+        yield session
@@ -0,0 +1,100 @@
+# Conditional GETs & shared response cache for read endpoints
+#   A cacheable response names the tags it depends on ("module:<uid>", "friends:<uid>", ...).
+#   Every tag has a version counter in the shared state, bumped by the routes that change it
+#   (`invalidate`), and its ETag is a hash of the route key, those versions and any version
+#   stamps the caller already holds (e.g. the User node for /auth/me). So revalidating costs
+#   one MGET and never a Neo4j query: a matching If-None-Match is answered with 304 before the
+#   handler loads anything. With RESPONSE_CACHE_TTL set, the serialized body is also kept in
+#   the shared state under its ETag, so any worker can serve it until a bump changes the ETag.
+#   Changes made outside the API (seed scripts, the Neo4j console) don't bump any tag.
+import uuid
+import hashlib
+import functools
+from typing import Any, Awaitable, Callable, Iterable
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from .metrics import span
+from .settings import settings
+from .shared import shared_state
+
+######################################################################
+
+EPOCH_KEY = "httpcache:epoch" # changes whenever the shared state is lost, so reset versions can't reuse old ETags
+
+@functools.cache
+def adapter(model) -> TypeAdapter:
+    return TypeAdapter(model)
+
+def matches(if_none_match: str | None, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header (a list of ETags) with `etag` (* is handled by `respond`)"""
+    if not if_none_match:
+        return False
+    return any(candidate.strip().removeprefix("W/") == etag.removeprefix("W/") for candidate in if_none_match.split(","))
+
+
+class HttpCache:
+    def __init__(self, ttl: int = settings.response_cache_ttl):
+        self.ttl = ttl
+        self.not_modified = 0
+        self.hits = 0
+        self.misses = 0
+
+    async def etag(self, key: str, tags: Iterable[str] = (), stamps: Iterable[Any] = ()) -> str:
+        tags = list(tags)
+        epoch, *versions = await shared_state.mget(EPOCH_KEY, *(f"tag:{tag}" for tag in tags))
+        if epoch is None:
+            await shared_state.set(EPOCH_KEY, uuid.uuid4().hex, only_if_new=True)
+            epoch = await shared_state.get(EPOCH_KEY)
+        fingerprint = repr((epoch, key, [version or 0 for version in versions], list(stamps)))
+        return f'W/"{hashlib.sha1(fingerprint.encode()).hexdigest()[:20]}"'
+
+    async def respond(
+            self,
+            request: Request,
+            key: str,
+            model,
+            load: Callable[[], Awaitable[Any]],
+            tags: Iterable[str] = (),
+            stamps: Iterable[Any] = (),
+            shared: bool = True
+            ) -> Response:
+        """
+        The response for `key`: 304 if the client's copy is current, else the body from the
+        shared cache (when `shared` and RESPONSE_CACHE_TTL is set), else `await load()`
+        serialized as `model` in one pydantic-core pass
+        """
+        with span("httpcache_etag"):
+            etag = await self.etag(key, tags, stamps)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"} # always revalidate, it's cheap
+        if_none_match = (request.headers.get("if-none-match") or "").strip()
+        if matches(if_none_match, etag):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        if if_none_match == "*": # "any representation": 304 only once `load` has found one (or raised a 404)
+            await load()
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+
+        cache_key = f"response:{etag}"
+        if shared and self.ttl > 0:
+            body = await shared_state.get(cache_key)
+            if body is not None:
+                self.hits += 1
+                return Response(body, media_type="application/json", headers=headers)
+        self.misses += 1
+        type_adapter = adapter(model)
+        body = type_adapter.dump_json(type_adapter.validate_python(await load()))
+        if shared and self.ttl > 0:
+            await shared_state.set(cache_key, body.decode(), ttl=self.ttl)
+        return Response(body, media_type="application/json", headers=headers)
+
+    async def invalidate(self, *tags: str):
+        """Bump the versions of `tags`: every ETag (and cached body) depending on them changes"""
+        for tag in dict.fromkeys(tags):
+            await shared_state.incr(f"tag:{tag}")
+
+    def stats(self) -> dict:
+        return {"not_modified": self.not_modified, "hits": self.hits, "misses": self.misses}
+
+
+http_cache = HttpCache()
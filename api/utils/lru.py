@@ -0,0 +1,69 @@
+# In-process LRU caches with a TTL
+#   The per-worker caches (token -> user, classroom paths, typeahead prefixes) share this:
+#   entries expire after `ttl` seconds (or at an earlier deadline given per entry) and are
+#   evicted least-recently-used first once `maxsize` entries are cached. Subclasses that keep
+#   a secondary index (e.g. tokens by user) update it in `_removed`, which every removal goes
+#   through: expiry, eviction, invalidation & overwrites.
+import time
+from collections import OrderedDict
+from typing import Hashable, Iterable
+
+######################################################################
+
+class LRUCache:
+    """LRU cache with a TTL, `maxsize` <= 0 disables it"""
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, object]] = OrderedDict() # key -> (expires_at, value)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key: Hashable):
+        """The cached value of `key`, None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= time.time():
+            if entry is not None:
+                self._discard(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value, expires_at: float | None = None):
+        """Cache `value` for `ttl` seconds, never beyond `expires_at` (unix timestamp) when given"""
+        if self.maxsize <= 0:
+            return
+        deadline = time.time() + self.ttl
+        if key in self._entries:
+            self._discard(key)
+        self._entries[key] = (deadline if expires_at is None else min(float(expires_at), deadline), value)
+        while len(self._entries) > self.maxsize:
+            self._discard(next(iter(self._entries)))
+
+    def invalidate(self, keys: Iterable[Hashable]):
+        for key in keys:
+            if key in self._entries:
+                self._discard(key)
+
+    def clear(self):
+        self._entries.clear()
+
+    def _discard(self, key: Hashable):
+        _, value = self._entries.pop(key)
+        self._removed(key, value)
+
+    def _removed(self, key: Hashable, value):
+        """Called with every entry leaving the cache"""
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,327 @@
+# Outbound mail dispatch
+#   Route handlers enqueue messages and return immediately; background workers
+#   keep a persistent SMTP connection open and push queued messages over it in
+#   batches. Failed sends are retried with exponential backoff and end up in a
+#   dead-letter list once MAIL_MAX_RETRIES is exceeded.
+#
+#   Backends:
+#     - "smtp"  : real delivery via aiosmtplib (settings taken from fastapi-mail's ConnectionConfig)
+#     - "debug" : messages are logged and kept in memory (`DebugTransport.outbox`)
+#   A local `DebugSMTPServer` is provided to exercise the smtp backend without a mail provider.
+#
+#   fastapi-mail (and its jinja2/dns dependencies) and aiosmtplib are only imported when the
+#   first message is queued, they account for a large share of the API's import time.
+from __future__ import annotations
+import asyncio
+import logging
+import functools
+from collections import deque
+from contextvars import Context
+from dataclasses import dataclass, field
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import TYPE_CHECKING, Callable
+from .metrics import span
+from .settings import settings
+
+if TYPE_CHECKING:
+    import aiosmtplib
+    from fastapi_mail import ConnectionConfig
+
+######################################################################
+
+logger = logging.getLogger(__name__)
+MAIL_DEAD_LETTERS = 1000 # most recent permanently failed messages kept for inspection
+
+@functools.cache
+def get_mail_config() -> ConnectionConfig:
+    """Murof's outgoing mail settings (SMTP credentials from MAIL_USERNAME/MAIL_PASSWORD)"""
+    from fastapi_mail import ConnectionConfig
+    return ConnectionConfig(
+        MAIL_USERNAME = settings.mail_username,
+        MAIL_PASSWORD = settings.mail_password,
+        MAIL_FROM = "no-reply@murof.net",
+        MAIL_PORT = 587,
+        MAIL_SERVER = "smtp.gmail.com",
+        MAIL_FROM_NAME = "Murof",
+        MAIL_STARTTLS = True,
+        MAIL_SSL_TLS = False,
+        USE_CREDENTIALS = True,
+        VALIDATE_CERTS = True
+    )
+
+######################################################################
+
+@dataclass
+class OutgoingMail:
+    recipients: list[str]
+    subject: str
+    body: str
+    attempts: int = 0
+    errors: list[str] = field(default_factory=list)
+
+
+def build_message(mail: OutgoingMail, conf: ConnectionConfig) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = formataddr((conf.MAIL_FROM_NAME or "", conf.MAIL_FROM))
+    message["To"] = ", ".join(mail.recipients)
+    message["Subject"] = mail.subject
+    message.set_content(mail.body)
+    return message
+
+######################################################################
+# TRANSPORTS
+
+class SMTPTransport:
+    """Single persistent SMTP connection, (re)opened on demand"""
+    def __init__(self, conf: ConnectionConfig):
+        self.conf = conf
+        self._client: aiosmtplib.SMTP | None = None
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        import aiosmtplib
+        if self._client is not None and self._client.is_connected:
+            return self._client
+        client = aiosmtplib.SMTP(
+            hostname=self.conf.MAIL_SERVER,
+            port=self.conf.MAIL_PORT,
+            timeout=self.conf.TIMEOUT,
+            use_tls=self.conf.MAIL_SSL_TLS,
+            start_tls=self.conf.MAIL_STARTTLS,
+            validate_certs=self.conf.VALIDATE_CERTS,
+        )
+        await client.connect()
+        if self.conf.USE_CREDENTIALS:
+            await client.login(self.conf.MAIL_USERNAME, self.conf.MAIL_PASSWORD.get_secret_value())
+        self._client = client
+        return client
+
+    async def send(self, mail: OutgoingMail):
+        import aiosmtplib
+        client = await self._connect()
+        try:
+            await client.send_message(build_message(mail, self.conf))
+        except (aiosmtplib.SMTPServerDisconnected, aiosmtplib.SMTPConnectError, OSError):
+            await self.close() # force a reconnect for the next message
+            raise
+
+    async def close(self):
+        import aiosmtplib
+        client, self._client = self._client, None
+        if client is not None and client.is_connected:
+            try:
+                await client.quit()
+            except aiosmtplib.SMTPException:
+                client.close()
+
+
+class DebugTransport:
+    """Logs messages instead of delivering them, keeps them in `outbox`"""
+    def __init__(self, conf: ConnectionConfig):
+        self.conf = conf
+        self.outbox: list[EmailMessage] = []
+
+    async def send(self, mail: OutgoingMail):
+        message = build_message(mail, self.conf)
+        self.outbox.append(message)
+        logger.info("Mail to %s: %s", message["To"], message["Subject"])
+
+    async def close(self):
+        pass
+
+######################################################################
+# QUEUE
+
+class MailQueue:
+    """
+    In-process mail queue.
+        - `enqueue` never blocks on the mail server
+        - each worker owns one transport (connection) and sends up to `batch_size` messages per wake-up
+        - failures are retried after MAIL_RETRY_BACKOFF * 2**(attempt-1) seconds
+        - `conf` may be a factory, it is then only called when the workers start
+    """
+    def __init__(
+            self,
+            conf: ConnectionConfig | Callable[[], ConnectionConfig] = get_mail_config,
+            backend: str = settings.mail_backend,
+            workers: int = settings.mail_workers,
+            batch_size: int = settings.mail_batch_size,
+            maxsize: int = settings.mail_queue_size,
+            max_retries: int = settings.mail_max_retries,
+            retry_backoff: float = settings.mail_retry_backoff,
+            idle_timeout: float = settings.mail_idle_timeout
+            ):
+        if backend not in ("smtp", "debug"):
+            raise ValueError(f"Unknown MAIL_BACKEND '{backend}', expected 'smtp' or 'debug'")
+        self._conf = conf
+        self.backend = backend
+        self.workers = workers
+        self.batch_size = batch_size
+        self.maxsize = maxsize
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.idle_timeout = idle_timeout
+        self.transports = []
+        self.dead_letters: deque[OutgoingMail] = deque(maxlen=MAIL_DEAD_LETTERS)
+        self.sent = 0
+        self._queue: asyncio.Queue | None = None
+        self._tasks: list[asyncio.Task] = []
+        self._retries: dict[asyncio.Task, OutgoingMail] = {} # backoff task -> mail it re-queues
+
+    @property
+    def conf(self) -> ConnectionConfig:
+        if callable(self._conf):
+            self._conf = self._conf()
+        return self._conf
+
+    def _make_transport(self):
+        if self.backend == "debug":
+            return DebugTransport(self.conf)
+        return SMTPTransport(self.conf)
+
+    def start(self):
+        """Spawn worker tasks (called lazily on first enqueue)"""
+        if self._tasks:
+            return
+        if self.conf.SUPPRESS_SEND:
+            self.backend = "debug"
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self.transports = [self._make_transport() for _ in range(self.workers)]
+        # fresh context: a lazy start inside a request must not tie the workers to that request's spans
+        self._tasks = [asyncio.create_task(self._worker(transport), context=Context()) for transport in self.transports]
+
+    async def stop(self, timeout: float = 10.0):
+        """Try to flush queued messages, then stop workers and close connections"""
+        if not self._tasks:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        retries, self._retries = self._retries, {}
+        for task in [*self._tasks, *retries]:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *retries, return_exceptions=True)
+        for transport in self.transports:
+            await transport.close()
+        self._tasks = []
+        # whatever is still queued or waiting for a retry won't be sent: keep it for inspection
+        unsent = [mail for task, mail in retries.items() if task.cancelled()]
+        while not self._queue.empty():
+            unsent.append(self._queue.get_nowait())
+        for mail in unsent:
+            mail.errors.append("shutdown")
+            self.dead_letters.append(mail)
+        if unsent:
+            logger.warning("Mail queue stopped with %d unsent message(s) (%d awaiting a retry), dead-lettered",
+                len(unsent), sum(task.cancelled() for task in retries))
+
+    def enqueue(self, mail: OutgoingMail):
+        self.start()
+        try:
+            self._queue.put_nowait(mail)
+        except asyncio.QueueFull:
+            logger.error("Mail queue full, dead-lettering message to %s", mail.recipients)
+            mail.errors.append("queue full")
+            self.dead_letters.append(mail)
+
+    def qsize(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self, transport):
+        while True:
+            try:
+                first = await asyncio.wait_for(self._queue.get(), self.idle_timeout)
+            except asyncio.TimeoutError:
+                await transport.close() # don't hold an idle connection open
+                continue
+            batch = [first]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            for mail in batch:
+                try:
+                    with span("mail_send"):
+                        await transport.send(mail)
+                    self.sent += 1
+                except Exception as error:
+                    self._retry(mail, error)
+                finally:
+                    self._queue.task_done()
+
+    def _retry(self, mail: OutgoingMail, error: Exception):
+        mail.attempts += 1
+        mail.errors.append(repr(error))
+        if mail.attempts > self.max_retries:
+            logger.error("Giving up on mail to %s after %d attempts: %r", mail.recipients, mail.attempts, error)
+            self.dead_letters.append(mail)
+            return
+        delay = self.retry_backoff * 2 ** (mail.attempts - 1)
+        logger.warning("Mail to %s failed (%r), retrying in %.1fs", mail.recipients, error, delay)
+        task = asyncio.create_task(self._requeue_later(mail, delay))
+        self._retries[task] = mail
+        task.add_done_callback(lambda task: self._retries.pop(task, None))
+
+    async def _requeue_later(self, mail: OutgoingMail, delay: float):
+        await asyncio.sleep(delay)
+        self.enqueue(mail)
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "queued": self.qsize(),
+            "retrying": len(self._retries),
+            "sent": self.sent,
+            "dead_letters": len(self.dead_letters),
+        }
+
+######################################################################
+# LOCAL DEBUGGING SMTP SERVER
+
+class DebugSMTPServer:
+    """
+    Minimal SMTP server accepting every message (no TLS/auth), for local testing:
+        server = DebugSMTPServer(port=1025); await server.start()
+        ... MAIL_SERVER=localhost MAIL_PORT=1025 MAIL_STARTTLS=False USE_CREDENTIALS=False ...
+        server.messages -> list of raw message bytes
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 1025):
+        self.host = host
+        self.port = port
+        self.messages: list[bytes] = []
+        self.connections = 0
+        self._server: asyncio.base_events.Server | None = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1] # resolve port=0
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        writer.write(b"220 localhost debug SMTP\r\n")
+        try:
+            while line := await reader.readline():
+                command = line.decode(errors="replace").strip().upper()
+                if command.startswith(("EHLO", "HELO")):
+                    writer.write(b"250 localhost\r\n")
+                elif command == "DATA":
+                    writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                    await writer.drain()
+                    lines = []
+                    while (data := await reader.readline()) not in (b".\r\n", b""):
+                        lines.append(data[1:] if data.startswith(b"..") else data)
+                    self.messages.append(b"".join(lines))
+                    writer.write(b"250 OK\r\n")
+                elif command == "QUIT":
+                    writer.write(b"221 Bye\r\n")
+                    await writer.drain()
+                    break
+                else: # MAIL FROM, RCPT TO, RSET, NOOP
+                    writer.write(b"250 OK\r\n")
+                await writer.drain()
+        finally:
+            writer.close()
@@ -0,0 +1,181 @@
+# Request-level performance instrumentation
+#   - latency histograms per route (TimingMiddleware) and per span (`span(...)`)
+#     around bcrypt, Cypher queries, JWT encode/decode and mail sends
+#   - an event-loop lag gauge sampled by a background task
+#   - gauges read at scrape time from the worker pools/queues/caches (`gauge(...)`)
+#   - `render()` exposes everything in the Prometheus text format (served on /metrics)
+#   - optional slow-request log with the span breakdown (SLOW_REQUEST_MS)
+import time
+import asyncio
+import logging
+import functools
+from contextlib import contextmanager
+from contextvars import ContextVar
+from .settings import settings
+
+######################################################################
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_request_spans: ContextVar[list | None] = ContextVar("request_spans", default=None)
+
+######################################################################
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _format_labels(names: tuple, values: tuple, extra: tuple = ()) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in (*zip(names, values), *extra)]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    def __init__(self, name: str, documentation: str, labelnames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        self._series: dict[tuple, list] = {} # label values -> [bucket counts..., sum, count]
+
+    def observe(self, value: float, *labelvalues):
+        series = self._series.get(labelvalues)
+        if series is None:
+            series = self._series[labelvalues] = [0] * len(self.buckets) + [0.0, 0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labelvalues, series in sorted(self._series.items(), key=lambda item: tuple(map(str, item[0]))):
+            labels = _format_labels(self.labelnames, labelvalues)
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, (('le', bound),))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labelvalues, (('le', '+Inf'),))} {series[-1]}")
+            lines.append(f"{self.name}_sum{labels} {series[-2]}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    """Either set explicitly or computed by `fn` at scrape time"""
+    def __init__(self, name: str, documentation: str, fn=None):
+        self.name = name
+        self.documentation = documentation
+        self.fn = fn
+        self.value = 0.0
+
+    def set(self, value: float):
+        self.value = value
+
+    def render(self) -> list[str]:
+        value = self.fn() if self.fn is not None else self.value
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge", f"{self.name} {float(value)}"]
+
+
+REGISTRY: dict[str, Histogram | Gauge] = {}
+
+def _register(metric):
+    REGISTRY[metric.name] = metric
+    return metric
+
+def gauge(name: str, documentation: str, fn=None) -> Gauge:
+    return _register(Gauge(name, documentation, fn))
+
+def render() -> str:
+    lines = []
+    for metric in REGISTRY.values():
+        try:
+            lines.extend(metric.render())
+        except Exception as error: # a broken collector shouldn't break the endpoint
+            logger.warning("Could not render metric %s: %r", metric.name, error)
+    return "\n".join(lines) + "\n"
+
+request_latency = _register(Histogram("murof_request_duration_seconds", "HTTP request latency per route", ("method", "route", "status")))
+span_latency = _register(Histogram("murof_span_duration_seconds", "Latency of instrumented operations", ("span",)))
+loop_lag = gauge("murof_event_loop_lag_seconds", "Most recent event-loop wake-up delay")
+
+######################################################################
+# SPANS
+
+@contextmanager
+def span(name: str):
+    """Time a block, recorded in the span histogram and in the current request's breakdown"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        span_latency.observe(elapsed, name)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((name, elapsed))
+
+def traced(name: str):
+    """Decorator version of `span` for sync & async functions"""
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def instrument_neomodel():
+    """Wrap `adb.cypher_query` (used by neomodel & the query registry) in a "neo4j" span"""
+    from neomodel import adb
+    if not getattr(adb.cypher_query, "__traced__", False):
+        adb.cypher_query = traced("neo4j")(adb.cypher_query)
+        adb.cypher_query.__traced__ = True
+
+######################################################################
+# MIDDLEWARE & EVENT LOOP LAG
+
+class TimingMiddleware:
+    """Pure ASGI middleware recording latency per route template (not per raw path)"""
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        spans = []
+        token = _request_spans.set(spans)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_spans.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            request_latency.observe(elapsed, scope["method"], route_path, status)
+            if settings.slow_request_ms and elapsed * 1e3 >= settings.slow_request_ms:
+                breakdown = ", ".join(f"{name}={duration * 1e3:.1f}ms" for name, duration in spans) or "no spans"
+                logger.warning("Slow request %s %s -> %s in %.1fms: %s", scope["method"], route_path, status, elapsed * 1e3, breakdown)
+
+
+async def monitor_loop_lag(interval: float = settings.loop_lag_interval):
+    """Background task: how late does a sleep of `interval` wake up"""
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        loop_lag.set(max(time.perf_counter() - start - interval, 0.0))
@@ -0,0 +1,118 @@
+# Named, parameterized Cypher statements for hot lookups
+#   Query texts are constants so Neo4j can reuse its cached plan for every call
+#   (values only ever travel as parameters, never through string formatting),
+#   and they run straight through `adb.cypher_query` to skip neomodel's per-call
+#   query construction in `User.nodes.get_or_none(...)`.
+#   The user lookups shared by every router live here; each router keeps its own statements in
+#   its package's `cypher.py`, which adds them to QUERIES with `register` when it's imported,
+#   so names stay global (`run(name)`) while the Cypher sits next to the services running it.
+from enum import Enum
+from typing import NamedTuple, AsyncIterator
+from neomodel import adb
+from neomodel.exceptions import UniqueProperty
+from ..models.social import User
+from .settings import settings
+
+######################################################################
+
+QUERIES = {
+    "user_by_username": "MATCH (u:User {username: $username}) RETURN u LIMIT 1",
+    "user_by_email": "MATCH (u:User {email: $email}) RETURN u LIMIT 1",
+    "user_by_uid": "MATCH (u:User {uid: $uid}) RETURN u LIMIT 1",
+    # registration rejects taken usernames before paying for a password hash
+    "username_exists": "RETURN EXISTS { MATCH (:User {username: $username}) } AS exists",
+    # uniqueness checks & creation in one statement (unique constraints still guard concurrent inserts)
+    "create_user_if_unique": """
+        OPTIONAL MATCH (by_username:User {username: $props.username})
+        OPTIONAL MATCH (by_email:User {email: $props.email})
+        WITH by_username, by_email LIMIT 1
+        FOREACH (_ IN CASE WHEN by_username IS NULL AND by_email IS NULL THEN [1] ELSE [] END |
+            CREATE (u:User) SET u = $props
+        )
+        RETURN CASE
+            WHEN by_username IS NOT NULL THEN 'username_taken'
+            WHEN by_email IS NOT NULL THEN 'email_taken'
+            ELSE 'created'
+        END AS status, by_email.username AS existing_username
+        """,
+}
+
+# Indexes for the statements above, created at startup (see `db.install_schema`)
+SCHEMA: list[str] = []
+
+def register(statements: dict[str, str], schema: list[str] = ()):
+    """Add a router's named statements (kept next to its services, in `cypher.py`) & indexes"""
+    for name in statements:
+        if name in QUERIES:
+            raise ValueError(f"Query '{name}' is registered twice")
+    QUERIES.update(statements)
+    SCHEMA.extend(schema)
+
+def epoch(value) -> float | None:
+    """Unix timestamp of a stored date: neomodel writes floats, the seed scripts Cypher datetime()"""
+    if value is None or isinstance(value, (int, float)):
+        return value
+    return value.to_native().timestamp()
+
+async def run(name: str, **params):
+    """Run the registered query `name` with `params`, returns result rows"""
+    results, _ = await adb.cypher_query(QUERIES[name], params)
+    return results
+
+async def stream(name: str, **params) -> AsyncIterator[dict]:
+    """
+    Run the registered query `name` and yield records as dicts while the result is still
+    being received (the driver fetches in batches), instead of materializing every row
+    """
+    async with adb.driver.session(database=settings.neo4j_database) as session:
+        result = await session.run(QUERIES[name], params)
+        async for record in result:
+            yield record.data()
+
+######################################################################
+
+async def _single_user(name: str, **params) -> User | None:
+    results = await run(name, **params)
+    return User.inflate(results[0][0]) if results else None
+
+async def get_user_by_username(username: str) -> User | None:
+    return await _single_user("user_by_username", username=username)
+
+async def get_user_by_email(email: str) -> User | None:
+    return await _single_user("user_by_email", email=email)
+
+async def get_user_by_uid(uid: str) -> User | None:
+    return await _single_user("user_by_uid", uid=uid)
+
+async def get_user_by_identifier(identifier: str) -> User | None:
+    """Look up a user by email if `identifier` contains an @, else by username"""
+    if "@" in identifier:
+        return await get_user_by_email(identifier)
+    return await get_user_by_username(identifier)
+
+async def username_exists(username: str) -> bool:
+    return (await run("username_exists", username=username))[0][0]
+
+######################################################################
+
+class RegistrationStatus(str, Enum):
+    CREATED = "created"
+    USERNAME_TAKEN = "username_taken"
+    EMAIL_TAKEN = "email_taken"
+
+class RegistrationResult(NamedTuple):
+    status: RegistrationStatus
+    existing_username: str | None = None # owner of the email when EMAIL_TAKEN
+
+async def create_user_if_unique(user: User) -> RegistrationResult:
+    """Create `user` unless its username or email is taken, in a single round-trip"""
+    props = User.deflate(user.__properties__, user) # validates & fills in defaults (uid, created_at, ...)
+    try:
+        results = await run("create_user_if_unique", props=props)
+    except UniqueProperty as error: # lost a race against a concurrent registration
+        if "`username`" in str(error):
+            return RegistrationResult(RegistrationStatus.USERNAME_TAKEN)
+        existing = await get_user_by_email(user.email)
+        return RegistrationResult(RegistrationStatus.EMAIL_TAKEN, existing.username if existing else None)
+    status, existing_username = results[0]
+    return RegistrationResult(RegistrationStatus(status), existing_username)
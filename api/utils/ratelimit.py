@@ -0,0 +1,197 @@
+# Rate limiting with sliding-window counters
+#   Each key keeps two fixed-window counters (current & previous window); the
+#   sliding-window estimate is  previous * (1 - elapsed fraction) + current,
+#   which needs O(1) memory per key. Storage is pluggable (`RateLimitStorage`),
+#   `MemoryStorage` keeps a bounded LRU of keys and drops idle ones first,
+#   `SharedStorage` keeps the counters in the shared-state backend so that limits
+#   hold across workers.
+#
+#   `RateLimitMiddleware` enforces per-IP limits on path prefixes before a
+#   request body is read or any route code runs, so rejected requests are cheap.
+import time
+import json
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from fastapi import HTTPException, status
+
+######################################################################
+
+def parse_rate(value: str) -> tuple[int, float]:
+    """"10/60" -> (10 hits, per 60 seconds)"""
+    limit, window = value.split("/")
+    return int(limit), float(window)
+
+
+class RateLimitStorage(ABC):
+    """Storage interface, implementations must make `hit` atomic per key"""
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window: float, now: float | None = None) -> float:
+        """Count one hit unless over the limit. Returns 0 if allowed, else seconds until retry"""
+
+    @abstractmethod
+    async def peek(self, key: str, limit: int, window: float, now: float | None = None) -> float:
+        """Same as `hit` without counting"""
+
+    @abstractmethod
+    async def reset(self, key: str, window: float | None = None): ...
+
+
+class MemoryStorage(RateLimitStorage):
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._counters: OrderedDict[str, list] = OrderedDict() # key -> [window index, current, previous, idle after]
+
+    def _check(self, key: str, limit: int, window: float, now: float | None, count: bool) -> float:
+        now = time.time() if now is None else now
+        index, elapsed = divmod(now, window)
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = [index, 0, 0, 0.0]
+        elif counter[0] != index: # roll windows forward
+            counter[2] = counter[1] if counter[0] == index - 1 else 0
+            counter[1] = 0
+            counter[0] = index
+        estimate = counter[2] * (1 - elapsed / window) + counter[1]
+        if estimate >= limit: # time until the estimate drops back under the limit
+            if counter[1] >= limit:
+                return window - elapsed
+            return max(window * (1 - (limit - counter[1]) / counter[2]) - elapsed, 0.001)
+        if count:
+            counter[1] += 1
+            counter[3] = (index + 2) * window # both windows empty from then on
+            self._counters[key] = counter
+            self._counters.move_to_end(key)
+            self._evict(now)
+        return 0.0
+
+    def _evict(self, now: float):
+        # least recently hit first: drop idle keys (nothing left in either window), then enforce the cap
+        while self._counters:
+            oldest_key, oldest = next(iter(self._counters.items()))
+            if oldest[3] <= now or len(self._counters) > self.max_keys:
+                del self._counters[oldest_key]
+            else:
+                break
+
+    def __len__(self):
+        return len(self._counters)
+
+    async def hit(self, key, limit, window, now=None):
+        return self._check(key, limit, window, now, count=True)
+
+    async def peek(self, key, limit, window, now=None):
+        return self._check(key, limit, window, now, count=False)
+
+    async def reset(self, key, window=None):
+        self._counters.pop(key, None)
+
+class SharedStorage(RateLimitStorage):
+    """
+    Counters as `<key>:<window index>` keys in a `SharedState` backend, expiring after two
+    windows. A hit is counted first and taken back if it went over the limit, so concurrent
+    workers never let more than `limit` through.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def _check(self, key: str, limit: int, window: float, now: float | None, count: bool) -> float:
+        now = time.time() if now is None else now
+        index, elapsed = divmod(now, window)
+        current_key, previous_key = f"rl:{key}:{int(index)}", f"rl:{key}:{int(index) - 1}"
+        previous, current = await self.backend.mget(previous_key, current_key)
+        previous, current = int(previous or 0), int(current or 0)
+        if count:
+            current = await self.backend.incr(current_key, 1, ttl=2 * window) - 1 # hits before this one
+        estimate = previous * (1 - elapsed / window) + current
+        if estimate >= limit:
+            if count:
+                await self.backend.incr(current_key, -1, ttl=2 * window)
+            if current >= limit:
+                return window - elapsed
+            return max(window * (1 - (limit - current) / previous) - elapsed, 0.001)
+        return 0.0
+
+    async def hit(self, key, limit, window, now=None):
+        return await self._check(key, limit, window, now, count=True)
+
+    async def peek(self, key, limit, window, now=None):
+        return await self._check(key, limit, window, now, count=False)
+
+    async def reset(self, key, window=None):
+        index = int(time.time() // window)
+        for i in (index, index - 1): # both windows that count towards the estimate
+            await self.backend.delete(f"rl:{key}:{i}")
+
+######################################################################
+
+class SlidingWindowLimiter:
+    def __init__(self, name: str, rate: str, storage: RateLimitStorage):
+        self.name = name # namespaces keys so limiters can share a storage
+        self.limit, self.window = parse_rate(rate)
+        self.storage = storage
+        self.rejected = 0
+
+    async def hit(self, key: str) -> float:
+        retry_after = await self.storage.hit(f"{self.name}:{key}", self.limit, self.window)
+        if retry_after:
+            self.rejected += 1
+        return retry_after
+
+    async def peek(self, key: str) -> float:
+        return await self.storage.peek(f"{self.name}:{key}", self.limit, self.window)
+
+    async def reset(self, key: str):
+        await self.storage.reset(f"{self.name}:{key}", self.window)
+
+    async def check(self, key: str, detail: str = "Too many requests, please try again later."):
+        """Count a hit for `key`, raise 429 when over the limit (for use inside routes/dependencies)"""
+        retry_after = await self.hit(key)
+        if retry_after:
+            raise too_many_requests(retry_after, detail)
+
+
+def too_many_requests(retry_after: float, detail: str = "Too many requests, please try again later.") -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        detail=detail,
+        headers={"Retry-After": str(int(retry_after) + 1)}
+    )
+
+######################################################################
+
+class RateLimitMiddleware:
+    """
+    Pure ASGI middleware applying per-client-IP limits.
+        rules: list of (HTTP method, path prefix, limiter), first match wins
+    Client IPs come from the ASGI scope, run uvicorn with --proxy-headers behind a proxy.
+    """
+    def __init__(self, app, rules: list[tuple[str, str, SlidingWindowLimiter]]):
+        self.app = app
+        self.rules = rules
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            path, method = scope["path"], scope["method"]
+            for rule_method, prefix, limiter in self.rules:
+                if method == rule_method and path.startswith(prefix):
+                    client = scope.get("client")
+                    retry_after = await limiter.hit(client[0] if client else "unknown")
+                    if retry_after:
+                        await self._reject(send, retry_after)
+                        return
+                    break
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _reject(send, retry_after: float):
+        body = json.dumps({"detail": "Too many requests, please try again later."}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status.HTTP_429_TOO_MANY_REQUESTS,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(int(retry_after) + 1).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,179 @@
+# Minimal asyncio client for Redis-compatible servers (RESP2 protocol)
+#   Only what the shared-state backend needs, without adding a client library:
+#   commands are pipelined over one connection (written immediately, replies matched
+#   to callers in FIFO order by a reader task), and pub/sub runs on a dedicated
+#   connection. A dropped connection, an unreadable reply or a command getting no reply
+#   within `timeout` fails the commands in flight, and the connection is re-opened on
+#   the next command, so a stalled server can't hang the requests waiting on it.
+#   Each connection has its own reply queue & reader task (cancelled on reset), so a late
+#   reply on a dropped connection can never be handed to a command sent on the next one.
+import asyncio
+from collections import deque
+from urllib.parse import urlparse
+from .settings import settings
+
+######################################################################
+
+class RespError(Exception):
+    """Error reply from the server (or a lost connection)"""
+
+
+def encode_command(args) -> bytes:
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(out)
+
+async def read_reply(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by server")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        return RespError(rest.decode()) # returned, not raised, so the FIFO stays in sync
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2].decode()
+    if kind == b"*":
+        length = int(rest)
+        return None if length < 0 else [await read_reply(reader) for _ in range(length)]
+    raise RespError(f"Unexpected reply {line!r}")
+
+
+def parse_url(url: str) -> dict:
+    """redis://[:password@]host[:port][/db]"""
+    parsed = urlparse(url)
+    if parsed.scheme not in ("redis", "resp"):
+        raise ValueError(f"Unsupported shared state URL scheme '{parsed.scheme}'")
+    return {
+        "host": parsed.hostname or "localhost",
+        "port": parsed.port or 6379,
+        "password": parsed.password,
+        "db": int(parsed.path.lstrip("/") or 0),
+    }
+
+######################################################################
+
+class RespClient:
+    def __init__(self, url: str, timeout: float = settings.shared_state_timeout):
+        self.options = parse_url(url)
+        self.timeout = timeout
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._replies: deque[asyncio.Future] = deque()
+        self._reader_task: asyncio.Task | None = None
+        self._connecting = asyncio.Lock()
+
+    async def open_connection(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """A new, authenticated connection with the database selected (RespError after `timeout`)"""
+        try:
+            return await asyncio.wait_for(self._open_connection(), self.timeout)
+        except asyncio.TimeoutError:
+            raise RespError(f"Connecting to {self.options['host']}:{self.options['port']} timed out") from None
+
+    async def _open_connection(self) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection(self.options["host"], self.options["port"])
+        setup = []
+        if self.options["password"]:
+            setup.append(("AUTH", self.options["password"]))
+        if self.options["db"]:
+            setup.append(("SELECT", self.options["db"]))
+        for command in setup:
+            writer.write(encode_command(command))
+        await writer.drain()
+        for _ in setup:
+            reply = await read_reply(reader)
+            if isinstance(reply, RespError):
+                writer.close()
+                raise reply
+        return reader, writer
+
+    async def _connect(self):
+        async with self._connecting:
+            if self._writer is None:
+                self._reader, self._writer = await self.open_connection()
+                self._replies = deque()
+                self._reader_task = asyncio.create_task(self._read_loop(self._reader, self._replies))
+
+    async def _read_loop(self, reader: asyncio.StreamReader, replies: deque[asyncio.Future]):
+        try:
+            while True:
+                reply = await read_reply(reader)
+                future = replies.popleft()
+                if not future.done():
+                    future.set_result(reply)
+        except (ConnectionError, asyncio.IncompleteReadError, OSError) as error:
+            self._reset(RespError(f"Connection lost: {error}"), reader)
+        except Exception as error: # unparseable or unexpected reply: the FIFO can't be trusted anymore
+            self._reset(RespError(f"Protocol error: {error!r}"), reader)
+
+    def _reset(self, error: Exception, reader: asyncio.StreamReader | None = None):
+        """
+        Close the connection, stop its reader task & fail the commands in flight
+        (only if `reader` is still the current one)
+        """
+        if reader is not None and reader is not self._reader:
+            return
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None and self._reader_task is not asyncio.current_task():
+            self._reader_task.cancel()
+        self._reader = self._writer = self._reader_task = None
+        replies, self._replies = self._replies, deque()
+        while replies:
+            future = replies.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    async def pipeline(self, *commands) -> list:
+        """Send several commands at once, returns their replies (error replies as RespError)"""
+        if self._writer is None:
+            await self._connect()
+        writer, replies = self._writer, self._replies
+        if writer is None:
+            raise RespError("Connection lost")
+        loop = asyncio.get_running_loop()
+        futures = [loop.create_future() for _ in commands]
+        replies.extend(futures)
+        writer.write(b"".join(encode_command(command) for command in commands))
+        try:
+            await asyncio.wait_for(writer.drain(), self.timeout)
+            return list(await asyncio.wait_for(asyncio.gather(*futures), self.timeout))
+        except asyncio.TimeoutError:
+            if writer is self._writer:
+                self._reset(RespError("Timed out waiting for a reply"))
+            raise RespError("Timed out waiting for a reply") from None
+
+    async def execute(self, *args):
+        reply = (await self.pipeline(args))[0]
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    async def subscribe(self, *channels: str):
+        """Yield (channel, message) pairs published to `channels`, on a connection of its own"""
+        reader, writer = await self.open_connection()
+        try:
+            writer.write(encode_command(("SUBSCRIBE", *channels)))
+            await writer.drain()
+            while True:
+                reply = await read_reply(reader)
+                if isinstance(reply, list) and reply and reply[0] == "message":
+                    yield reply[1], reply[2]
+        finally:
+            writer.close()
+
+    async def close(self):
+        task = self._reader_task
+        self._reset(RespError("Client closed"))
+        if task is not None:
+            await asyncio.gather(task, return_exceptions=True)
@@ -0,0 +1,135 @@
+# Application settings
+#   All configuration is read once, from the environment and the .env file, into a
+#   single typed and immutable `Settings` object. Modules use `settings.<name>` instead
+#   of calling load_dotenv() / os.environ themselves.
+#   Each field maps to the upper-cased environment variable (neo4j_uri -> NEO4J_URI);
+#   empty or unset variables fall back to the field default.
+import os
+from dataclasses import dataclass, field, fields
+from dotenv import load_dotenv
+
+######################################################################
+
+@dataclass(frozen=True)
+class Settings:
+    # Neo4j
+    neo4j_uri: str | None = None
+    neo4j_username: str | None = None
+    neo4j_password: str | None = None
+    neo4j_database: str = "neo4j"
+    neo4j_max_pool_size: int = 100
+    neo4j_acquisition_timeout: float = 60 # seconds
+    neo4j_max_connection_lifetime: float = 3600 # seconds
+    neo4j_warmup_connections: int = 4
+
+    # JWT
+    secret_key: str | None = None
+    algorithm: str = "HS256" # HS256, ES256 or EdDSA
+    jwt_private_key: str | None = None # PEM or path, ES256/EdDSA only
+    jwt_public_key: str | None = None
+    access_token_expire_minutes: int = 30
+    refresh_token_expire_days: int = 7
+
+    # mail
+    mail_username: str | None = None
+    mail_password: str | None = None
+    mail_backend: str = "smtp" # "smtp" or "debug"
+    mail_workers: int = 1
+    mail_batch_size: int = 20
+    mail_queue_size: int = 1000
+    mail_max_retries: int = 5
+    mail_retry_backoff: float = 2.0 # seconds, doubled per attempt
+    mail_idle_timeout: float = 30.0 # close SMTP connection after idling this long
+
+    # password hashing
+    hash_executor: str = "thread" # "thread" or "process"
+    hash_workers: int = field(default_factory=lambda: min(4, os.cpu_count() or 1))
+    hash_queue_size: int = 64
+    password_blocklist: str | None = None # breached/common password file, built with `python -m data.blocklist`
+
+    # token -> user cache
+    user_cache_size: int = 1024
+    user_cache_ttl: int = 60 # seconds
+
+    # last_login write-behind buffer
+    last_login_flush_interval: float = 5.0
+    last_login_flush_size: int = 500
+
+    # rate limits ("<hits>/<seconds>")
+    rate_limit_login: str = "20/60"
+    rate_limit_register: str = "10/3600"
+    rate_limit_reset: str = "10/3600"
+    rate_limit_identifier: str = "3/3600" # registration & reset mails per address/user
+    login_lockout: str = "5/900" # failed logins per identifier
+    rate_limit_max_keys: int = 100_000
+
+    # chat
+    chat_send_queue_size: int = 256 # messages buffered per socket before it is dropped as a slow consumer
+    chat_flush_interval: float = 1.0 # seconds between batched Message writes
+    chat_flush_size: int = 500
+    rate_limit_chat: str = "10/10" # messages per socket ("<hits>/<seconds>")
+
+    # social
+    social_suggestions_k: int = 10 # "people you may know" kept per user
+    social_suggestions_interval: float = 3600 # seconds between full rebuilds of the suggestion table
+
+    # learning paths
+    learning_path_cache_size: int = 512 # classrooms
+    learning_path_cache_ttl: int = 600 # seconds, bounds staleness of edits made through other workers
+
+    # search
+    search_cache_size: int = 1024 # typeahead prefixes
+    search_cache_ttl: int = 30 # seconds, new users/groups show up in typeahead after at most this long
+
+    # learning analytics (xAPI-style statements appended to a local SQLite log)
+    analytics_db: str = "analytics.sqlite3"
+    analytics_batch_size: int = 500 # statements per request
+    analytics_fold_interval: float = 300 # seconds between folds of the rollups into VISITED edges
+    analytics_fold_size: int = 1000 # rollups per UNWIND transaction
+
+    # shared state across workers (unset = in-process, single worker only)
+    shared_state_url: str | None = None # redis://[:password@]host[:port][/db]
+    shared_state_channel: str = "murof:invalidations"
+    shared_state_timeout: float = 2.0 # seconds to connect or get a reply before a command fails
+
+    # account administration (bulk imports/deletes run as background jobs)
+    admin_import_max_rows: int = 10_000
+    admin_chunk_size: int = 500 # users per UNWIND transaction
+    admin_job_ttl: int = 86400 # seconds job progress stays readable after the last update
+    prune_unverified_after_days: float = 30 # unverified accounts older than this are deleted
+    prune_interval: float = 0 # seconds between scheduled prunes (opt-in, they delete accounts), 0 = off
+
+    # HTTP caching (ETags on read endpoints are always on)
+    response_cache_ttl: int = 0 # seconds response bodies are also kept in the shared state, 0 = off
+
+    # instrumentation
+    slow_request_ms: float = 0 # 0 disables the slow-request log
+    loop_lag_interval: float = 0.5 # seconds
+    startup_profile: bool = False
+
+    @classmethod
+    def from_env(cls, environ=os.environ) -> "Settings":
+        values = {}
+        for f in fields(cls):
+            value = environ.get(f.name.upper())
+            if value:
+                values[f.name] = _parse(f.type, value)
+        return cls(**values)
+
+    def require(self, *names: str):
+        """Raise if any of the given settings is empty"""
+        missing = [name.upper() for name in names if not getattr(self, name)]
+        if missing:
+            raise ValueError(f"One or more .env variables are not set: {', '.join(missing)}")
+
+
+def _parse(type_, value: str):
+    # `str | None` -> str
+    type_ = next((t for t in getattr(type_, "__args__", (type_,)) if t is not type(None)), str)
+    if type_ is bool:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return type_(value)
+
+
+load_dotenv() # the only place the .env file is read
+settings = Settings.from_env()
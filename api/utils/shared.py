@@ -0,0 +1,236 @@
+# Shared state for multi-worker deployments
+#   State that must agree across uvicorn workers (or nodes), such as revoked tokens, rate
+#   limit counters and cache invalidations, goes through a `SharedState` backend:
+#     - MemoryBackend : in-process dicts, correct for a single worker (the default)
+#     - RespBackend   : any Redis-compatible server, selected with SHARED_STATE_URL=redis://...
+#   Per-worker caches stay in-process; `InvalidationBus` keeps them coherent by broadcasting
+#   invalidations to every worker, each applying them to its own caches.
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, Callable
+from .resp import RespClient
+from .settings import settings
+
+######################################################################
+
+logger = logging.getLogger(__name__)
+
+
+class SharedState(ABC):
+    """Backend interface, a small subset of Redis semantics (TTLs in seconds)"""
+    @abstractmethod
+    async def get(self, key: str) -> str | None: ...
+
+    @abstractmethod
+    async def mget(self, *keys: str) -> list[str | None]: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: float | None = None, only_if_new: bool = False) -> bool:
+        """Store `value`, returns False if `only_if_new` and the key already exists"""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool: ...
+
+    @abstractmethod
+    async def delete(self, key: str): ...
+
+    @abstractmethod
+    async def incr(self, key: str, amount: int = 1, ttl: float | None = None) -> int:
+        """Add `amount` (atomically), (re)setting the key's TTL, returns the new value"""
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str): ...
+
+    @abstractmethod
+    def subscribe(self, channel: str) -> AsyncIterator[str]: ...
+
+    async def close(self):
+        pass
+
+
+class MemoryBackend(SharedState):
+    SWEEP_EVERY = 1000 # writes between sweeps of expired keys
+
+    def __init__(self):
+        self._data: dict[str, tuple[str, float | None]] = {} # key -> (value, expires_at)
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self._writes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def _get(self, key: str) -> str | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.time():
+            del self._data[key]
+            return None
+        return entry[0]
+
+    def _put(self, key: str, value: str, ttl: float | None):
+        self._data[key] = (value, time.time() + ttl if ttl is not None else None)
+        self._writes += 1
+        if self._writes % self.SWEEP_EVERY == 0:
+            now = time.time()
+            for expired in [k for k, (_, expires_at) in self._data.items() if expires_at is not None and expires_at <= now]:
+                del self._data[expired]
+
+    async def get(self, key):
+        return self._get(key)
+
+    async def mget(self, *keys):
+        return [self._get(key) for key in keys]
+
+    async def set(self, key, value, ttl=None, only_if_new=False):
+        if only_if_new and self._get(key) is not None:
+            return False
+        self._put(key, str(value), ttl)
+        return True
+
+    async def exists(self, key):
+        return self._get(key) is not None
+
+    async def delete(self, key):
+        self._data.pop(key, None)
+
+    async def incr(self, key, amount=1, ttl=None):
+        value = int(self._get(key) or 0) + amount
+        self._put(key, str(value), ttl)
+        return value
+
+    async def publish(self, channel, message):
+        for queue in self._subscribers.get(channel, ()):
+            queue.put_nowait(message)
+
+    async def subscribe(self, channel):
+        queue = asyncio.Queue()
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers[channel].discard(queue)
+
+
+class RespBackend(SharedState):
+    def __init__(self, url: str):
+        self.client = RespClient(url)
+
+    async def get(self, key):
+        return await self.client.execute("GET", key)
+
+    async def mget(self, *keys):
+        return await self.client.execute("MGET", *keys) if keys else []
+
+    async def set(self, key, value, ttl=None, only_if_new=False):
+        args = ["SET", key, value]
+        if ttl is not None:
+            args += ["PX", max(int(ttl * 1000), 1)]
+        if only_if_new:
+            args.append("NX")
+        return await self.client.execute(*args) is not None
+
+    async def exists(self, key):
+        return bool(await self.client.execute("EXISTS", key))
+
+    async def delete(self, key):
+        await self.client.execute("DEL", key)
+
+    async def incr(self, key, amount=1, ttl=None):
+        if ttl is None:
+            return await self.client.execute("INCRBY", key, amount)
+        value, _ = await self.client.pipeline(("INCRBY", key, amount), ("PEXPIRE", key, max(int(ttl * 1000), 1)))
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    async def publish(self, channel, message):
+        await self.client.execute("PUBLISH", channel, message)
+
+    async def subscribe(self, channel):
+        async for _, message in self.client.subscribe(channel):
+            yield message
+
+    async def close(self):
+        await self.client.close()
+
+
+def create_backend(url: str | None) -> SharedState:
+    return RespBackend(url) if url else MemoryBackend()
+
+######################################################################
+
+class InvalidationBus:
+    """
+    Broadcasts `publish(kind, *args)` to every worker, each calling the handlers registered
+    for `kind` with `args`. The publishing worker applies it immediately, others as soon as
+    the message arrives (with MemoryBackend there are no other workers, nothing is sent).
+    """
+    RECONNECT_DELAY = 1.0 # seconds
+
+    def __init__(self, backend: SharedState, channel: str = settings.shared_state_channel):
+        self.backend = backend
+        self.channel = channel
+        self.worker = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.handlers: dict[str, list[Callable]] = {}
+        self.published = 0
+        self.received = 0
+        self._listener: asyncio.Task | None = None
+
+    @property
+    def shared(self) -> bool:
+        return not isinstance(self.backend, MemoryBackend)
+
+    def register(self, kind: str, handler: Callable):
+        self.handlers.setdefault(kind, []).append(handler)
+
+    def apply(self, kind: str, args):
+        for handler in self.handlers.get(kind, ()):
+            try:
+                handler(*args)
+            except Exception:
+                logger.exception("Invalidation handler for '%s' failed", kind)
+
+    async def publish(self, kind: str, *args):
+        self.apply(kind, args)
+        if self.shared:
+            self.published += 1
+            message = json.dumps({"worker": self.worker, "kind": kind, "args": args}, separators=(",", ":"))
+            try:
+                await self.backend.publish(self.channel, message)
+            except Exception: # other workers catch up through their cache TTLs
+                logger.exception("Publishing invalidation '%s' failed", kind)
+
+    async def _listen(self):
+        while True:
+            try:
+                async for raw in self.backend.subscribe(self.channel):
+                    message = json.loads(raw)
+                    if message["worker"] != self.worker: # already applied locally
+                        self.received += 1
+                        self.apply(message["kind"], message["args"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Invalidation subscription lost, reconnecting")
+            await asyncio.sleep(self.RECONNECT_DELAY)
+
+    def start(self):
+        if self.shared and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+
+
+shared_state = create_backend(settings.shared_state_url)
+invalidations = InvalidationBus(shared_state)
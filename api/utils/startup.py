@@ -0,0 +1,118 @@
+# Startup profiling (STARTUP_PROFILE=1)
+#   Imported first thing in main.py. When enabled, every module imported afterwards
+#   is timed (self & cumulative time, like `python -X importtime`) and the lifespan
+#   steps wrapped in `step(...)` are timed too. A report is logged once the app is
+#   ready to serve, to see where cold-start time goes.
+import sys
+import time
+import logging
+from contextlib import contextmanager
+from importlib.abc import MetaPathFinder
+from .settings import settings
+
+######################################################################
+
+logger = logging.getLogger(__name__)
+REPORT_TOP = 25 # modules listed in the report
+
+
+class _TimedLoader:
+    """Wraps a module's loader for the duration of its `exec_module`"""
+    def __init__(self, loader, profiler: "StartupProfiler"):
+        self.loader = loader
+        self.profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        name = module.__name__
+        # hand the real loader back to the module, nothing else should see the wrapper
+        module.__loader__ = self.loader
+        if module.__spec__ is not None:
+            module.__spec__.loader = self.loader
+        with self.profiler.timing(name):
+            self.loader.exec_module(module)
+
+
+class StartupProfiler(MetaPathFinder):
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.imports: dict[str, list[float]] = {} # module -> [self, cumulative] seconds
+        self.steps: list[tuple[str, float]] = []
+        self.enabled = False
+        self._stack: list[list[float]] = [] # children time of the modules being imported
+
+    def install(self):
+        if not self.enabled:
+            sys.meta_path.insert(0, self)
+            self.enabled = True
+
+    def uninstall(self):
+        if self.enabled:
+            sys.meta_path.remove(self)
+            self.enabled = False
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    @contextmanager
+    def timing(self, name: str):
+        self._stack.append([0.0])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._stack.pop()[0]
+            self.imports[name] = [elapsed - children, elapsed]
+            if self._stack:
+                self._stack[-1][0] += elapsed
+
+    @contextmanager
+    def step(self, name: str):
+        """Time an initialization step (db connection, worker start, ...)"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((name, time.perf_counter() - start))
+
+    def report(self) -> str:
+        lines = [f"Startup profile: ready after {(time.perf_counter() - self.started) * 1e3:.1f} ms"]
+        packages: dict[str, float] = {}
+        for name, (own, _) in self.imports.items():
+            packages[name.split(".")[0]] = packages.get(name.split(".")[0], 0.0) + own
+        lines.append(f"  imports by package ({len(self.imports)} modules, {sum(packages.values()) * 1e3:.1f} ms):")
+        for package, own in sorted(packages.items(), key=lambda item: -item[1])[:REPORT_TOP]:
+            lines.append(f"    {own * 1e3:9.1f} ms  {package}")
+        lines.append("  slowest modules (self / cumulative):")
+        for name, (own, total) in sorted(self.imports.items(), key=lambda item: -item[1][0])[:REPORT_TOP]:
+            lines.append(f"    {own * 1e3:9.1f} ms {total * 1e3:9.1f} ms  {name}")
+        lines.append("  init steps:")
+        for name, elapsed in self.steps:
+            lines.append(f"    {elapsed * 1e3:9.1f} ms  {name}")
+        return "\n".join(lines)
+
+    def finish(self):
+        """Stop timing imports and log the report (no-op unless STARTUP_PROFILE is set)"""
+        if self.enabled:
+            self.uninstall()
+            logger.warning(self.report())
+
+
+profiler = StartupProfiler()
+step = profiler.step
+if settings.startup_profile:
+    profiler.install()
@@ -0,0 +1,140 @@
+"""
+Learning analytics benchmark
+    Appends --events random statements (users x modules x classrooms) to a fresh activity store
+    in batches of ANALYTICS_BATCH_SIZE, then compares dashboard reads served from the rollups
+    with the same numbers aggregated from the raw event log, and times folding every rollup
+    into VISITED (the graph write is replaced by a stub counting the rows it would send).
+    Reports ingestion throughput, read latencies and fold time as JSON.
+
+    python -m benchmarks.analytics [--events 200000] [--users 2000] [--modules 500] [--reads 500]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+
+# Settings needed to import the app modules, real values are never contacted
+for key, value in {
+    "NEO4J_URI": "neo4j://localhost:7687", "NEO4J_USERNAME": "neo4j", "NEO4J_PASSWORD": "benchmark",
+    "SECRET_KEY": "benchmark-secret-key", "MAIL_USERNAME": "benchmark", "MAIL_PASSWORD": "benchmark",
+}.items():
+    os.environ.setdefault(key, value)
+
+from api.utils import queries
+from api.utils.settings import settings
+from api.routes.analytics.store import ActivityStore
+from .auth_load import summarize
+
+VERBS = ["experienced"] * 8 + ["attempted", "completed"]
+
+# what the dashboards would cost without rollups
+RAW_MODULE = """
+    SELECT count(*) AS events, count(DISTINCT user) AS learners, coalesce(sum(duration), 0) AS duration, max(timestamp) AS last
+    FROM events WHERE module = ?
+"""
+RAW_CLASSROOM = """
+    SELECT user, count(*) AS events, count(DISTINCT module) AS modules, coalesce(sum(duration), 0) AS duration, max(timestamp) AS last
+    FROM events WHERE classroom = ? GROUP BY user
+"""
+
+######################################################################
+
+def statements(args, rng: random.Random) -> list[dict]:
+    now = time.time()
+    rows = []
+    for i in range(args.events):
+        verb = rng.choice(VERBS)
+        rows.append({
+            "statement_id": f"s{i}",
+            "user": f"u{rng.randrange(args.users)}",
+            "verb": verb,
+            "module": f"lm{rng.randrange(args.modules)}",
+            "classroom": f"c{rng.randrange(args.classrooms)}",
+            "timestamp": now - rng.random() * 86400 * 30,
+            "duration": rng.random() * 600,
+            "score": rng.random() if verb == "completed" else None,
+            "completed": int(verb == "completed"),
+        })
+    return rows
+
+
+async def timed_reads(n: int, fn) -> dict:
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        await fn()
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+async def main(args) -> dict:
+    rng = random.Random(args.seed)
+    rows = statements(args, rng)
+    folded = []
+    async def run(name, **params): # stands in for the VISITED UNWIND
+        folded.extend(params["rows"])
+        return []
+    queries.run = run
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = ActivityStore(os.path.join(directory, "analytics.sqlite3"), fold_size=settings.analytics_fold_size)
+        await store.open()
+        start = time.perf_counter()
+        for i in range(0, len(rows), settings.analytics_batch_size):
+            await store.append(rows[i:i + settings.analytics_batch_size])
+        ingest = time.perf_counter() - start
+
+        module = lambda: f"lm{rng.randrange(args.modules)}"
+        classroom = lambda: f"c{rng.randrange(args.classrooms)}"
+        reads = {
+            "module_rollup": await timed_reads(args.reads, lambda: store.module_stats(module())),
+            "module_raw": await timed_reads(args.reads, lambda: store.select(RAW_MODULE, module())),
+            "classroom_rollup": await timed_reads(args.reads, lambda: store.classroom_learners(classroom())),
+            "classroom_raw": await timed_reads(args.reads, lambda: store.select(RAW_CLASSROOM, classroom())),
+            "user_rollup": await timed_reads(args.reads, lambda: store.user_activity(f"u{rng.randrange(args.users)}", 50)),
+        }
+
+        start = time.perf_counter()
+        count = await store.fold()
+        fold = time.perf_counter() - start
+        size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+        await store.close()
+
+    result = {
+        "config": {"events": args.events, "users": args.users, "modules": args.modules, "classrooms": args.classrooms,
+                   "batch_size": settings.analytics_batch_size},
+        "ingest_events_per_s": args.events / ingest,
+        "read_latency_ms": reads,
+        "fold": {"rollups": count, "sent": len(folded), "seconds": fold},
+        "db_mb": size / 1e6,
+    }
+    print(f"ingested {result['ingest_events_per_s']:.0f} events/s; module stats p50 rollup {reads['module_rollup']['p50']:.2f} ms "
+          f"vs raw {reads['module_raw']['p50']:.2f} ms, classroom p50 rollup {reads['classroom_rollup']['p50']:.2f} ms vs raw "
+          f"{reads['classroom_raw']['p50']:.2f} ms; folded {count} rollups in {fold:.2f}s", file=sys.stderr)
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--modules", type=int, default=500)
+    parser.add_argument("--classrooms", type=int, default=50)
+    parser.add_argument("--reads", type=int, default=500, help="dashboard reads per kind")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,181 @@
+"""
+Auth API load test
+    Drives /auth/register, /auth/token, /auth/refresh/{refresh_token} and /auth/me
+    through the ASGI app (no network, no uvicorn) at a configurable concurrency,
+    with Neo4j replaced by `benchmarks.memgraph.InMemoryGraph` and outgoing mail by
+    the in-memory debug transport. Reports p50/p95/p99 latency, throughput and
+    event-loop lag per phase as JSON, to compare runs before/after a change.
+
+    python -m benchmarks.auth_load [--users 200] [--concurrency 20] [--me-requests 2000]
+                                   [--bcrypt-rounds 12] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+from collections import Counter
+
+# Settings needed to import the app, real values are never contacted
+for key, value in {
+    "NEO4J_URI": "neo4j://localhost:7687", "NEO4J_USERNAME": "neo4j", "NEO4J_PASSWORD": "benchmark",
+    "SECRET_KEY": "benchmark-secret-key", "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30", "REFRESH_TOKEN_EXPIRE_DAYS": "7",
+    "MAIL_USERNAME": "benchmark", "MAIL_PASSWORD": "benchmark", "MAIL_BACKEND": "debug",
+}.items():
+    os.environ.setdefault(key, value)
+
+import httpx
+from api.main import app
+from api.routes.auth import limits
+from api.routes.auth.hashing import get_pwd_context
+from api.routes.auth.services import mail_queue, last_login_buffer
+from .memgraph import InMemoryGraph
+
+PASSWORD = "Benchmark1!"
+
+######################################################################
+
+def percentile(values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, max(0, round(q / 100 * len(values)) - 1))]
+
+def summarize(latencies: list[float]) -> dict:
+    values = sorted(latencies)
+    return {
+        "p50": percentile(values, 50) * 1e3,
+        "p95": percentile(values, 95) * 1e3,
+        "p99": percentile(values, 99) * 1e3,
+        "max": (values[-1] if values else 0.0) * 1e3,
+        "mean": (sum(values) / len(values) if values else 0.0) * 1e3,
+    }
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up from a short sleep"""
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: list[float] = []
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(time.perf_counter() - start - self.interval, 0.0))
+
+    def start(self):
+        self.samples = []
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> dict:
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        return summarize(self.samples)
+
+
+async def run_phase(name: str, requests: list, concurrency: int, client: httpx.AsyncClient) -> tuple[dict, list]:
+    """Send `requests` (callables client -> awaitable response) with `concurrency` workers"""
+    latencies, statuses, responses = [], Counter(), [None] * len(requests)
+    pending = iter(enumerate(requests))
+    monitor = LoopLagMonitor()
+
+    async def worker():
+        for index, request in pending:
+            start = time.perf_counter()
+            response = await request(client)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] += 1
+            responses[index] = response
+
+    monitor.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    lag = await monitor.stop()
+    result = {
+        "requests": len(requests),
+        "status_codes": dict(statuses),
+        "duration_s": elapsed,
+        "throughput_rps": len(requests) / elapsed if elapsed else 0.0,
+        "latency_ms": summarize(latencies),
+        "event_loop_lag_ms": lag,
+    }
+    print(f"{name:<10} {result['throughput_rps']:>9.1f} req/s  p50 {result['latency_ms']['p50']:>8.2f} ms  "
+          f"p99 {result['latency_ms']['p99']:>8.2f} ms  loop lag p99 {lag['p99']:>7.2f} ms  {dict(statuses)}", file=sys.stderr)
+    return result, responses
+
+######################################################################
+
+async def main(args) -> dict:
+    graph = InMemoryGraph()
+    graph.install()
+    if args.bcrypt_rounds:
+        get_pwd_context().update(bcrypt__rounds=args.bcrypt_rounds)
+    for limiter in (value for value in vars(limits).values() if hasattr(value, "limit")):
+        limiter.limit = 10**9 # the load test comes from a single client
+    mail_queue.start()
+    last_login_buffer.start()
+
+    phases = {}
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        users = [f"bench{i}" for i in range(args.users)]
+        phases["register"], _ = await run_phase("register", [
+            lambda c, u=u: c.post("/auth/register", json={"username": u, "email": f"{u}@example.com", "password": PASSWORD})
+            for u in users], args.concurrency, client)
+        graph.verify_all()
+
+        phases["token"], responses = await run_phase("token", [
+            lambda c, u=u: c.post("/auth/token", data={"username": u, "password": PASSWORD})
+            for u in users], args.concurrency, client)
+        tokens = [r.json() for r in responses if r.status_code == 200]
+        if not tokens:
+            raise RuntimeError("No successful logins, cannot continue")
+
+        phases["refresh"], _ = await run_phase("refresh", [
+            lambda c, t=t: c.get(f"/auth/refresh/{t['refresh_token']}")
+            for t in tokens], args.concurrency, client)
+
+        phases["me"], _ = await run_phase("me", [
+            lambda c, t=tokens[i % len(tokens)]: c.get("/auth/me", headers={"Authorization": f"Bearer {t['access_token']}"})
+            for i in range(args.me_requests)], args.concurrency, client)
+
+    await last_login_buffer.stop()
+    await mail_queue.stop()
+    graph.uninstall()
+    return {
+        "config": {
+            "users": args.users,
+            "concurrency": args.concurrency,
+            "me_requests": args.me_requests,
+            "bcrypt_rounds": args.bcrypt_rounds or get_pwd_context().to_dict().get("bcrypt__rounds", "default"),
+            "python": platform.python_version(),
+        },
+        "phases": phases,
+        "db_calls": graph.calls,
+    }
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=200, help="accounts registered & logged in")
+    parser.add_argument("--concurrency", type=int, default=20, help="concurrent in-flight requests")
+    parser.add_argument("--me-requests", type=int, default=2000, help="number of /auth/me requests")
+    parser.add_argument("--bcrypt-rounds", type=int, default=None, help="override bcrypt cost (default: production setting)")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
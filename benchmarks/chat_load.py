@@ -0,0 +1,122 @@
+"""
+Chat WebSocket load test
+    Serves the app with uvicorn on a local port (Neo4j replaced by
+    `benchmarks.memgraph.InMemoryGraph`), opens `--connections` sockets spread over
+    `--rooms` chatrooms, has every socket post `--messages` messages and measures
+    how long each message takes to reach every subscriber of its room. Reports
+    connect time, delivery latency percentiles, fan-out throughput, dropped
+    slow consumers, batched writes and peak RSS as JSON.
+
+    python -m benchmarks.chat_load [--connections 2000] [--rooms 20] [--messages 5] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+
+# Settings needed to import the app, real values are never contacted
+for key, value in {
+    "NEO4J_URI": "neo4j://localhost:7687", "NEO4J_USERNAME": "neo4j", "NEO4J_PASSWORD": "benchmark",
+    "SECRET_KEY": "benchmark-secret-key", "MAIL_USERNAME": "benchmark", "MAIL_PASSWORD": "benchmark",
+}.items():
+    os.environ.setdefault(key, value)
+os.environ.setdefault("RATE_LIMIT_CHAT", "1000000/60") # measure fan-out, not the per-socket message limit
+
+import uvicorn
+import websockets
+from api.main import app
+from api.routes.auth.services import create_access_token
+from api.routes.chat.hub import hub
+from api.routes.chat.services import message_buffer
+from .memgraph import InMemoryGraph
+from .auth_load import summarize
+
+PORT = 8765
+
+######################################################################
+
+async def client(url: str, expected: int, messages: int, latencies: list, started: asyncio.Event):
+    """One socket: wait for the start signal, post `messages`, read until `expected` frames arrived"""
+    async with websockets.connect(url, max_queue=None, ping_interval=None) as socket:
+        await started.wait()
+        for i in range(messages):
+            await socket.send(json.dumps({"text": f"{time.perf_counter()}"}))
+        for _ in range(expected):
+            frame = json.loads(await socket.recv())
+            latencies.append(time.perf_counter() - float(frame["text"]))
+
+
+async def main(args) -> dict:
+    graph = InMemoryGraph()
+    graph.install()
+    rooms = [f"room{i}" for i in range(args.rooms)]
+    members = {room: [] for room in rooms}
+    for i in range(args.connections):
+        uid = f"chat{i}"
+        graph.add_user({"uid": uid, "username": uid, "email": f"{uid}@example.com", "hashed_password": "x" * 60, "is_verified": True})
+        members[rooms[i % args.rooms]].append(uid)
+    for room in rooms:
+        graph.add_chatroom(room, room, members[room])
+
+    server = uvicorn.Server(uvicorn.Config(app, port=PORT, lifespan="off", log_level="warning", ws_max_queue=1024))
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    latencies, started = [], asyncio.Event()
+    start = time.perf_counter()
+    tasks = []
+    for room in rooms:
+        for uid in members[room]:
+            url = f"ws://127.0.0.1:{PORT}/chat/ws/{room}?token={create_access_token({'sub': uid})}"
+            tasks.append(asyncio.create_task(client(url, len(members[room]) * args.messages, args.messages, latencies, started)))
+    while hub.connections() < args.connections:
+        await asyncio.sleep(0.05)
+    connect_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    started.set()
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+    await message_buffer.stop()
+
+    server.should_exit = True
+    await serving
+    graph.uninstall()
+    result = {
+        "config": {"connections": args.connections, "rooms": args.rooms, "messages": args.messages},
+        "connect_s": connect_time,
+        "deliveries": len(latencies),
+        "duration_s": elapsed,
+        "deliveries_per_s": len(latencies) / elapsed if elapsed else 0.0,
+        "delivery_latency_ms": summarize(latencies),
+        "dropped_slow_consumers": hub.dropped,
+        "messages_persisted": len(graph.messages),
+        "db_calls": graph.calls,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    print(f"{args.connections} sockets connected in {connect_time:.2f}s, {result['deliveries_per_s']:,.0f} deliveries/s, "
+          f"p99 {result['delivery_latency_ms']['p99']:.1f} ms", file=sys.stderr)
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--connections", type=int, default=2000, help="concurrent sockets")
+    parser.add_argument("--rooms", type=int, default=20, help="chatrooms the sockets are spread over")
+    parser.add_argument("--messages", type=int, default=5, help="messages posted per socket")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
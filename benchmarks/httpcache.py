@@ -0,0 +1,97 @@
+"""
+HTTP caching benchmark
+    Times GET /learning/modules/{uid} through the ASGI app (in-process, authentication
+    overridden) with the Neo4j read replaced by a stub that sleeps --query-ms:
+        - full: no If-None-Match, RESPONSE_CACHE_TTL off (query + serialization every time)
+        - not_modified: the client sends back the ETag it got, answered with 304
+        - shared_hit: no If-None-Match, body served from the shared response cache
+    Reports p50/p95/p99 latencies (ms) and how many queries each mode ran as JSON.
+
+    python -m benchmarks.httpcache [--requests 2000] [--query-ms 5] [--content-kb 20] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+from types import SimpleNamespace
+
+# Settings needed to import the app modules, real values are never contacted
+for key, value in {
+    "NEO4J_URI": "neo4j://localhost:7687", "NEO4J_USERNAME": "neo4j", "NEO4J_PASSWORD": "benchmark",
+    "SECRET_KEY": "benchmark-secret-key", "MAIL_USERNAME": "benchmark", "MAIL_PASSWORD": "benchmark",
+}.items():
+    os.environ.setdefault(key, value)
+
+import httpx
+from api.main import app
+from api.utils import queries
+from api.utils.httpcache import http_cache
+from api.routes.auth.services import get_current_user
+from .auth_load import summarize
+
+######################################################################
+
+async def timed_gets(client: httpx.AsyncClient, n: int, url: str, headers: dict, expect: int) -> list[float]:
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        response = await client.get(url, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == expect, response.status_code
+    return latencies
+
+
+async def main(args) -> dict:
+    content = "x" * (args.content_kb * 1024)
+    ran = []
+    async def run(name, **params): # stands in for the module read
+        ran.append(name)
+        await asyncio.sleep(args.query_ms / 1000)
+        return [["m1", "Module", content, 1.0, 2.0, ["c1"]]]
+    queries.run = run
+    app.dependency_overrides[get_current_user] = lambda: SimpleNamespace(uid="u1", username="benchmark")
+
+    results, queries_ran = {}, {}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+        url = "/learning/modules/m1"
+        http_cache.ttl = 0
+        etag = (await client.get(url)).headers["etag"]
+        for mode, ttl, headers, expect in [
+                ("full", 0, {}, 200),
+                ("not_modified", 0, {"If-None-Match": etag}, 304),
+                ("shared_hit", 60, {}, 200)]:
+            http_cache.ttl = ttl
+            await client.get(url) # warm the shared cache when on
+            ran.clear()
+            results[mode] = summarize(await timed_gets(client, args.requests, url, headers, expect))
+            queries_ran[mode] = len(ran)
+
+    result = {
+        "config": {"requests": args.requests, "query_ms": args.query_ms, "content_kb": args.content_kb},
+        "latency_ms": results,
+        "queries": queries_ran,
+    }
+    print(f"p50 full {results['full']['p50']:.2f} ms, 304 {results['not_modified']['p50']:.2f} ms, "
+          f"shared hit {results['shared_hit']['p50']:.2f} ms", file=sys.stderr)
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="GETs per mode")
+    parser.add_argument("--query-ms", type=float, default=5, help="simulated Neo4j read latency")
+    parser.add_argument("--content-kb", type=int, default=20, help="size of the module content")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
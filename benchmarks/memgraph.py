@@ -0,0 +1,164 @@
+"""
+In-memory graph stand-in for benchmarks
+    Implements the named statements of `api.utils.queries.QUERIES` (import the app, or the
+    routers' `cypher` modules, first so every statement is registered) on plain dicts and is installed in place of `adb.cypher_query` (and `queries.stream`), so the API can be
+    driven end to end without a Neo4j server. Query texts are dispatched by
+    name; an unknown statement raises so new hot paths don't silently go untested.
+"""
+import itertools
+from neo4j.graph import Graph, Node
+from neomodel import adb
+from neomodel.exceptions import UniqueProperty
+from api.utils import queries
+
+
+class InMemoryGraph:
+    def __init__(self):
+        self.users: dict[str, dict] = {} # uid -> properties
+        self.uid_by_username: dict[str, str] = {}
+        self.uid_by_email: dict[str, str] = {}
+        self.chatrooms: dict[str, dict] = {} # uid -> {"name", "members"}
+        self.messages: dict[str, dict] = {} # uid -> row
+        self.friends: dict[frozenset, dict] = {} # {a, b} -> FRIENDS properties
+        self.knows: dict[tuple, dict] = {} # (a, b) -> KNOWS properties
+        self.calls: dict[str, int] = {}
+        self._graph = Graph()
+        self._ids = itertools.count()
+        self._element_ids: dict[str, str] = {}
+        self._handlers = {text: (name, getattr(self, f"q_{name}")) for name, text in queries.QUERIES.items() if hasattr(self, f"q_{name}")}
+        self._original = None
+        self._original_stream = None
+
+    # installation
+    def install(self):
+        self._original = adb.cypher_query
+        self._original_stream = queries.stream
+        adb.cypher_query = self.cypher_query
+        queries.stream = self.stream
+
+    def uninstall(self):
+        if self._original is not None:
+            adb.cypher_query = self._original
+            queries.stream = self._original_stream
+            self._original = None
+
+    async def cypher_query(self, query, params=None, handle_unique=True, retry_on_session_expire=False, resolve_objects=False):
+        handler = self._handlers.get(query)
+        if handler is None:
+            raise NotImplementedError(f"InMemoryGraph has no handler for query: {query.strip()[:80]}")
+        name, fn = handler
+        self.calls[name] = self.calls.get(name, 0) + 1
+        return fn(**(params or {})), ()
+
+    async def stream(self, name, **params):
+        """`queries.stream` stand-in, rows as dicts keyed like the RETURN clause"""
+        self.calls[name] = self.calls.get(name, 0) + 1
+        for row in getattr(self, f"s_{name}")(**params):
+            yield row
+
+    # helpers
+    def _node(self, uid: str) -> Node:
+        element_id = self._element_ids.setdefault(uid, f"4:mem:{next(self._ids)}")
+        return Node(self._graph, element_id, int(element_id.rsplit(":", 1)[1]), ["User"], self.users[uid])
+
+    def _user_rows(self, uid: str | None):
+        return [[self._node(uid)]] if uid in self.users else []
+
+    def add_user(self, props: dict):
+        if props["username"] in self.uid_by_username or props["email"] in self.uid_by_email:
+            raise UniqueProperty(f"Node already exists with label `User` and property `username` = '{props['username']}'")
+        self.users[props["uid"]] = dict(props)
+        self.uid_by_username[props["username"]] = props["uid"]
+        self.uid_by_email[props["email"]] = props["uid"]
+
+    def add_chatroom(self, uid: str, name: str, members=()):
+        self.chatrooms[uid] = {"name": name, "members": set(members)}
+
+    def add_friends(self, a: str, b: str, created: float = 0.0):
+        self.friends.setdefault(frozenset((a, b)), {"created": created, "bestFriend": False})
+
+    def _neighbours(self, uid: str) -> set[str]:
+        out = {b for pair in self.friends if uid in pair for b in pair if b != uid}
+        return out | {b for a, b in self.knows if a == uid} | {a for a, b in self.knows if b == uid}
+
+    def verify_all(self):
+        for props in self.users.values():
+            props["is_verified"] = True
+
+    # statement handlers (q_<name in QUERIES>)
+    def q_user_by_username(self, username):
+        return self._user_rows(self.uid_by_username.get(username))
+
+    def q_user_by_email(self, email):
+        return self._user_rows(self.uid_by_email.get(email))
+
+    def q_user_by_uid(self, uid):
+        return self._user_rows(uid)
+
+    def q_username_exists(self, username):
+        return [[username in self.uid_by_username]]
+
+    def q_create_user_if_unique(self, props):
+        if props["username"] in self.uid_by_username:
+            return [["username_taken", None]]
+        if props["email"] in self.uid_by_email:
+            return [["email_taken", self.users[self.uid_by_email[props["email"]]]["username"]]]
+        self.add_user(props)
+        return [["created", None]]
+
+    def q_set_last_login(self, rows):
+        for row in rows:
+            if row["uid"] in self.users:
+                self.users[row["uid"]]["last_login"] = row["last_login"]
+        return []
+
+    def q_chatroom_access(self, room, uid):
+        if room not in self.chatrooms:
+            return []
+        return [[self.chatrooms[room]["name"], uid in self.chatrooms[room]["members"]]]
+
+    def q_chatrooms_for_user(self, uid):
+        return sorted(([room, c["name"]] for room, c in self.chatrooms.items() if uid in c["members"]), key=lambda r: r[1])
+
+    def q_create_messages(self, rows):
+        for row in rows:
+            if row["room"] in self.chatrooms and row["author"] in self.users:
+                self.messages.setdefault(row["uid"], dict(row))
+        return []
+
+    def q_chat_history(self, room, timestamp, uid, limit):
+        rows = [m for m in self.messages.values() if m["room"] == room and (m["timestamp"], m["uid"]) < (timestamp, uid)]
+        rows.sort(key=lambda m: (m["timestamp"], m["uid"]), reverse=True)
+        return [[m["uid"], m["text"], m["timestamp"], m["author"], self.users[m["author"]]["username"]] for m in rows[:limit]]
+
+    def q_friends_of_user(self, uid):
+        rows = [[other, self.users[other]["username"], r["created"], r["bestFriend"]]
+                for pair, r in self.friends.items() if uid in pair for other in pair if other != uid]
+        return sorted(rows, key=lambda r: r[1])
+
+    def q_add_friend(self, uid, other, created):
+        if uid not in self.users or other not in self.users:
+            return []
+        self.add_friends(uid, other, created)
+        r = self.friends[frozenset((uid, other))]
+        return [[r["created"], r["bestFriend"]]]
+
+    def q_add_known(self, uid, other, created):
+        if uid in self.users and other in self.users:
+            self.knows.setdefault((uid, other), {"created": created})
+        return []
+
+    def q_suggestions_for_user(self, uid, limit):
+        direct = self._neighbours(uid)
+        mutual = {}
+        for m in direct:
+            for s in self._neighbours(m) - direct - {uid}:
+                mutual[s] = mutual.get(s, 0) + 1
+        rows = sorted(([s, self.users[s]["username"], n] for s, n in mutual.items()), key=lambda r: (-r[2], r[1]))
+        return rows[:limit]
+
+    # streamed statement handlers (s_<name in QUERIES>)
+    def s_social_edges(self):
+        username = lambda uid: self.users[uid]["username"]
+        for a, b in itertools.chain((tuple(pair) for pair in self.friends), self.knows):
+            yield {"a": a, "a_username": username(a), "b": b, "b_username": username(b)}
@@ -0,0 +1,137 @@
+"""
+Redis-compatible stand-in server
+    Serves `api.utils.shared.MemoryBackend` over the RESP protocol, implementing only
+    the commands `RespBackend` sends (GET, MGET, SET [PX] [NX], EXISTS, DEL, INCRBY,
+    PEXPIRE, PUBLISH, SUBSCRIBE, plus PING/AUTH/SELECT). Enough to run several API
+    workers against SHARED_STATE_URL=redis://127.0.0.1:<port> without a Redis server.
+
+    python -m benchmarks.resp_server [--port 6390]
+"""
+import asyncio
+import argparse
+from api.utils.shared import MemoryBackend
+
+
+def encode(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int): # bool too
+        return b":%d\r\n" % value
+    if isinstance(value, list):
+        return b"*%d\r\n" % len(value) + b"".join(encode(item) for item in value)
+    data = str(value).encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+class RespServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 6390):
+        self.host = host
+        self.port = port
+        self.backend = MemoryBackend()
+        self.commands = 0
+        self._server: asyncio.AbstractServer | None = None
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self.host}:{self.port}/0"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self.handle, self.host, self.port)
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def read_command(self, reader: asyncio.StreamReader) -> list[str] | None:
+        line = await reader.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2].decode())
+        return args
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while (args := await self.read_command(reader)) is not None:
+                self.commands += 1
+                name, args = args[0].upper(), args[1:]
+                if name == "SUBSCRIBE":
+                    await self.subscribe(args, reader, writer)
+                    return
+                writer.write(await self.execute(name, args))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError): # client gone or server stopping
+            pass
+        finally:
+            writer.close()
+
+    async def execute(self, name: str, args: list[str]) -> bytes:
+        backend = self.backend
+        if name in ("PING", "AUTH", "SELECT"):
+            return b"+OK\r\n" if name != "PING" else b"+PONG\r\n"
+        if name == "GET":
+            return encode(await backend.get(args[0]))
+        if name == "MGET":
+            return encode(await backend.mget(*args))
+        if name == "SET":
+            options = [arg.upper() for arg in args[2:]]
+            ttl = int(args[2 + options.index("PX") + 1]) / 1000 if "PX" in options else None
+            stored = await backend.set(args[0], args[1], ttl=ttl, only_if_new="NX" in options)
+            return b"+OK\r\n" if stored else encode(None)
+        if name == "EXISTS":
+            return encode(sum([await backend.exists(key) for key in args]))
+        if name == "DEL":
+            for key in args:
+                await backend.delete(key)
+            return encode(len(args))
+        if name == "INCRBY":
+            return encode(await backend.incr(args[0], int(args[1])))
+        if name == "PEXPIRE":
+            value = await backend.get(args[0])
+            if value is not None:
+                await backend.set(args[0], value, ttl=int(args[1]) / 1000)
+            return encode(value is not None)
+        if name == "PUBLISH":
+            receivers = len(backend._subscribers.get(args[0], ()))
+            await backend.publish(args[0], args[1])
+            return encode(receivers)
+        return f"-ERR unknown command '{name}'\r\n".encode()
+
+    async def subscribe(self, channels: list[str], reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Forward messages until the client disconnects (no other commands on this connection)"""
+        queue = asyncio.Queue()
+        async def forward(channel):
+            async for message in self.backend.subscribe(channel):
+                queue.put_nowait(encode(["message", channel, message]))
+        tasks = [asyncio.create_task(forward(channel)) for channel in channels]
+        for count, channel in enumerate(channels, 1):
+            writer.write(encode(["subscribe", channel, count]))
+        closed = asyncio.create_task(reader.read())
+        try:
+            while True:
+                message = asyncio.create_task(queue.get())
+                await asyncio.wait((message, closed), return_when=asyncio.FIRST_COMPLETED)
+                if not message.done():
+                    message.cancel()
+                    return
+                writer.write(message.result())
+                await writer.drain()
+        finally:
+            for task in (*tasks, closed):
+                task.cancel()
+
+
+async def main(args):
+    server = RespServer(port=args.port)
+    await server.start()
+    print(f"Serving {server.url}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=6390)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,114 @@
+"""
+Response serialization benchmark
+    Serves the same large list payloads (chat history messages, module search hits) from
+    routes built three ways, through the ASGI stack:
+        - untyped      : no response_model, stdlib JSONResponse (jsonable_encoder + json.dumps)
+        - typed        : response_model, stdlib JSONResponse (pydantic-core validation & dump)
+        - typed_orjson : response_model, ORJSONResponse (the app default)
+    Checks that every variant returns the same document, reports latencies and sizes as JSON.
+
+    python -m benchmarks.serialization [--items 1000 10000] [--requests 50] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+# Settings needed to import the app modules, real values are never contacted
+for key, value in {
+    "NEO4J_URI": "neo4j://localhost:7687", "NEO4J_USERNAME": "neo4j", "NEO4J_PASSWORD": "benchmark",
+    "SECRET_KEY": "benchmark-secret-key", "MAIL_USERNAME": "benchmark", "MAIL_PASSWORD": "benchmark",
+}.items():
+    os.environ.setdefault(key, value)
+
+import httpx
+from fastapi import FastAPI
+import orjson
+from fastapi.responses import JSONResponse, ORJSONResponse
+from api.routes.chat.schemas import ChatMessage
+from api.routes.search.schemas import ModuleHit
+from .auth_load import summarize
+
+VARIANTS = ("untyped", "typed", "typed_orjson")
+WORDS = "graph module test unit integration cypher query index node edge path classroom über naïve".split()
+
+######################################################################
+
+def payloads(n: int) -> dict[str, list[dict]]:
+    """Rows shaped like what the services build from Neo4j results"""
+    now = time.time()
+    return {
+        "messages": [{
+            "type": "message", "uid": f"m{i}", "room": "room1", "author": f"u{i % 50}", "username": f"user{i % 50}",
+            "text": " ".join(random.choices(WORDS, k=random.randint(3, 40))), "timestamp": now - i,
+        } for i in range(n)],
+        "hits": [{
+            "uid": f"lm{i}", "name": " ".join(random.choices(WORDS, k=3)), "score": random.random() * 10,
+            "snippet": "…" + " ".join(random.choices(WORDS, k=30)) + "…",
+        } for i in range(n)],
+    }
+
+
+def build_app(data: dict[str, list[dict]]) -> FastAPI:
+    app = FastAPI()
+    models = {"messages": ChatMessage, "hits": ModuleHit}
+    for kind, model in models.items():
+        def handler(kind=kind):
+            async def route():
+                return data[kind]
+            return route
+        app.get(f"/untyped/{kind}", response_class=JSONResponse)(handler())
+        app.get(f"/typed/{kind}", response_model=list[model], response_class=JSONResponse)(handler())
+        app.get(f"/typed_orjson/{kind}", response_model=list[model], response_class=ORJSONResponse)(handler())
+    return app
+
+
+async def main(args) -> dict:
+    random.seed(args.seed)
+    result = {"config": {"items": args.items, "requests": args.requests, "orjson": orjson.__version__}}
+    for n in args.items:
+        app = build_app(payloads(n))
+        runs = {}
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark") as client:
+            for kind in ("messages", "hits"):
+                documents = {}
+                for variant in VARIANTS:
+                    url = f"/{variant}/{kind}"
+                    latencies = []
+                    for _ in range(args.requests):
+                        start = time.perf_counter()
+                        response = await client.get(url)
+                        latencies.append(time.perf_counter() - start)
+                        response.raise_for_status()
+                    documents[variant] = response.json()
+                    runs[f"{kind}/{variant}"] = {"bytes": len(response.content), "latency_ms": summarize(latencies)}
+                if any(documents[variant] != documents["untyped"] for variant in VARIANTS):
+                    raise AssertionError(f"{kind}: variants returned different documents")
+        result[f"items_{n}"] = runs
+        for kind in ("messages", "hits"):
+            before, after = runs[f"{kind}/untyped"]["latency_ms"]["p50"], runs[f"{kind}/typed_orjson"]["latency_ms"]["p50"]
+            print(f"{n} {kind}: untyped p50 {before:.1f} ms, typed p50 {runs[f'{kind}/typed']['latency_ms']['p50']:.1f} ms, "
+                  f"typed+orjson p50 {after:.1f} ms ({before / after:.1f}x)", file=sys.stderr)
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, nargs="+", default=[1000, 10000], help="list lengths to serve")
+    parser.add_argument("--requests", type=int, default=50, help="requests per route")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,115 @@
+"""
+Shared state benchmark
+    Compares the in-process and the Redis-compatible (`benchmarks.resp_server` stand-in)
+    shared-state backends as two "workers" would use them:
+        - revoked-token lookups (one EXISTS per `verify_token`)
+        - rate limit hits from two workers against one limit (must never over-admit)
+        - single-use token revocation raced by two workers (exactly one may win)
+        - cache invalidation propagation latency from one worker's bus to the other's
+    Reports latencies and the correctness checks as JSON.
+
+    python -m benchmarks.shared_state [--lookups 10000] [--invalidations 1000] [--port 6390]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+
+# Settings needed to import the app modules, real values are never contacted
+for key, value in {
+    "NEO4J_URI": "neo4j://localhost:7687", "NEO4J_USERNAME": "neo4j", "NEO4J_PASSWORD": "benchmark",
+    "SECRET_KEY": "benchmark-secret-key", "MAIL_USERNAME": "benchmark", "MAIL_PASSWORD": "benchmark",
+}.items():
+    os.environ.setdefault(key, value)
+
+from api.utils.shared import MemoryBackend, RespBackend, InvalidationBus
+from api.utils.ratelimit import SharedStorage
+from .resp_server import RespServer
+from .auth_load import summarize
+
+######################################################################
+
+async def lookups(backend, n: int) -> dict:
+    await backend.set("revoked:known", "1", ttl=600)
+    latencies = []
+    for i in range(n):
+        start = time.perf_counter()
+        await backend.exists("revoked:known" if i % 2 else f"revoked:{i}")
+        latencies.append(time.perf_counter() - start)
+    return summarize(latencies)
+
+
+async def rate_limit(workers: list, limit: int = 10, hits: int = 100) -> int:
+    """Hits spread over the workers concurrently, returns how many were allowed"""
+    storages = [SharedStorage(backend) for backend in workers]
+    results = await asyncio.gather(*(storages[i % len(storages)].hit("bench:ip", limit, 60) for i in range(hits)))
+    return sum(1 for retry_after in results if not retry_after)
+
+
+async def revocation_race(workers: list) -> int:
+    """Both workers try to consume the same token, returns how many succeeded"""
+    results = await asyncio.gather(*(backend.set("revoked:race", "1", ttl=60, only_if_new=True) for backend in workers))
+    return sum(results)
+
+
+async def propagation(publisher: InvalidationBus, subscriber: InvalidationBus, n: int) -> dict:
+    latencies, done = [], asyncio.Event()
+    def received(sent_at):
+        latencies.append(time.perf_counter() - sent_at)
+        if len(latencies) == n:
+            done.set()
+    subscriber.register("bench", received)
+    subscriber.start()
+    await asyncio.sleep(0.2) # subscription established
+    for _ in range(n):
+        await publisher.publish("bench", time.perf_counter())
+    await asyncio.wait_for(done.wait(), 10)
+    await subscriber.stop()
+    return summarize(latencies)
+
+
+async def main(args) -> dict:
+    server = RespServer(port=args.port)
+    await server.start()
+    memory = MemoryBackend()
+    workers = [RespBackend(server.url), RespBackend(server.url)]
+    buses = [InvalidationBus(backend, "bench:invalidations") for backend in workers]
+
+    result = {
+        "revoked_lookup_ms": {
+            "memory": await lookups(memory, args.lookups),
+            "resp": await lookups(workers[0], args.lookups),
+        },
+        "rate_limit_allowed": {"limit": 10, "memory": await rate_limit([memory]), "resp_two_workers": await rate_limit(workers)},
+        "revocation_race_winners": await revocation_race(workers),
+        "invalidation_latency_ms": await propagation(buses[0], buses[1], args.invalidations),
+        "server_commands": server.commands,
+    }
+    for backend in workers:
+        await backend.close()
+    await server.stop()
+    print(f"revoked lookup p50: memory {result['revoked_lookup_ms']['memory']['p50'] * 1e3:.1f} µs, "
+          f"resp {result['revoked_lookup_ms']['resp']['p50'] * 1e3:.1f} µs; invalidation p99 "
+          f"{result['invalidation_latency_ms']['p99']:.2f} ms", file=sys.stderr)
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lookups", type=int, default=10000, help="revoked-token lookups per backend")
+    parser.add_argument("--invalidations", type=int, default=1000, help="invalidations published")
+    parser.add_argument("--port", type=int, default=6390, help="port of the stand-in server")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,99 @@
+"""
+"People you may know" benchmark
+    Builds a random social graph in `benchmarks.memgraph.InMemoryGraph`, then times a
+    full rebuild of the suggestion table, GET /social/suggestions served from the table,
+    and POST /social/friends/{username} with its incremental table update, through the
+    ASGI app. Reports latencies and table size as JSON.
+
+    python -m benchmarks.social [--users 20000] [--degree 20] [--requests 2000] [--output results.json]
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+
+# Settings needed to import the app, real values are never contacted
+for key, value in {
+    "NEO4J_URI": "neo4j://localhost:7687", "NEO4J_USERNAME": "neo4j", "NEO4J_PASSWORD": "benchmark",
+    "SECRET_KEY": "benchmark-secret-key", "MAIL_USERNAME": "benchmark", "MAIL_PASSWORD": "benchmark",
+}.items():
+    os.environ.setdefault(key, value)
+
+import httpx
+from api.main import app
+from api.routes.auth.services import create_access_token
+from api.routes.social.suggestions import suggestion_index
+from .memgraph import InMemoryGraph
+from .auth_load import summarize
+
+######################################################################
+
+async def timed(latencies: list, request):
+    start = time.perf_counter()
+    response = await request
+    latencies.append(time.perf_counter() - start)
+    response.raise_for_status()
+    return response
+
+
+async def main(args) -> dict:
+    random.seed(args.seed)
+    graph = InMemoryGraph()
+    graph.install()
+    uids = [f"social{i}" for i in range(args.users)]
+    for uid in uids:
+        graph.add_user({"uid": uid, "username": uid, "email": f"{uid}@example.com", "hashed_password": "x" * 60, "is_verified": True})
+    for _ in range(args.users * args.degree // 2):
+        a, b = random.sample(uids, 2)
+        graph.add_friends(a, b)
+
+    start = time.perf_counter()
+    await suggestion_index.refresh()
+    rebuild = time.perf_counter() - start
+
+    reads, writes = [], []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        for _ in range(args.requests):
+            uid = random.choice(uids)
+            headers = {"Authorization": f"Bearer {create_access_token({'sub': uid})}"}
+            await timed(reads, client.get("/social/suggestions", headers=headers))
+            other = random.choice(uids)
+            if other != uid:
+                await timed(writes, client.post(f"/social/friends/{other}", headers=headers))
+    graph.uninstall()
+
+    result = {
+        "config": {"users": args.users, "degree": args.degree, "requests": args.requests},
+        "rebuild_s": rebuild,
+        "table": suggestion_index.stats(),
+        "suggestions_latency_ms": summarize(reads),
+        "befriend_latency_ms": summarize(writes),
+        "db_calls": graph.calls,
+    }
+    print(f"rebuilt {result['table']['users']} users in {rebuild:.2f}s, suggestions p99 "
+          f"{result['suggestions_latency_ms']['p99']:.2f} ms, befriend p99 {result['befriend_latency_ms']['p99']:.2f} ms", file=sys.stderr)
+    return result
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000, help="users in the graph")
+    parser.add_argument("--degree", type=int, default=20, help="average connections per user")
+    parser.add_argument("--requests", type=int, default=2000, help="suggestion reads (each followed by one befriend)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    results = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
@@ -0,0 +1,84 @@
+"""
+Cold start benchmark
+    Starts a fresh interpreter per run, imports `api.main` and serves a first
+    request through the ASGI app (no network, Neo4j is not contacted), and reports
+    the median import time and time-to-first-request. `--profile` also prints the
+    per-module import breakdown of one run (see `api.utils.startup`).
+
+    python -m benchmarks.startup [--runs 10] [--profile]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+# Settings needed to import the app, real values are never contacted
+ENV = {
+    "NEO4J_URI": "neo4j://localhost:7687", "NEO4J_USERNAME": "neo4j", "NEO4J_PASSWORD": "benchmark",
+    "SECRET_KEY": "benchmark-secret-key", "MAIL_USERNAME": "benchmark", "MAIL_PASSWORD": "benchmark",
+}
+
+# Runs in the child interpreter, prints one JSON line
+CHILD = """
+import time
+start = time.perf_counter()
+import sys, json, asyncio
+import api.main
+imported = time.perf_counter()
+import httpx
+
+async def first_request():
+    transport = httpx.ASGITransport(app=api.main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        return (await client.get("/")).status_code
+
+status = asyncio.run(first_request())
+served = time.perf_counter()
+profiler = api.main.startup.profiler if hasattr(api.main, "startup") else None # older trees, for comparisons
+if profiler is not None and profiler.enabled:
+    print(profiler.report(), file=sys.stderr)
+print(json.dumps({
+    "import_ms": (imported - start) * 1e3,
+    "first_request_ms": (served - start) * 1e3,
+    "status": status,
+    "lazy_modules_loaded": [m for m in ("fastapi_mail", "aiosmtplib", "passlib", "jose", "cryptography") if m in sys.modules],
+}))
+"""
+
+######################################################################
+
+def run_once(profile: bool = False) -> dict:
+    env = {**os.environ, **{key: os.environ.get(key, value) for key, value in ENV.items()}}
+    if profile:
+        env["STARTUP_PROFILE"] = "1"
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD], env=env, capture_output=True, text=True, check=True,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    if profile:
+        print(output.stderr, file=sys.stderr)
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None) -> dict:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="fresh interpreters started")
+    parser.add_argument("--profile", action="store_true", help="print the per-module import profile of one extra run")
+    args = parser.parse_args(argv)
+
+    run_once() # warm the OS file cache & bytecode
+    runs = [run_once() for _ in range(args.runs)]
+    if args.profile:
+        run_once(profile=True)
+    return {
+        "runs": args.runs,
+        "import_ms": statistics.median(run["import_ms"] for run in runs),
+        "first_request_ms": statistics.median(run["first_request_ms"] for run in runs),
+        "lazy_modules_loaded": runs[-1]["lazy_modules_loaded"],
+    }
+
+
+if __name__ == "__main__":
+    print(json.dumps(main(), indent=2))
@@ -0,0 +1,79 @@
+"""
+Token engine microbenchmark
+    Compares `jose.jwt` (the previous per-call encode/decode path) with
+    `api.routes.auth.tokens.TokenEngine` for the tokens minted on /auth/token
+    and verified on /auth/refresh/{refresh_token} & protected routes.
+
+    python -m benchmarks.tokens [--number 20000]
+"""
+import argparse
+import timeit
+from datetime import datetime, timedelta, timezone
+from jose import jwt
+from api.routes.auth.tokens import TokenEngine
+
+SECRET_KEY = "benchmark-secret-key"
+DATA = {"sub": "0b3c1f2e8a6d4e0f9c7b5a3d1e2f4a6b", "username": "benchmark_user"}
+
+
+def jose_encode():
+    to_encode = DATA.copy()
+    to_encode.update({"exp": datetime.now(timezone.utc) + timedelta(minutes=30), "type": "access"})
+    return jwt.encode(to_encode, SECRET_KEY, algorithm="HS256")
+
+def jose_decode(token):
+    return jwt.decode(token, SECRET_KEY, algorithms=["HS256"])
+
+
+def bench(label: str, fn, number: int):
+    seconds = min(timeit.repeat(fn, number=number, repeat=3))
+    print(f"{label:<36} {number / seconds:>12,.0f} ops/s {seconds / number * 1e6:>9.2f} us/op")
+    return seconds
+
+
+def asymmetric_engines():
+    """(algorithm, engine) pairs for ES256/EdDSA, skipped if `cryptography` is missing"""
+    try:
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+    except ImportError:
+        return []
+    engines = []
+    for algorithm, key in (("ES256", ec.generate_private_key(ec.SECP256R1())), ("EdDSA", ed25519.Ed25519PrivateKey.generate())):
+        pem = key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ).decode()
+        engines.append((algorithm, TokenEngine(algorithm, private_key=pem)))
+    return engines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--number", type=int, default=20000, help="operations per timing run")
+    args = parser.parse_args()
+    n = args.number
+
+    engine = TokenEngine("HS256", SECRET_KEY)
+    jose_token = jose_encode()
+    engine_token = engine.create(DATA, timedelta(minutes=30), "access")
+    batch = [engine_token] * 100
+
+    print("HS256")
+    jose_enc = bench("  jose encode", jose_encode, n)
+    engine_enc = bench("  TokenEngine encode", lambda: engine.create(DATA, timedelta(minutes=30), "access"), n)
+    jose_dec = bench("  jose decode", lambda: jose_decode(jose_token), n)
+    engine_dec = bench("  TokenEngine decode", lambda: engine.decode(engine_token, "access"), n)
+    bench("  TokenEngine decode_many (x100)", lambda: engine.decode_many(batch, "access"), max(n // 100, 1))
+    print(f"  speedup: encode x{jose_enc / engine_enc:.1f}, decode x{jose_dec / engine_dec:.1f}")
+
+    for algorithm, asymmetric in asymmetric_engines():
+        token = asymmetric.create(DATA, timedelta(minutes=30), "access")
+        print(algorithm)
+        bench("  TokenEngine encode", lambda: asymmetric.create(DATA, timedelta(minutes=30), "access"), max(n // 10, 1))
+        bench("  TokenEngine decode", lambda: asymmetric.decode(token, "access"), max(n // 10, 1))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Password blocklist builder
+    Turns breached/common password lists into the compact file read by
+    `api.routes.auth.validation.PasswordBlocklist` (PASSWORD_BLOCKLIST): the first 8 bytes of
+    each password's SHA-1, sorted & deduplicated, after an 8-byte header. Inputs are either
+    plain passwords, one per line (e.g. a "top 1M" list), or SHA-1 hex digests with an optional
+    ":count" suffix (the Have I Been Pwned download format), detected per line.
+    Lists larger than memory are sorted in runs of --run-size keys spilled to temporary files
+    and merged, so tens of millions of entries build with bounded memory.
+
+    python -m data.blocklist build passwords.txt [more.txt ...] --output data/password_blocklist.bin
+                                   [--min-count 1] [--run-size 2000000]
+    python -m data.blocklist check data/password_blocklist.bin 'Pa$$w0rd'
+"""
+import os
+import re
+import heapq
+import hashlib
+import argparse
+import logging
+import tempfile
+from typing import Iterator
+from api.routes.auth.validation import KEY_SIZE, blocklist_key, write_blocklist, PasswordBlocklist
+
+logger = logging.getLogger("data.blocklist")
+
+_SHA1_LINE = re.compile(rb"^([0-9A-Fa-f]{40})(?::(\d+))?$")
+
+######################################################################
+
+def read_keys(paths: list[str], min_count: int = 1) -> Iterator[bytes]:
+    for path in paths:
+        with open(path, "rb") as f:
+            for line in f:
+                line = line.rstrip(b"\r\n")
+                if not line:
+                    continue
+                match = _SHA1_LINE.match(line)
+                if match is not None:
+                    if match.group(2) is None or int(match.group(2)) >= min_count:
+                        yield blocklist_key(bytes.fromhex(match.group(1).decode()))
+                else:
+                    yield blocklist_key(hashlib.sha1(line).digest())
+
+
+def sorted_runs(keys: Iterator[bytes], run_size: int, directory: str) -> list[str]:
+    """Sort `keys` `run_size` at a time, each sorted run written to its own file"""
+    runs, run = [], []
+    def spill():
+        run.sort()
+        path = os.path.join(directory, f"run{len(runs)}.bin")
+        with open(path, "wb") as f:
+            f.write(b"".join(run))
+        runs.append(path)
+        run.clear()
+    for key in keys:
+        run.append(key)
+        if len(run) >= run_size:
+            spill()
+    if run or not runs:
+        spill()
+    return runs
+
+
+def read_run(path: str) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while chunk := f.read(KEY_SIZE * 65536):
+            for i in range(0, len(chunk), KEY_SIZE):
+                yield chunk[i:i + KEY_SIZE]
+
+
+def build(paths: list[str], output: str, min_count: int = 1, run_size: int = 2_000_000) -> int:
+    with tempfile.TemporaryDirectory(prefix="blocklist") as directory:
+        runs = sorted_runs(read_keys(paths, min_count), run_size, directory)
+        logger.info("Merging %d sorted run(s)", len(runs))
+        return write_blocklist(output, heapq.merge(*map(read_run, runs)))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_ = commands.add_parser("build", help="build a blocklist file from password / SHA-1 lists")
+    build_.add_argument("inputs", nargs="+", help="plain password or SHA-1[:count] lists")
+    build_.add_argument("--output", required=True, help="blocklist file to write (replaced atomically)")
+    build_.add_argument("--min-count", type=int, default=1, help="skip SHA-1 lines seen fewer times than this in breaches")
+    build_.add_argument("--run-size", type=int, default=2_000_000, help="keys sorted in memory at a time")
+    check = commands.add_parser("check", help="look passwords up in a blocklist file")
+    check.add_argument("blocklist")
+    check.add_argument("passwords", nargs="+")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args = parse_args()
+    if args.command == "build":
+        count = build(args.inputs, args.output, args.min_count, args.run_size)
+        logger.info("Wrote %d entries to %s (%.1f MB)", count, args.output, os.path.getsize(args.output) / 1e6)
+    else:
+        blocklist = PasswordBlocklist(args.blocklist)
+        for password in args.passwords:
+            print(f"{password}: {'blocked' if password in blocklist else 'ok'}")
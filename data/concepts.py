@@ -0,0 +1,416 @@
+"""
+Concept extraction pipeline
+    Builds the knowledge graph from learning module text, offline and in stages:
+        1. source     streams modules (name, content & HAS_CONTENT texts) page by page,
+                      keyset-paginated on uid, so the corpus is never held in memory
+        2. chunk      splits each module's text into sentence-aligned chunks
+        3. extract    runs a pluggable extractor over the chunks (default: a local
+                      RAKE-style keyword/noun-phrase baseline, no external services)
+        4. dedupe     keys concepts by a hash of their normalized name, so "Cell
+                      divisions" and "cell division" are one Concept in every run
+        5. write      MERGEs Concept nodes and (LearningModule)-[:ABOUT]->(Concept)
+                      links in batched UNWIND transactions
+    After every page the last module uid is saved to a checkpoint file, so an
+    interrupted run resumes where it stopped (re-running a page is harmless, all
+    writes are MERGEs).
+    With --seed, modules are read from a seed file instead; unless it's a dry run they are
+    matched to the loaded graph's modules by name (data.loader gives seeded nodes fresh uids).
+    Category nodes are not derived: they form a curated hierarchy and the seed data has no
+    (Concept)-[:IN_CATEGORY]->(Category) links an extractor could learn them from.
+
+    python -m data.concepts extract [--page-size 200] [--batch-size 1000] [--checkpoint concepts.checkpoint.json]
+                                    [--extractor keywords | package.module:Class] [--max-concepts 8]
+                                    [--workers 1] [--restart] [--dry-run] [--seed data/simple_initiate.cypher]
+"""
+import os
+import re
+import json
+import heapq
+import asyncio
+import hashlib
+import argparse
+import importlib
+import logging
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, asdict
+from typing import AsyncIterator, Iterator, Protocol
+from .loader import batched
+
+logger = logging.getLogger("data.concepts")
+
+######################################################################
+# CYPHER
+
+SCHEMA = [
+    "CREATE CONSTRAINT concept_uid IF NOT EXISTS FOR (c:Concept) REQUIRE c.uid IS UNIQUE",
+]
+
+# keyset page over the LearningModule uid constraint, resumable from any uid
+MODULE_PAGE = """
+    MATCH (m:LearningModule)
+    WHERE m.uid > $after
+    WITH m ORDER BY m.uid LIMIT $limit
+    RETURN m.uid AS uid, m.name AS name, m.content AS content,
+        [(m)-[:HAS_CONTENT]->(c:Content) WHERE c.text IS NOT NULL | c.text] AS texts
+    """
+
+MERGE_CONCEPTS = """
+    UNWIND $rows AS row
+    MERGE (c:Concept {uid: row.uid})
+    ON CREATE SET c.name = row.name, c.normalized = row.normalized
+    """
+
+# graph uids of seed file modules, which are loaded without theirs (see seed_modules)
+RESOLVE_MODULES = """
+    UNWIND $names AS name
+    MATCH (m:LearningModule {name: name})
+    RETURN name, collect(m.uid) AS uids
+    """
+
+# replaces the module's links from the same extractor, so re-extraction drops stale concepts
+MERGE_LINKS = """
+    UNWIND $rows AS row
+    MATCH (m:LearningModule {uid: row.module})
+    OPTIONAL MATCH (m)-[old:ABOUT {extractor: row.extractor}]->(:Concept)
+    WITH m, row, collect(old) AS stale
+    FOREACH (r IN stale | DELETE r)
+    WITH m, row
+    UNWIND row.concepts AS concept
+    MATCH (c:Concept {uid: concept.uid})
+    MERGE (m)-[r:ABOUT]->(c)
+    SET r.weight = concept.weight, r.extractor = row.extractor
+    """
+
+######################################################################
+# CHUNKING & NORMALIZATION
+
+CHUNK_SIZE = 2000 # characters
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+def chunks(text: str, size: int = CHUNK_SIZE) -> Iterator[str]:
+    """Sentence-aligned pieces of at most ~`size` characters (a longer sentence is its own chunk)"""
+    current, length = [], 0
+    for sentence in _SENTENCE_END.split(text):
+        if current and length + len(sentence) > size:
+            yield " ".join(current)
+            current, length = [], 0
+        current.append(sentence)
+        length += len(sentence) + 1
+    if current:
+        yield " ".join(current)
+
+
+def singular(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+def normalize(name: str) -> str:
+    """Case, accents, punctuation & plural insensitive form of a concept name"""
+    text = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode().lower()
+    return " ".join(singular(word) for word in re.findall(r"[a-z0-9]+", text))
+
+def concept_uid(normalized: str) -> str:
+    return "concept-" + hashlib.sha1(normalized.encode()).hexdigest()[:20]
+
+######################################################################
+# EXTRACTORS
+#   Anything with `name` and `extract(chunks) -> {phrase: weight}` can be plugged in with
+#   --extractor package.module:Class (it must be picklable to run with --workers > 1).
+
+class Extractor(Protocol):
+    name: str
+    def extract(self, chunks: list[str]) -> dict[str, float]: ...
+
+
+STOPWORDS = frozenset("""
+    a about above after again against all also am an and any are as at be because been before being below
+    between both but by can could did do does doing down during each few for from further had has have having
+    he her here hers herself him himself his how i if in into is it its itself just let like many may me might
+    more most much must my myself new no nor not now of off on once one only or other our ours ourselves out
+    over own same she should so some such than that the their theirs them themselves then there these they
+    this those through to too under until up upon us use used uses using very via was we were what when where
+    which while who whom why will with within without would you your yours yourself yourselves
+    course courses covers includes include learn learning basics help helps way ways able end get make makes
+    write writes writing written practice practise teach teaches teaching understand understanding different
+    type types solid important confidence hands exercise exercises introduction welcome including
+""".split())
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z'\-]*[A-Za-z]|[A-Za-z]")
+_PHRASE_BREAK = re.compile(r"[.,;:!?()\[\]{}\"\n]+")
+
+
+@dataclass
+class KeywordExtractor:
+    """
+    RAKE-style baseline: candidate phrases are runs of up to `max_words` non-stopwords,
+    scored by the sum of their words' degree/frequency ratios over the whole module
+    """
+    max_words: int = 3
+    name: str = "keywords"
+
+    def phrases(self, text: str) -> Iterator[tuple[str, ...]]:
+        for fragment in _PHRASE_BREAK.split(text):
+            run = []
+            for word in _WORD.findall(fragment):
+                lowered = word.lower()
+                if lowered in STOPWORDS or len(lowered) < 3:
+                    yield from self._split(run)
+                    run = []
+                else:
+                    run.append(lowered)
+            yield from self._split(run)
+
+    def _split(self, run: list[str]) -> Iterator[tuple[str, ...]]:
+        for i in range(0, len(run), self.max_words):
+            yield tuple(run[i:i + self.max_words])
+
+    def extract(self, chunks: list[str]) -> dict[str, float]:
+        candidates = Counter(phrase for chunk in chunks for phrase in self.phrases(chunk))
+        frequency, degree = Counter(), Counter()
+        for phrase, count in candidates.items():
+            for word in phrase:
+                frequency[word] += count
+                degree[word] += count * len(phrase)
+        return {" ".join(phrase): sum(degree[w] / frequency[w] for w in phrase) for phrase in candidates}
+
+
+EXTRACTORS = {"keywords": KeywordExtractor}
+
+def load_extractor(spec: str) -> Extractor:
+    """A registered extractor name or a `package.module:Class` import path"""
+    if spec in EXTRACTORS:
+        return EXTRACTORS[spec]()
+    module, _, attribute = spec.partition(":")
+    if not attribute:
+        raise ValueError(f"Unknown extractor '{spec}', use one of {sorted(EXTRACTORS)} or package.module:Class")
+    return getattr(importlib.import_module(module), attribute)()
+
+
+def extract_module(extractor: Extractor, module: dict, max_concepts: int) -> list[dict]:
+    """Top `max_concepts` deduplicated concepts of one module, weights scaled to 0-1"""
+    texts = [module.get("name") or "", module.get("content") or "", *(module.get("texts") or ())]
+    scores: dict[str, tuple[float, str]] = {} # normalized -> (score, display name)
+    for phrase, score in extractor.extract([chunk for text in texts if text for chunk in chunks(text)]).items():
+        normalized = normalize(phrase)
+        if not normalized or normalized.replace(" ", "").isdigit():
+            continue
+        best, name = scores.get(normalized, (0.0, phrase))
+        scores[normalized] = (best + score, name)
+    top = heapq.nlargest(max_concepts, scores.items(), key=lambda item: item[1][0])
+    if not top:
+        return []
+    highest = top[0][1][0] or 1.0
+    return [
+        {"uid": concept_uid(normalized), "name": name, "normalized": normalized, "weight": round(score / highest, 4)}
+        for normalized, (score, name) in top
+    ]
+
+######################################################################
+# SOURCES
+
+async def graph_modules(page_size: int, after: str = "") -> AsyncIterator[list[dict]]:
+    """Pages of modules from Neo4j in uid order, starting after `after`"""
+    from neomodel import adb
+    while True:
+        results, _ = await adb.cypher_query(MODULE_PAGE, {"after": after, "limit": page_size})
+        if not results:
+            return
+        yield [dict(zip(("uid", "name", "content", "texts"), row)) for row in results]
+        after = results[-1][0]
+
+async def resolve_uids(modules: list[dict]) -> list[dict]:
+    """Seed modules with the uid of the graph module of the same name, skipping missing or ambiguous names"""
+    from neomodel import adb
+    results, _ = await adb.cypher_query(RESOLVE_MODULES, {"names": [module["name"] for module in modules]})
+    uids = dict(results)
+    resolved = []
+    for module in modules:
+        found = uids.get(module["name"], [])
+        if len(found) != 1:
+            logger.warning("Skipping seed module '%s': %d modules of that name in the graph", module["name"], len(found))
+            continue
+        resolved.append({**module, "uid": found[0]})
+    return resolved
+
+async def seed_modules(path: str, page_size: int, after: str = "", resolve: bool = False) -> AsyncIterator[list[dict]]:
+    """
+    Same pages from a seed file (see data.loader), keyed by the seed variable for dry runs
+    without a database, or by the loaded graph's uids when `resolve` is set
+    """
+    from .loader import parse_cypher_file
+    graph = parse_cypher_file(path)
+    texts: dict[str, list[str]] = {}
+    for rel in graph.relationships:
+        if rel.type == "HAS_CONTENT" and "text" in graph.nodes[rel.end].props:
+            texts.setdefault(rel.start, []).append(graph.nodes[rel.end].props["text"])
+    modules = [
+        {"uid": node.props.get("uid", node.var), "name": node.props.get("name"), "content": node.props.get("content"), "texts": texts.get(node.var, [])}
+        for node in graph.nodes.values() if "LearningModule" in node.labels
+    ]
+    if resolve:
+        modules = await resolve_uids(modules)
+    modules.sort(key=lambda module: module["uid"])
+    for page in batched((m for m in modules if m["uid"] > after), page_size):
+        yield page
+
+######################################################################
+# PIPELINE
+
+@dataclass
+class Checkpoint:
+    after: str = "" # uid of the last module whose concepts were written
+    extractor: str = ""
+    modules: int = 0
+    concepts: int = 0
+    links: int = 0
+
+    @classmethod
+    def load(cls, path: str) -> "Checkpoint | None":
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+    def save(self, path: str):
+        """Written to a temporary file first, so a crash never leaves a truncated checkpoint"""
+        if not path:
+            return
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f)
+        os.replace(path + ".tmp", path)
+
+
+class ConceptPipeline:
+    def __init__(self, extractor: Extractor, batch_size: int = 1000, max_concepts: int = 8,
+                 workers: int = 1, checkpoint_path: str | None = None, dry_run: bool = False):
+        self.extractor = extractor
+        self.batch_size = batch_size
+        self.max_concepts = max_concepts
+        self.workers = workers
+        self.checkpoint_path = checkpoint_path
+        self.dry_run = dry_run
+        self._written: set[str] = set() # concept uids merged during this run, not re-sent
+        self.checkpoint = Checkpoint(extractor=extractor.name)
+
+    def resume(self, restart: bool = False) -> str:
+        """The uid to continue after (empty to start over)"""
+        checkpoint = None if restart else Checkpoint.load(self.checkpoint_path)
+        if checkpoint is not None:
+            if checkpoint.extractor != self.extractor.name:
+                raise ValueError(f"Checkpoint was written by extractor '{checkpoint.extractor}', pass --restart to start over")
+            self.checkpoint = checkpoint
+            logger.info("Resuming after module %s (%d modules done)", checkpoint.after, checkpoint.modules)
+        return self.checkpoint.after
+
+    async def run_query(self, query: str, params: dict):
+        if self.dry_run:
+            return
+        from neomodel import adb
+        await adb.cypher_query(query, params)
+
+    async def install_schema(self):
+        for statement in SCHEMA:
+            await self.run_query(statement, {})
+
+    async def extract(self, page: list[dict], executor: ProcessPoolExecutor | None) -> list[list[dict]]:
+        if executor is None:
+            return await asyncio.to_thread(lambda: [extract_module(self.extractor, m, self.max_concepts) for m in page])
+        loop = asyncio.get_running_loop()
+        return await asyncio.gather(*(
+            loop.run_in_executor(executor, extract_module, self.extractor, module, self.max_concepts) for module in page
+        ))
+
+    async def write(self, page: list[dict], extracted: list[list[dict]]):
+        concepts = {}
+        for found in extracted:
+            for concept in found:
+                if concept["uid"] not in self._written:
+                    concepts.setdefault(concept["uid"], {key: concept[key] for key in ("uid", "name", "normalized")})
+        for batch in batched(concepts.values(), self.batch_size):
+            await self.run_query(MERGE_CONCEPTS, {"rows": batch})
+        self._written.update(concepts)
+        links = [
+            {"module": module["uid"], "extractor": self.extractor.name,
+             "concepts": [{"uid": c["uid"], "weight": c["weight"]} for c in found]}
+            for module, found in zip(page, extracted)
+        ]
+        for batch in batched(links, max(self.batch_size // max(self.max_concepts, 1), 1)):
+            await self.run_query(MERGE_LINKS, {"rows": batch})
+        self.checkpoint.concepts += len(concepts)
+        self.checkpoint.links += sum(len(found) for found in extracted)
+
+    async def run(self, pages: AsyncIterator[list[dict]]) -> Checkpoint:
+        await self.install_schema()
+        executor = ProcessPoolExecutor(self.workers) if self.workers > 1 else None
+        try:
+            async for page in pages:
+                extracted = await self.extract(page, executor)
+                await self.write(page, extracted)
+                self.checkpoint.after = page[-1]["uid"]
+                self.checkpoint.modules += len(page)
+                self.checkpoint.save(self.checkpoint_path)
+                logger.info("%d modules, %d new concepts, %d links", self.checkpoint.modules, self.checkpoint.concepts, self.checkpoint.links)
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        return self.checkpoint
+
+######################################################################
+# CLI
+
+async def main(args):
+    pipeline = ConceptPipeline(
+        load_extractor(args.extractor),
+        batch_size=args.batch_size,
+        max_concepts=args.max_concepts,
+        workers=args.workers,
+        checkpoint_path=None if args.dry_run else args.checkpoint,
+        dry_run=args.dry_run
+    )
+    after = pipeline.resume(args.restart)
+    connect = not (args.dry_run and args.seed) # a dry run from the database still reads it
+    if connect:
+        from api.utils import db
+        await db.connect()
+    try:
+        if args.seed:
+            pages = seed_modules(args.seed, args.page_size, after, resolve=not args.dry_run)
+        else:
+            pages = graph_modules(args.page_size, after)
+        checkpoint = await pipeline.run(pages)
+    finally:
+        if connect:
+            await db.disconnect()
+    logger.info("%s %d concepts and %d links for %d modules", "Extracted" if args.dry_run else "Wrote",
+                checkpoint.concepts, checkpoint.links, checkpoint.modules)
+    if args.dry_run and args.seed:
+        for module in [m async for page in seed_modules(args.seed, args.page_size) for m in page]:
+            found = extract_module(pipeline.extractor, module, args.max_concepts)
+            logger.info("%s: %s", module["name"], ", ".join(f"{c['name']} ({c['weight']:.2f})" for c in found))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+    extract = commands.add_parser("extract", help="extract concepts from module text & write them to the graph")
+    extract.add_argument("--page-size", type=int, default=200, help="modules read (and checkpointed) at a time")
+    extract.add_argument("--batch-size", type=int, default=1000, help="rows per UNWIND transaction")
+    extract.add_argument("--checkpoint", default="concepts.checkpoint.json", help="progress file, resumed from if it exists")
+    extract.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first module")
+    extract.add_argument("--extractor", default="keywords", help="registered name or package.module:Class")
+    extract.add_argument("--max-concepts", type=int, default=8, help="concepts kept per module")
+    extract.add_argument("--workers", type=int, default=1, help="extractor processes")
+    extract.add_argument("--seed", help="read modules from a seed .cypher file instead of the database")
+    extract.add_argument("--dry-run", action="store_true", help="extract without touching the database (or the checkpoint)")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,528 @@
+"""
+Bulk graph loader
+    Loads the seed files in this folder (or synthetic datasets for load tests)
+    into Neo4j with batched `UNWIND` transactions instead of one giant `CREATE`.
+        - the unique constraints declared on the neomodel models are installed first
+        - every node gets a `uid` (generated when the seed file has none) which is indexed
+          per label and used to match relationship endpoints
+        - Message nodes get the `room` & epoch `timestamp` the chat history/export queries use
+
+    python -m data.loader seed data/simple_initiate.cypher [--batch-size 1000] [--dry-run]
+    python -m data.loader synthetic --users 100000 [--groups 1000] [--modules 5000] [--seed 42]
+"""
+import re
+import uuid
+import random
+import asyncio
+import argparse
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timezone, timedelta
+from itertools import islice
+
+logger = logging.getLogger("data.loader")
+
+######################################################################
+# SEED FILE PARSER
+#   Supports the subset of Cypher used by the seed files: a `CREATE` of
+#   comma-separated node/relationship patterns with literal property maps
+#   (strings, numbers, booleans, lists, datetime()/date() calls), plus
+#   schema statements (`CREATE CONSTRAINT/INDEX ...`) which are passed through.
+
+@dataclass
+class Node:
+    var: str
+    labels: tuple[str, ...]
+    props: dict
+
+@dataclass
+class Relationship:
+    start: str
+    type: str
+    end: str
+    props: dict
+
+@dataclass
+class Graph:
+    nodes: dict[str, Node] = field(default_factory=dict)
+    relationships: list[Relationship] = field(default_factory=list)
+    schema: list[str] = field(default_factory=list)
+
+
+class CypherSyntaxError(ValueError):
+    pass
+
+
+def strip_comments(text: str) -> str:
+    """Remove // comments that are not inside string literals"""
+    out, i, quote = [], 0, None
+    while i < len(text):
+        char = text[i]
+        if quote:
+            out.append(char)
+            if char == "\\":
+                out.append(text[i + 1:i + 2])
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+            out.append(char)
+        elif text.startswith("//", i):
+            i = text.find("\n", i)
+            if i == -1:
+                break
+            continue
+        else:
+            out.append(char)
+        i += 1
+    return "".join(out)
+
+
+def split_statements(text: str) -> list[str]:
+    statements, current, quote, i = [], [], None, 0
+    while i < len(text):
+        char = text[i]
+        current.append(char)
+        if quote:
+            if char == "\\":
+                current.append(text[i + 1:i + 2])
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in "'\"":
+            quote = char
+        elif char == ";":
+            current.pop()
+            statements.append("".join(current).strip())
+            current = []
+        i += 1
+    statements.append("".join(current).strip())
+    return [s for s in statements if s]
+
+
+class PatternParser:
+    IDENT = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|`[^`]+`")
+    NUMBER = re.compile(r"-?\d+(\.\d+)?([eE][-+]?\d+)?")
+
+    def __init__(self, text: str, graph: Graph, now: datetime):
+        self.text = text
+        self.pos = 0
+        self.graph = graph
+        self.now = now
+        self._anonymous = 0
+
+    # helpers
+    def error(self, message: str):
+        snippet = self.text[self.pos:self.pos + 40].replace("\n", " ")
+        raise CypherSyntaxError(f"{message} at offset {self.pos}: '{snippet}'")
+
+    def skip(self):
+        while self.pos < len(self.text) and self.text[self.pos].isspace():
+            self.pos += 1
+
+    def peek(self, token: str) -> bool:
+        self.skip()
+        return self.text.startswith(token, self.pos)
+
+    def expect(self, token: str):
+        if not self.peek(token):
+            self.error(f"Expected '{token}'")
+        self.pos += len(token)
+
+    def accept(self, token: str) -> bool:
+        if self.peek(token):
+            self.pos += len(token)
+            return True
+        return False
+
+    def ident(self, required: bool = True) -> str | None:
+        self.skip()
+        match = self.IDENT.match(self.text, self.pos)
+        if not match:
+            if required:
+                self.error("Expected identifier")
+            return None
+        self.pos = match.end()
+        return match.group().strip("`")
+
+    # grammar
+    def parse_create(self):
+        self.expect("CREATE")
+        while True:
+            self.parse_pattern()
+            if not self.accept(","):
+                break
+        self.skip()
+        if self.pos != len(self.text):
+            self.error("Unexpected trailing input")
+
+    def parse_pattern(self):
+        left = self.parse_node()
+        while self.peek("-") or self.peek("<"):
+            incoming = self.accept("<")
+            self.expect("-")
+            self.expect("[")
+            self.ident(required=False) # relationship variable, unused
+            self.expect(":")
+            rel_type = self.ident()
+            props = self.parse_map() if self.peek("{") else {}
+            self.expect("]")
+            self.expect("-")
+            outgoing = self.accept(">")
+            if incoming == outgoing:
+                self.error("Relationships need exactly one direction")
+            right = self.parse_node()
+            start, end = (left, right) if outgoing else (right, left)
+            self.graph.relationships.append(Relationship(start, rel_type, end, props))
+            left = right
+
+    def parse_node(self) -> str:
+        self.expect("(")
+        var = self.ident(required=False)
+        labels = []
+        while self.accept(":"):
+            labels.append(self.ident())
+        props = self.parse_map() if self.peek("{") else {}
+        self.expect(")")
+        if var is None:
+            self._anonymous += 1
+            var = f"_anonymous{self._anonymous}"
+        if labels or props:
+            if not labels:
+                self.error(f"Node '{var}' needs at least one label")
+            if var in self.graph.nodes:
+                self.error(f"Node '{var}' defined twice")
+            self.graph.nodes[var] = Node(var, tuple(labels), props)
+        elif var not in self.graph.nodes:
+            self.error(f"Reference to undefined node '{var}'")
+        return var
+
+    def parse_map(self) -> dict:
+        self.expect("{")
+        result = {}
+        if self.accept("}"):
+            return result
+        while True:
+            key = self.ident()
+            self.expect(":")
+            result[key] = self.parse_value()
+            if self.accept("}"):
+                return result
+            self.expect(",")
+
+    def parse_value(self):
+        self.skip()
+        char = self.text[self.pos:self.pos + 1]
+        if char in ("'", '"'):
+            return self.parse_string()
+        if char == "[":
+            self.pos += 1
+            items = []
+            if self.accept("]"):
+                return items
+            while True:
+                items.append(self.parse_value())
+                if self.accept("]"):
+                    return items
+                self.expect(",")
+        match = self.NUMBER.match(self.text, self.pos)
+        if match:
+            self.pos = match.end()
+            return float(match.group()) if match.group(1) or match.group(2) else int(match.group())
+        name = self.ident()
+        lowered = name.lower()
+        if lowered in ("true", "false"):
+            return lowered == "true"
+        if lowered == "null":
+            return None
+        if lowered in ("datetime", "date"):
+            self.expect("(")
+            argument = None if self.peek(")") else self.parse_value()
+            self.expect(")")
+            if argument is None:
+                return self.now if lowered == "datetime" else self.now.date()
+            parsed = datetime.fromisoformat(argument.replace("Z", "+00:00"))
+            return parsed if lowered == "datetime" else parsed.date()
+        self.error(f"Unsupported value '{name}'")
+
+    def parse_string(self) -> str:
+        quote = self.text[self.pos]
+        self.pos += 1
+        out = []
+        while self.pos < len(self.text):
+            char = self.text[self.pos]
+            if char == "\\":
+                out.append(self.text[self.pos + 1])
+                self.pos += 2
+            elif char == quote:
+                self.pos += 1
+                return "".join(out)
+            else:
+                out.append(char)
+                self.pos += 1
+        self.error("Unterminated string")
+
+
+def parse_cypher_file(path: str) -> Graph:
+    with open(path, encoding="utf-8") as f:
+        text = strip_comments(f.read())
+    graph, now = Graph(), datetime.now(timezone.utc)
+    for statement in split_statements(text):
+        if re.match(r"CREATE\s+(CONSTRAINT|INDEX)\b", statement, re.IGNORECASE):
+            graph.schema.append(statement)
+        elif re.match(r"CREATE\b", statement):
+            PatternParser(statement, graph, now).parse_create()
+        else:
+            raise CypherSyntaxError(f"Unsupported statement: '{statement[:40]}'")
+    return graph
+
+######################################################################
+# BATCHED WRITES
+
+def key_label(labels: tuple[str, ...]) -> str:
+    """Label used to index/match a node by uid (User if present so its unique constraint is used)"""
+    return "User" if "User" in labels else labels[0]
+
+def label_expression(labels) -> str:
+    return ":".join(f"`{label}`" for label in labels)
+
+def batched(iterable, size: int):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class GraphWriter:
+    """Groups rows per label set / relationship shape and writes them in `batch_size` UNWIND transactions"""
+    def __init__(self, batch_size: int = 1000, dry_run: bool = False):
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.nodes_written = 0
+        self.relationships_written = 0
+        self._indexed: set[str] = set()
+
+    async def run(self, query: str, params: dict | None = None):
+        if self.dry_run:
+            return
+        from neomodel import adb
+        await adb.cypher_query(query, params)
+
+    async def install_constraints(self, schema: list[str] = ()):
+        if self.dry_run:
+            return
+        from neomodel import adb
+        from api.models.social import User
+        from api.models.chat import Chatroom, Message
+        from api.models.learning import Classroom, LearningModule
+        for model in (User, Chatroom, Message, Classroom, LearningModule):
+            await adb.install_labels(model) # unique constraints declared on the model
+            self._indexed.add(model.__label__) # uid is covered by the constraint
+        for statement in schema:
+            await self.run(statement)
+
+    async def ensure_uid_index(self, label: str):
+        if label in self._indexed or label == "User": # User.uid is covered by the model's constraint
+            return
+        await self.run(f"CREATE INDEX {label.lower()}_uid IF NOT EXISTS FOR (n:`{label}`) ON (n.uid)")
+        self._indexed.add(label)
+
+    async def write_nodes(self, labels: tuple[str, ...], rows):
+        await self.ensure_uid_index(key_label(labels))
+        query = f"UNWIND $rows AS row CREATE (n:{label_expression(labels)}) SET n = row"
+        for batch in batched(rows, self.batch_size):
+            await self.run(query, {"rows": batch})
+            self.nodes_written += len(batch)
+
+    async def write_relationships(self, start_label: str, rel_type: str, end_label: str, rows):
+        await self.ensure_uid_index(start_label)
+        await self.ensure_uid_index(end_label)
+        query = (
+            f"UNWIND $rows AS row "
+            f"MATCH (a:`{start_label}` {{uid: row.start}}) "
+            f"MATCH (b:`{end_label}` {{uid: row.end}}) "
+            f"CREATE (a)-[r:`{rel_type}`]->(b) SET r = row.props"
+        )
+        for batch in batched(rows, self.batch_size):
+            await self.run(query, {"rows": batch})
+            self.relationships_written += len(batch)
+
+
+def epoch_seconds(value, default: datetime) -> float:
+    """Seed timestamp (ISO string, date, datetime or number) as epoch seconds, naive values are UTC"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if value is None:
+        value = default
+    elif isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    elif not isinstance(value, datetime): # date
+        value = datetime(value.year, value.month, value.day)
+    return (value if value.tzinfo else value.replace(tzinfo=timezone.utc)).timestamp()
+
+def normalize_messages(graph: Graph):
+    """
+    Give seeded Messages the shape the chat routes query (see api/models/chat.py): the uid
+    of the Chatroom that HAS_MESSAGE them as `room`, and `timestamp` in epoch seconds
+    """
+    for rel in graph.relationships:
+        if rel.type == "HAS_MESSAGE" and "Message" in graph.nodes[rel.end].labels:
+            graph.nodes[rel.end].props["room"] = graph.nodes[rel.start].props["uid"]
+    now = datetime.now(timezone.utc)
+    for node in graph.nodes.values():
+        if "Message" in node.labels:
+            node.props["timestamp"] = epoch_seconds(node.props.get("timestamp"), now)
+
+
+async def load_graph(graph: Graph, writer: GraphWriter):
+    await writer.install_constraints(graph.schema)
+    for node in graph.nodes.values():
+        node.props.setdefault("uid", uuid.uuid4().hex)
+    normalize_messages(graph)
+
+    by_labels: dict[tuple[str, ...], list[dict]] = {}
+    for node in graph.nodes.values():
+        by_labels.setdefault(node.labels, []).append(node.props)
+    for labels, rows in by_labels.items():
+        await writer.write_nodes(labels, rows)
+
+    by_shape: dict[tuple[str, str, str], list[dict]] = {}
+    for rel in graph.relationships:
+        start, end = graph.nodes[rel.start], graph.nodes[rel.end]
+        shape = (key_label(start.labels), rel.type, key_label(end.labels))
+        by_shape.setdefault(shape, []).append({"start": start.props["uid"], "end": end.props["uid"], "props": rel.props})
+    for (start_label, rel_type, end_label), rows in by_shape.items():
+        await writer.write_relationships(start_label, rel_type, end_label, rows)
+
+######################################################################
+# SYNTHETIC DATASETS
+#   Streams rows so 10^6 users don't have to be held in memory at once.
+#   All users are verified and share the password SYNTHETIC_PASSWORD.
+
+SYNTHETIC_PASSWORD = "Synthetic1!"
+WORDS = (
+    "graph", "testing", "biology", "chemistry", "physics", "algebra", "history", "language",
+    "network", "cell", "energy", "motion", "function", "vector", "matrix", "protein",
+    "reaction", "theory", "practice", "exam", "module", "concept", "model", "data",
+)
+
+@dataclass
+class SyntheticConfig:
+    users: int = 100_000
+    groups: int = 1_000
+    modules: int = 5_000
+    knows: int = 10 # average outgoing KNOWS per user
+    memberships: int = 2 # average IS_IN per user
+    visits: int = 5 # average VISITED per user
+    classroom_share: float = 0.5 # fraction of groups that are classrooms
+    seed: int = 42
+
+
+def _timestamp(rng: random.Random, now: datetime, days: int = 365) -> float:
+    return (now - timedelta(seconds=rng.randint(0, days * 86400))).timestamp()
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+async def load_synthetic(config: SyntheticConfig, writer: GraphWriter):
+    from api.routes.auth.hashing import get_pwd_context
+    rng, now = random.Random(config.seed), datetime.now(timezone.utc)
+    hashed_password = get_pwd_context().hash(SYNTHETIC_PASSWORD) # one bcrypt, shared by every user
+    classrooms = int(config.groups * config.classroom_share)
+
+    await writer.install_constraints()
+    await writer.write_nodes(("User",), ({
+        "uid": f"su{i}",
+        "username": f"user{i}",
+        "email": f"user{i}@example.com",
+        "hashed_password": hashed_password,
+        "is_verified": True,
+        "created_at": _timestamp(rng, now),
+        "last_login": _timestamp(rng, now, 30),
+    } for i in range(config.users)))
+    await writer.write_nodes(("Group", "Classroom"), ({
+        "uid": f"sc{i}", "name": f"Classroom {i} {_text(rng, 2)}", "created": now, "bio": _text(rng, 12),
+    } for i in range(classrooms)))
+    await writer.write_nodes(("Group",), ({
+        "uid": f"sg{i}", "name": f"Group {i} {_text(rng, 2)}", "created": now, "bio": _text(rng, 12),
+    } for i in range(classrooms, config.groups)))
+    await writer.write_nodes(("Module", "LearningModule"), ({
+        "uid": f"slm{i}", "name": f"Module {i}: {_text(rng, 3)}", "created": now, "modified": now, "content": _text(rng, 80),
+    } for i in range(config.modules)))
+
+    def group_uid(i):
+        return f"sc{i}" if i < classrooms else f"sg{i}"
+
+    # modules are split over classrooms in order, each classroom's modules form a NEXT chain
+    def module_chains():
+        per_classroom = max(config.modules // max(classrooms, 1), 1)
+        for i in range(config.modules):
+            classroom = min(i // per_classroom, classrooms - 1)
+            yield classroom, i, (i + 1 < config.modules and (i + 1) // per_classroom == i // per_classroom)
+
+    if classrooms:
+        await writer.write_relationships("Classroom", "HAS_MODULE", "LearningModule", (
+            {"start": f"sc{c}", "end": f"slm{i}", "props": {}} for c, i, _ in module_chains()))
+        await writer.write_relationships("LearningModule", "NEXT", "LearningModule", (
+            {"start": f"slm{i}", "end": f"slm{i + 1}", "props": {}} for _, i, has_next in module_chains() if has_next))
+    await writer.write_relationships("User", "KNOWS", "User", (
+        {"start": f"su{u}", "end": f"su{v}", "props": {"created": _timestamp(rng, now)}}
+        for u in range(config.users)
+        for v in rng.sample(range(config.users), min(rng.randint(0, 2 * config.knows), config.users))
+        if u != v))
+    if config.groups:
+        await writer.write_relationships("User", "IS_IN", "Group", (
+            {"start": f"su{u}", "end": group_uid(rng.randrange(config.groups)), "props": {"created": now, "role": "student"}}
+            for u in range(config.users)
+            for _ in range(rng.randint(0, 2 * config.memberships))))
+    if config.modules:
+        await writer.write_relationships("User", "VISITED", "LearningModule", (
+            {"start": f"su{u}", "end": f"slm{rng.randrange(config.modules)}", "props": {"firstVisit": now, "lastVisit": now}}
+            for u in range(config.users)
+            for _ in range(rng.randint(0, 2 * config.visits))))
+
+######################################################################
+# CLI
+
+async def main(args):
+    writer = GraphWriter(batch_size=args.batch_size, dry_run=args.dry_run)
+    if not args.dry_run:
+        from api.utils import db
+        await db.connect()
+    try:
+        if args.command == "seed":
+            for path in args.files:
+                graph = parse_cypher_file(path)
+                logger.info("%s: %d nodes, %d relationships", path, len(graph.nodes), len(graph.relationships))
+                await load_graph(graph, writer)
+        else:
+            await load_synthetic(SyntheticConfig(
+                users=args.users, groups=args.groups, modules=args.modules,
+                knows=args.knows, memberships=args.memberships, visits=args.visits, seed=args.seed
+            ), writer)
+    finally:
+        if not args.dry_run:
+            await db.disconnect()
+    logger.info("%s %d nodes and %d relationships",
+                "Parsed" if args.dry_run else "Wrote", writer.nodes_written, writer.relationships_written)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per UNWIND transaction")
+    parser.add_argument("--dry-run", action="store_true", help="parse/generate without touching the database")
+    commands = parser.add_subparsers(dest="command", required=True)
+    seed = commands.add_parser("seed", help="load .cypher seed files")
+    seed.add_argument("files", nargs="+")
+    synthetic = commands.add_parser("synthetic", help="generate & load a synthetic dataset")
+    defaults = SyntheticConfig()
+    for name in ("users", "groups", "modules", "knows", "memberships", "visits", "seed"):
+        synthetic.add_argument(f"--{name}", type=int, default=getattr(defaults, name))
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("passlib").setLevel(logging.ERROR)
+    asyncio.run(main(parse_args()))
@@ -0,0 +1,8 @@
+# Settings needed to import the app modules, real values are never contacted
+import os
+
+for key, value in {
+    "NEO4J_URI": "neo4j://localhost:7687", "NEO4J_USERNAME": "neo4j", "NEO4J_PASSWORD": "test",
+    "SECRET_KEY": "test-secret-key", "MAIL_USERNAME": "test", "MAIL_PASSWORD": "test",
+}.items():
+    os.environ.setdefault(key, value)
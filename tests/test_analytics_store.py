@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+from api.utils import queries
+from api.routes.analytics.store import ActivityStore
+
+
+def event(statement_id, user="u1", module="m1", classroom=None, timestamp=100.0, duration=10.0, score=None, completed=0, verb="experienced"):
+    return {"statement_id": statement_id, "user": user, "verb": verb, "module": module, "classroom": classroom,
+            "timestamp": timestamp, "duration": duration, "score": score, "completed": completed}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ActivityStore(str(tmp_path / "analytics.sqlite3"), fold_size=2)
+    yield store
+    asyncio.run(store.close())
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+def test_rollups_are_updated_incrementally(store):
+    async def scenario():
+        await store.append([
+            event("s1", timestamp=100, duration=10, classroom="c1"),
+            event("s2", timestamp=50, duration=5, score=0.5, classroom="c1"),
+            event("s3", timestamp=200, duration=1, score=0.9, completed=1, verb="completed", classroom="c1"),
+            event("s4", user="u2", timestamp=300, duration=2),
+            event("s5", module="m2", timestamp=400, duration=3),
+        ])
+        return await store.user_activity("u1", 10), await store.module_stats("m1"), await store.classroom_learners("c1")
+    (totals, modules), module, classroom = run(scenario())
+
+    assert totals == {"events": 4, "modules": 2, "completions": 1, "duration": 19.0, "first": 50.0, "last": 400.0}
+    m1 = next(row for row in modules if row["uid"] == "m1")
+    assert m1 == {"uid": "m1", "events": 3, "duration": 16.0, "first": 50.0, "last": 200.0, "best_score": 0.9, "completed": 1}
+    assert [row["uid"] for row in modules] == ["m2", "m1"] # most recent first
+    assert module == {"uid": "m1", "events": 4, "learners": 2, "completions": 1, "duration": 18.0, "last": 300.0}
+    assert classroom == [{"uid": "u1", "events": 3, "modules": 1, "completions": 1, "duration": 16.0, "last": 200.0}]
+
+
+def test_completion_is_counted_once(store):
+    async def scenario():
+        await store.append([event("s1", completed=1), event("s2", completed=1), event("s3", user="u2", completed=1)])
+        return await store.module_stats("m1")
+    assert run(scenario())["completions"] == 2
+
+
+def test_statement_ids_deduplicate_per_user(store):
+    async def scenario():
+        first = await store.append([event("s1"), event("s2")])
+        retried = await store.append([event("s1"), event("s2"), event("s3")])
+        other_user = await store.append([event("s1", user="u2")]) # same id, someone else's statement
+        no_id = await store.append([event(None), event(None)])
+        return first, retried, other_user, no_id, await store.module_stats("m1")
+    first, retried, other_user, no_id, module = run(scenario())
+    assert (first, retried, other_user, no_id) == (2, 1, 1, 2)
+    assert module["events"] == 6 and module["learners"] == 2
+    assert store.duplicates == 2
+
+
+def test_fold_sends_dirty_rollups_once(store, monkeypatch):
+    sent = []
+    async def fake_run(name, **params):
+        assert name == "fold_visits"
+        sent.extend(params["rows"])
+        return []
+    monkeypatch.setattr(queries, "run", fake_run)
+
+    async def scenario():
+        await store.append([event("s1", module="m1"), event("s2", module="m2"), event("s3", module="m3")])
+        folded = await store.fold() # in chunks of fold_size=2
+        pending = await store.pending()
+        again = await store.fold()
+        await store.append([event("s4", module="m1", timestamp=500)])
+        return folded, pending, again, await store.fold()
+    folded, pending, again, refolded = run(scenario())
+    assert (folded, pending, again, refolded) == (3, 0, 0, 1)
+    assert {row["module"] for row in sent[:3]} == {"m1", "m2", "m3"}
+    assert sent[3] == {"user": "u1", "module": "m1", "first": 100.0, "last": 500.0, "events": 2}
@@ -0,0 +1,19 @@
+import pytest
+from fastapi import HTTPException
+from api.routes.chat.services import encode_cursor, decode_cursor
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(1700000000.125, "m-1")) == (1700000000.125, "m-1")
+
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(1.0, "?/+&" * 10)
+    assert all(char.isalnum() or char in "-_=" for char in cursor)
+
+
+@pytest.mark.parametrize("cursor", ["", "not base64!", "bm90IGpzb24=", encode_cursor(1.0, "a")[:-4] + "AAAA", "WzFd"])
+def test_invalid_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
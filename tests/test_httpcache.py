@@ -0,0 +1,70 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from starlette.requests import Request
+from pydantic import BaseModel
+from api.utils.httpcache import HttpCache, matches
+
+
+class Item(BaseModel):
+    uid: str
+    name: str
+
+
+def request(if_none_match: str | None = None) -> Request:
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match is not None else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, False),
+    ('W/"abc"', True),
+    ('"abc"', True), # weak comparison
+    ('"x", W/"abc"', True),
+    ('"x"', False),
+    ("*", False), # handled by `respond`, after checking the resource exists
+])
+def test_matches(header, expected):
+    assert matches(header, 'W/"abc"') is expected
+
+
+def test_not_modified_until_a_tag_is_invalidated():
+    cache, loads = HttpCache(ttl=0), []
+    async def load():
+        loads.append(1)
+        return {"uid": "m1", "name": f"v{len(loads)}"}
+    async def scenario():
+        first = await cache.respond(request(), "module:m1", Item, load, tags=["module:m1"])
+        etag = first.headers["etag"]
+        revalidated = await cache.respond(request(etag), "module:m1", Item, load, tags=["module:m1"])
+        await cache.invalidate("module:m1")
+        changed = await cache.respond(request(etag), "module:m1", Item, load, tags=["module:m1"])
+        return first, revalidated, changed
+    first, revalidated, changed = asyncio.run(scenario())
+    assert first.status_code == 200 and first.body == b'{"uid":"m1","name":"v1"}'
+    assert revalidated.status_code == 304 and revalidated.body == b""
+    assert changed.status_code == 200 and changed.headers["etag"] != first.headers["etag"]
+    assert len(loads) == 2
+
+
+def test_shared_bodies_are_served_without_loading():
+    cache, loads = HttpCache(ttl=60), []
+    async def load():
+        loads.append(1)
+        return {"uid": "m2", "name": "shared"}
+    async def scenario():
+        return [await cache.respond(request(), "module:m2", Item, load, tags=["module:m2"]) for _ in range(3)]
+    responses = asyncio.run(scenario())
+    assert len(loads) == 1 and cache.hits == 2
+    assert {response.body for response in responses} == {b'{"uid":"m2","name":"shared"}'}
+
+
+def test_star_needs_an_existing_resource():
+    cache = HttpCache(ttl=0)
+    async def missing():
+        raise HTTPException(status_code=404, detail="Module not found")
+    async def found():
+        return {"uid": "m3", "name": "x"}
+    with pytest.raises(HTTPException):
+        asyncio.run(cache.respond(request("*"), "module:m3", Item, missing))
+    assert asyncio.run(cache.respond(request("*"), "module:m3", Item, found)).status_code == 304
@@ -0,0 +1,100 @@
+import os
+import asyncio
+import pytest
+from datetime import datetime, date, timezone
+from data.loader import parse_cypher_file, load_graph, GraphWriter, CypherSyntaxError
+
+DATA = os.path.join(os.path.dirname(__file__), "..", "data")
+
+SEED = """
+// comment lines and trailing // comments are dropped
+CREATE CONSTRAINT user_uid IF NOT EXISTS FOR (u:User) REQUIRE u.uid IS UNIQUE;
+CREATE
+(alice:Person:User {uid: 'u1', username: 'alice', note: 'not // a comment; nor a statement end', age: 30, score: 1.5e2,
+    active: true, tags: ['a', "b"], nothing: null, born: datetime('1990-01-01T00:00:00Z'), day: date('2024-05-06')}),
+(bob:User {username: 'bob', quote: 'it\\'s'}),   // no uid
+(c:Classroom {name: 'Maths'}),
+(alice) -[:FRIENDS {created: datetime()}]-> (bob),
+(c) <-[:IS_IN {role: 'student'}]- (bob) -[:KNOWS]-> (:Person {name: 'anonymous'})
+"""
+
+
+@pytest.fixture
+def write(tmp_path):
+    def write(text: str) -> str:
+        path = tmp_path / "seed.cypher"
+        path.write_text(text, encoding="utf-8")
+        return str(path)
+    return write
+
+
+def test_nodes_labels_and_literals(write):
+    graph = parse_cypher_file(write(SEED))
+    alice = graph.nodes["alice"]
+    assert alice.labels == ("Person", "User")
+    assert alice.props["note"] == "not // a comment; nor a statement end"
+    assert alice.props["age"] == 30 and alice.props["score"] == 150.0
+    assert alice.props["active"] is True and alice.props["nothing"] is None
+    assert alice.props["tags"] == ["a", "b"]
+    assert alice.props["born"] == datetime(1990, 1, 1, tzinfo=timezone.utc)
+    assert alice.props["day"] == date(2024, 5, 6)
+    assert graph.nodes["bob"].props == {"username": "bob", "quote": "it's"}
+    assert len(graph.nodes) == 4 # including the anonymous node
+
+
+def test_relationship_directions_and_chains(write):
+    graph = parse_cypher_file(write(SEED))
+    edges = {(r.start, r.type, r.end) for r in graph.relationships}
+    anonymous = next(var for var in graph.nodes if var.startswith("_anonymous"))
+    assert edges == {("alice", "FRIENDS", "bob"), ("bob", "IS_IN", "c"), ("bob", "KNOWS", anonymous)}
+    friends = next(r for r in graph.relationships if r.type == "FRIENDS")
+    assert isinstance(friends.props["created"], datetime) # datetime() is "now"
+
+
+def test_schema_statements_pass_through(write):
+    graph = parse_cypher_file(write(SEED))
+    assert graph.schema == ["CREATE CONSTRAINT user_uid IF NOT EXISTS FOR (u:User) REQUIRE u.uid IS UNIQUE"]
+
+
+@pytest.mark.parametrize("text, message", [
+    ("CREATE (a:User {name: 'x'}), (a) -[:KNOWS]-> (b)", "undefined node"),
+    ("CREATE (a:User), (a:User)", "defined twice"),
+    ("CREATE (a:User), (b:User), (a) -[:KNOWS]- (b)", "one direction"),
+    ("CREATE (a:User {name: 'x})", "Unterminated"),
+    ("CREATE (a:User {when: now()})", "Unsupported value"),
+    ("MATCH (n) RETURN n", "Unsupported statement"),
+])
+def test_syntax_errors(write, text, message):
+    with pytest.raises(CypherSyntaxError, match=message):
+        parse_cypher_file(write(text))
+
+
+@pytest.mark.parametrize("name", ["simple_initiate.cypher", "full_initiate.cypher"])
+def test_shipped_seed_files_parse(name):
+    graph = parse_cypher_file(os.path.join(DATA, name))
+    assert graph.nodes and graph.relationships
+    for relationship in graph.relationships:
+        assert relationship.start in graph.nodes and relationship.end in graph.nodes
+
+
+def test_seeded_messages_get_a_room_and_epoch_timestamps(write):
+    graph = parse_cypher_file(write("""
+        CREATE (room:Chatroom {uid: 'r1', name: 'general'}),
+        (a:Message {text: 'a', timestamp: '2021-01-01'}),
+        (b:Message {text: 'b', timestamp: datetime('2021-01-02T12:00:00Z')}),
+        (c:Message {text: 'c', timestamp: 1700000000}),
+        (room)-[:HAS_MESSAGE]->(a), (room)-[:HAS_MESSAGE]->(b), (room)-[:HAS_MESSAGE]->(c)
+    """))
+    asyncio.run(load_graph(graph, GraphWriter(dry_run=True)))
+    messages = {var: graph.nodes[var].props for var in "abc"}
+    assert all(props["room"] == "r1" for props in messages.values())
+    assert messages["a"]["timestamp"] == datetime(2021, 1, 1, tzinfo=timezone.utc).timestamp()
+    assert messages["b"]["timestamp"] == datetime(2021, 1, 2, 12, tzinfo=timezone.utc).timestamp()
+    assert messages["c"]["timestamp"] == 1700000000.0
+
+
+def test_seed_file_messages_are_normalized():
+    graph = parse_cypher_file(os.path.join(DATA, "full_initiate.cypher"))
+    asyncio.run(load_graph(graph, GraphWriter(dry_run=True)))
+    messages = [node.props for node in graph.nodes.values() if "Message" in node.labels]
+    assert messages and all(isinstance(props["timestamp"], float) and props["room"] for props in messages)
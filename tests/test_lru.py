@@ -0,0 +1,67 @@
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+from api.utils.lru import LRUCache
+from api.routes.auth.cache import TokenUserCache
+from api.routes.learning.paths import PathCache
+
+
+def test_least_recently_used_is_evicted():
+    cache = LRUCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1 # "b" is now the oldest
+    cache.set("c", 3)
+    assert cache.get("b") is None and cache.get("a") == 1 and cache.get("c") == 3
+    assert len(cache) == 2 and cache.stats()["hits"] == 3 and cache.stats()["misses"] == 1
+
+
+def test_entries_expire_at_the_earlier_deadline():
+    cache = LRUCache(maxsize=10, ttl=60)
+    cache.set("a", 1, expires_at=time.time() - 1)
+    assert cache.get("a") is None and len(cache) == 0
+
+
+def test_token_cache_keeps_its_user_index_in_sync():
+    cache = TokenUserCache(maxsize=2, ttl=60)
+    alice, bob = SimpleNamespace(uid="u1"), SimpleNamespace(uid="u2")
+    exp = time.time() + 60
+    cache.set("t1", alice, exp)
+    cache.set("t2", alice, exp)
+    cache.set("t3", bob, exp) # evicts t1
+    assert cache._tokens_by_uid == {"u1": {"t2"}, "u2": {"t3"}}
+    cache.invalidate_user("u1")
+    assert cache.get("t2") is None and cache.get("t3") is bob
+    assert cache._tokens_by_uid == {"u2": {"t3"}}
+
+
+def test_path_loads_are_shared():
+    async def run():
+        cache, calls = PathCache(maxsize=10, ttl=60), []
+        async def load(classroom):
+            calls.append(classroom)
+            await asyncio.sleep(0.01)
+            return {"uid": classroom}
+        paths = await asyncio.gather(*(cache.get_or_load("c1", load) for _ in range(5)))
+        return paths, calls, await cache.get_or_load("c1", load)
+    paths, calls, cached = asyncio.run(run())
+    assert calls == ["c1"] and all(path == {"uid": "c1"} for path in paths) and cached == {"uid": "c1"}
+
+
+def test_cancelled_loader_does_not_cancel_waiters():
+    async def run():
+        cache, started = PathCache(maxsize=10, ttl=60), asyncio.Event()
+        async def load(classroom):
+            started.set()
+            await asyncio.sleep(0.05)
+            return {"uid": classroom}
+        loader = asyncio.create_task(cache.get_or_load("c1", load))
+        await started.wait()
+        waiter = asyncio.create_task(cache.get_or_load("c1", load))
+        await asyncio.sleep(0)
+        loader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await loader
+        return await waiter
+    assert asyncio.run(run()) == {"uid": "c1"}
@@ -0,0 +1,27 @@
+import asyncio
+from types import SimpleNamespace
+from api.utils.mail import MailQueue, OutgoingMail
+
+
+class FailingTransport:
+    async def send(self, mail):
+        raise OSError("connection refused")
+
+    async def close(self):
+        pass
+
+
+def test_stop_dead_letters_mails_awaiting_a_retry():
+    async def run():
+        queue = MailQueue(conf=SimpleNamespace(SUPPRESS_SEND=False), backend="debug", workers=1, retry_backoff=60)
+        queue._make_transport = FailingTransport
+        queue.enqueue(OutgoingMail(["a@example.com"], "Hi", "first"))
+        queue.enqueue(OutgoingMail(["b@example.com"], "Hi", "second"))
+        await queue._queue.join()
+        assert queue.stats()["retrying"] == 2
+        await queue.stop()
+        return queue
+    queue = asyncio.run(run())
+    assert [mail.body for mail in queue.dead_letters] == ["first", "second"]
+    assert all(mail.errors[-1] == "shutdown" for mail in queue.dead_letters)
+    assert queue.stats()["retrying"] == 0
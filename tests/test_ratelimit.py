@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from api.utils.ratelimit import MemoryStorage, SharedStorage, SlidingWindowLimiter, parse_rate
+from api.utils.shared import MemoryBackend
+
+STORAGES = [MemoryStorage, lambda: SharedStorage(MemoryBackend())]
+
+
+def hits(storage, key: str, n: int, now: float, limit: int = 5, window: float = 60) -> list[float]:
+    async def run():
+        return [await storage.hit(key, limit, window, now) for _ in range(n)]
+    return asyncio.run(run())
+
+
+def test_parse_rate():
+    assert parse_rate("10/60") == (10, 60.0)
+
+
+@pytest.mark.parametrize("make", STORAGES)
+def test_allows_up_to_limit_then_blocks_until_window_end(make):
+    storage = make()
+    results = hits(storage, "ip", 6, now=600 + 10)
+    assert results[:5] == [0.0] * 5
+    assert results[5] == pytest.approx(50) # rest of the current window
+
+
+@pytest.mark.parametrize("make", STORAGES)
+def test_previous_window_is_weighted_by_overlap(make):
+    storage = make()
+    hits(storage, "ip", 5, now=600 + 59)
+    # 15s into the next window 75% of the previous 5 hits still count (3.75): two more fit, then
+    # the estimate 3.75 + 2 drops back under the limit once the overlap shrinks to 60%, 9s later
+    assert hits(storage, "ip", 3, now=660 + 15) == [0.0, 0.0, pytest.approx(9)]
+    # two windows later nothing counts anymore
+    assert hits(storage, "ip", 5, now=780 + 1) == [0.0] * 5
+
+
+@pytest.mark.parametrize("make", STORAGES)
+def test_keys_are_independent_and_peek_does_not_count(make):
+    storage = make()
+    hits(storage, "a", 5, now=610)
+    assert hits(storage, "b", 1, now=610) == [0.0]
+    async def peek():
+        return [await storage.peek("b", 5, 60, 610) for _ in range(10)]
+    assert asyncio.run(peek()) == [0.0] * 10
+
+
+def test_reset_clears_memory_counter():
+    storage = MemoryStorage()
+    hits(storage, "ip", 5, now=610)
+    asyncio.run(storage.reset("ip"))
+    assert hits(storage, "ip", 1, now=611) == [0.0]
+
+
+def test_memory_storage_evicts_idle_keys_and_caps_size():
+    storage = MemoryStorage(max_keys=3)
+    for i in range(5):
+        hits(storage, f"k{i}", 1, now=610)
+    assert len(storage) == 3
+    hits(storage, "late", 1, now=610 + 180) # two windows later everything else is idle
+    assert len(storage) == 1
+
+
+def test_limiter_check_raises_429_with_retry_after():
+    limiter = SlidingWindowLimiter("login", "2/60", MemoryStorage())
+    async def run():
+        await limiter.check("ip")
+        await limiter.check("ip")
+        await limiter.check("ip")
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(run())
+    assert error.value.status_code == 429
+    assert int(error.value.headers["Retry-After"]) >= 1
@@ -0,0 +1,139 @@
+import asyncio
+import pytest
+from api.utils.resp import RespClient, RespError, encode_command, read_reply, parse_url
+
+
+def parse(data: bytes):
+    async def run():
+        reader = asyncio.StreamReader()
+        reader.feed_data(data)
+        reader.feed_eof()
+        return await read_reply(reader)
+    return asyncio.run(run())
+
+
+def test_encode_command():
+    assert encode_command(("SET", "k", 12, b"\x00v")) == b"*4\r\n$3\r\nSET\r\n$1\r\nk\r\n$2\r\n12\r\n$2\r\n\x00v\r\n"
+
+
+@pytest.mark.parametrize("data, expected", [
+    (b"+OK\r\n", "OK"),
+    (b":-42\r\n", -42),
+    (b"$5\r\nhe\r\no\r\n", "he\r\no"), # bulk strings are length-prefixed, CRLF inside is data
+    (b"$0\r\n\r\n", ""),
+    (b"$-1\r\n", None),
+    (b"*-1\r\n", None),
+    (b"*3\r\n$1\r\na\r\n$-1\r\n*1\r\n:1\r\n", ["a", None, [1]]),
+])
+def test_read_reply(data, expected):
+    assert parse(data) == expected
+
+
+def test_error_replies_are_returned_not_raised():
+    reply = parse(b"-ERR wrong type\r\n")
+    assert isinstance(reply, RespError) and str(reply) == "ERR wrong type"
+
+
+@pytest.mark.parametrize("data, error", [
+    (b"", ConnectionError),
+    (b"$10\r\nshort\r\n", asyncio.IncompleteReadError),
+    (b"?what\r\n", RespError),
+    (b"$abc\r\n", ValueError),
+])
+def test_read_reply_errors(data, error):
+    with pytest.raises(error):
+        parse(data)
+
+
+def test_parse_url():
+    assert parse_url("redis://:secret@cache:6380/2") == {"host": "cache", "port": 6380, "password": "secret", "db": 2}
+    assert parse_url("redis://localhost") == {"host": "localhost", "port": 6379, "password": None, "db": 0}
+    with pytest.raises(ValueError):
+        parse_url("http://localhost")
+
+######################################################################
+# client against a scripted server
+
+async def serve(respond):
+    """A server answering each command (as a list of str) with `respond(args)` bytes, None = never"""
+    async def handle(reader, writer):
+        try:
+            while line := await reader.readline():
+                args = []
+                for _ in range(int(line[1:])):
+                    await reader.readline()
+                    args.append((await reader.readline())[:-2].decode())
+                reply = respond(args)
+                if reply is not None:
+                    writer.write(reply)
+                    await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    return server, f"redis://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+
+def test_pipelined_replies_are_matched_in_order():
+    async def run():
+        server, url = await serve(lambda args: b"$%d\r\n%s\r\n" % (len(args[1]), args[1].encode()) if args[0] == "ECHO" else b"-ERR unknown\r\n")
+        client = RespClient(url, timeout=1)
+        try:
+            results = await asyncio.gather(*(client.execute("ECHO", f"m{i}") for i in range(50)))
+            replies = await client.pipeline(("ECHO", "x"), ("NOPE",))
+            return results, replies
+        finally:
+            await client.close()
+            server.close()
+    results, replies = asyncio.run(run())
+    assert results == [f"m{i}" for i in range(50)]
+    assert replies[0] == "x" and isinstance(replies[1], RespError)
+
+
+def test_protocol_error_fails_pending_commands_and_reconnects():
+    async def run():
+        replies = iter([b"$abc\r\n", b"+PONG\r\n"])
+        server, url = await serve(lambda args: next(replies))
+        client = RespClient(url, timeout=1)
+        try:
+            with pytest.raises(RespError, match="Protocol error"):
+                await client.execute("PING")
+            return await client.execute("PING")
+        finally:
+            await client.close()
+            server.close()
+    assert asyncio.run(run()) == "PONG"
+
+
+def test_stalled_server_times_out():
+    async def run():
+        server, url = await serve(lambda args: None)
+        client = RespClient(url, timeout=0.1)
+        try:
+            with pytest.raises(RespError, match="Timed out"):
+                await client.execute("PING")
+            assert not client._replies # nothing left waiting
+        finally:
+            await client.close()
+            server.close()
+    asyncio.run(run())
+
+
+def test_reset_stops_the_old_reader():
+    async def run():
+        replies = iter([None, b"+PONG\r\n"]) # the first command never gets its reply
+        server, url = await serve(lambda args: next(replies))
+        client = RespClient(url, timeout=0.1)
+        try:
+            await client._connect()
+            old_reader = client._reader_task
+            with pytest.raises(RespError, match="Timed out"):
+                await client.execute("PING")
+            await asyncio.sleep(0)
+            assert old_reader.cancelled() # can't pop replies meant for the next connection
+            return await client.execute("PING")
+        finally:
+            await client.close()
+            server.close()
+    assert asyncio.run(run()) == "PONG"
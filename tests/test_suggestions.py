@@ -0,0 +1,27 @@
+from api.routes.social.suggestions import SuggestionIndex, build_table
+
+
+def index(edges: list[tuple[str, str]]) -> SuggestionIndex:
+    suggestions = SuggestionIndex(k=5)
+    for a, b in edges:
+        suggestions.neighbours.setdefault(a, set()).add(b)
+        suggestions.neighbours.setdefault(b, set()).add(a)
+    suggestions.table = build_table(suggestions.neighbours, suggestions.k)
+    suggestions.built_at = 0.0
+    return suggestions
+
+
+def test_add_edge_matches_a_rebuild():
+    suggestions = index([("a", "b"), ("b", "c"), ("c", "d")])
+    suggestions.add_edge("d", "e")
+    suggestions.add_edge("a", "c")
+    assert suggestions.table == build_table(suggestions.neighbours, suggestions.k)
+
+
+def test_removed_users_are_no_longer_suggested():
+    suggestions = index([("a", "b"), ("b", "c"), ("c", "d"), ("a", "e"), ("e", "c")])
+    assert "c" in [row["uid"] for row in suggestions.suggest("a")]
+    suggestions.remove_users(["c"])
+    assert "c" not in suggestions.table and "c" not in suggestions.neighbours
+    assert all("c" not in [row["uid"] for row in suggestions.suggest(uid)] for uid in suggestions.table)
+    assert suggestions.table == build_table(suggestions.neighbours, suggestions.k)
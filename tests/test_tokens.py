@@ -0,0 +1,76 @@
+import time
+import pytest
+from datetime import timedelta
+from api.routes.auth.tokens import TokenEngine, TokenError, b64url_encode
+
+
+@pytest.fixture
+def engine():
+    return TokenEngine("HS256", secret_key="test-secret")
+
+
+def test_round_trip_adds_exp_and_type(engine):
+    token = engine.create({"sub": "johndoe"}, timedelta(minutes=5), "access")
+    claims = engine.decode(token, "access")
+    assert claims["sub"] == "johndoe"
+    assert claims["type"] == "access"
+    assert claims["exp"] == pytest.approx(time.time() + 300, abs=2)
+
+
+def test_expired_tokens_are_rejected(engine):
+    token = engine.create({"sub": "johndoe"}, timedelta(minutes=5), "access")
+    with pytest.raises(TokenError, match="expired"):
+        engine.decode(token, now=time.time() + 301)
+    with pytest.raises(TokenError, match="expired"):
+        engine.decode(engine.create({"sub": "johndoe"}, timedelta(seconds=-1), "access"))
+
+
+def test_wrong_type_is_rejected(engine):
+    token = engine.create({"sub": "johndoe"}, timedelta(minutes=5), "refresh")
+    with pytest.raises(TokenError, match="type"):
+        engine.decode(token, "access")
+
+
+def test_tampered_or_foreign_tokens_are_rejected(engine):
+    token = engine.create({"sub": "johndoe"}, timedelta(minutes=5), "access")
+    header, payload, signature = token.split(".")
+    forged = b64url_encode(b'{"sub":"admin","exp":9999999999,"type":"access"}').decode()
+    with pytest.raises(TokenError, match="Signature"):
+        engine.decode(f"{header}.{forged}.{signature}")
+    with pytest.raises(TokenError, match="Signature"):
+        TokenEngine("HS256", secret_key="other-secret").decode(token)
+    none_header = b64url_encode(b'{"alg":"none","typ":"JWT"}').decode()
+    with pytest.raises(TokenError):
+        engine.decode(f"{none_header}.{payload}.")
+
+
+@pytest.mark.parametrize("token", ["", "abc", "a.b.c", "...."])
+def test_malformed_tokens_raise_token_error(engine, token):
+    with pytest.raises(TokenError):
+        engine.decode(token)
+
+
+def test_decode_many_returns_none_for_invalid(engine):
+    good = engine.create({"sub": "a"}, timedelta(minutes=5), "access")
+    bad = engine.create({"sub": "b"}, timedelta(minutes=5), "refresh")
+    results = engine.decode_many([good, bad, "junk"], "access")
+    assert results[0]["sub"] == "a"
+    assert results[1:] == [None, None]
+
+
+@pytest.mark.parametrize("algorithm", ["ES256", "EdDSA"])
+def test_asymmetric_round_trip_and_verify_only_engine(algorithm):
+    serialization = pytest.importorskip("cryptography.hazmat.primitives.serialization")
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+    key = ec.generate_private_key(ec.SECP256R1()) if algorithm == "ES256" else ed25519.Ed25519PrivateKey.generate()
+    private_pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()).decode()
+    public_pem = key.public_key().public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo).decode()
+
+    signer = TokenEngine(algorithm, private_key=private_pem)
+    token = signer.create({"sub": "johndoe"}, timedelta(minutes=5), "access")
+    verifier = TokenEngine(algorithm, public_key=public_pem)
+    assert verifier.decode(token, "access")["sub"] == "johndoe"
+    with pytest.raises(TokenError):
+        verifier.create({"sub": "johndoe"}, timedelta(minutes=5), "access")
+    with pytest.raises(TokenError):
+        TokenEngine("HS256", secret_key="test-secret").decode(token)